@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""Aggregation queries on the row store (SQLite) vs DuckDB over Parquet snapshots
+
+Builds a synthetic SQLite shop database, snapshots its tables with
+AnalyticsEngine, and times the kind of aggregation the LLM generates for
+"total / average / count per ..." questions on both engines, checking that
+they return the same rows. Needs duckdb.
+
+    python benchmarks/analytics.py --orders 5000000
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from common import make_sqlite_db, sqlite_manager, use_workdir
+
+QUERIES = [
+    "SELECT status, COUNT(*) AS orders, SUM(total) AS revenue FROM orders GROUP BY status ORDER BY status",
+    "SELECT product_id, SUM(quantity) AS units, AVG(total) AS average FROM orders "
+    "GROUP BY product_id ORDER BY units DESC LIMIT 10",
+    "SELECT c.city, COUNT(*) AS orders, SUM(o.total) AS revenue FROM orders o "
+    "JOIN customers c ON o.customer_id = c.id GROUP BY c.city ORDER BY revenue DESC",
+    "SELECT strftime('%Y-%m', order_date) AS month, SUM(total) AS revenue FROM orders "
+    "GROUP BY month ORDER BY month",
+    "SELECT p.category, AVG(o.quantity) AS quantity FROM orders o JOIN products p ON o.product_id = p.id "
+    "WHERE o.status = 'delivered' GROUP BY p.category ORDER BY p.category",
+]
+
+
+def best_of(run, repeats: int):
+    best, result = float('inf'), None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = run()
+        best = min(best, time.perf_counter() - start)
+    return result, best * 1000
+
+
+def same_rows(a, b) -> bool:
+    if a is None or b is None or a.shape != b.shape:
+        return False
+    for left, right in zip(a.itertuples(index=False), b.itertuples(index=False)):
+        for x, y in zip(left, right):
+            if isinstance(x, (int, float, np.number)) and isinstance(y, (int, float, np.number)):
+                if not np.isclose(float(x), float(y)):
+                    return False
+            elif x != y:
+                return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Columnar analytics benchmark')
+    parser.add_argument('--customers', type=int, default=50000)
+    parser.add_argument('--orders', type=int, default=2000000)
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--json', type=str, help='Write results to this JSON file')
+    args = parser.parse_args()
+
+    from sutra.analytics import DUCKDB_AVAILABLE, AnalyticsEngine
+    if not DUCKDB_AVAILABLE:
+        print("duckdb is not installed (pip install duckdb)")
+        return 1
+
+    json_path = Path(args.json).resolve() if args.json else None
+
+    with tempfile.TemporaryDirectory() as workdir:
+        use_workdir(workdir)
+        start = time.perf_counter()
+        db = sqlite_manager(make_sqlite_db(Path(workdir) / 'bench_shop.db', args.customers, args.orders))
+        print(f"Built {args.orders:,} orders in {time.perf_counter() - start:.1f}s")
+
+        engine = AnalyticsEngine(db, snapshot_dir=Path(workdir) / 'analytics', min_rows=0)
+        start = time.perf_counter()
+        engine.refresh()
+        snapshot_s = time.perf_counter() - start
+
+        rows = []
+        print(f"\n{'query':<7}{'sqlite ms':>11}{'duckdb ms':>11}{'speedup':>9}  same")
+        for number, sql in enumerate(QUERIES, 1):
+            expected, row_ms = best_of(lambda: db.execute_query(sql), args.repeats)
+            actual, columnar_ms = best_of(lambda: engine.execute_query(sql), args.repeats)
+            same = same_rows(expected, actual)
+            rows.append({'sql': sql, 'sqlite_ms': row_ms, 'duckdb_ms': columnar_ms, 'same': same})
+            print(f"{number:<7}{row_ms:>11.1f}{columnar_ms:>11.1f}{row_ms / max(columnar_ms, 1e-9):>8.1f}x  {same}")
+
+        total_row = sum(r['sqlite_ms'] for r in rows)
+        total_columnar = sum(r['duckdb_ms'] for r in rows)
+        print(f"snapshot: {snapshot_s:.1f}s, total speedup: {total_row / max(total_columnar, 1e-9):.1f}x "
+              f"({engine.routed} of {len(QUERIES) * args.repeats} runs on DuckDB)")
+        engine.close()
+        db.close()
+
+    if json_path:
+        with open(json_path, 'w') as f:
+            json.dump({'customers': args.customers, 'orders': args.orders, 'snapshot_s': snapshot_s,
+                       'queries': rows, 'sqlite_ms': total_row, 'duckdb_ms': total_columnar}, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
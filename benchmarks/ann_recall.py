@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""Recall@k and latency of the ANN backends against exact search
+
+Uses clustered random unit vectors shaped like MiniLM embeddings (384 dims)
+and queries perturbed from indexed points, which mimics questions close to
+stored values.
+
+    python benchmarks/ann_recall.py --size 200000 --k 10
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sutra.ann_index import ExactIndex, IVFIndex, HNSWIndex, HNSWLIB_AVAILABLE, normalize
+
+
+def make_vectors(size: int, dim: int, clusters: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, size)
+    noise = rng.standard_normal((size, dim)).astype(np.float32) * 0.6
+    return normalize(centers[labels] + noise)
+
+
+def make_queries(vectors: np.ndarray, count: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed + 1)
+    picks = vectors[rng.choice(len(vectors), count, replace=False)]
+    return normalize(picks + rng.standard_normal(picks.shape).astype(np.float32) * 0.05)
+
+
+def evaluate(index, queries, truth, k, **search_kwargs) -> dict:
+    recalls = []
+    start = time.perf_counter()
+    for query, expected in zip(queries, truth):
+        _, ids = index.search(query, k=k, **search_kwargs)
+        recalls.append(len(set(ids.tolist()) & set(expected.tolist())) / k)
+    elapsed = time.perf_counter() - start
+    return {
+        f'recall@{k}': round(float(np.mean(recalls)), 4),
+        'latency_ms': round(elapsed / len(queries) * 1000, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ANN recall@k benchmark')
+    parser.add_argument('--size', type=int, default=100000)
+    parser.add_argument('--dim', type=int, default=384)
+    parser.add_argument('--clusters', type=int, default=500)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', type=str, help='Write results to this JSON file')
+    args = parser.parse_args()
+
+    vectors = make_vectors(args.size, args.dim, args.clusters, args.seed)
+    queries = make_queries(vectors, args.queries, args.seed)
+    results = {'size': args.size, 'dim': args.dim, 'k': args.k, 'runs': []}
+
+    start = time.perf_counter()
+    exact = ExactIndex().build(vectors)
+    truth = [exact.search(q, k=args.k)[1] for q in queries]
+    exact_stats = evaluate(exact, queries, truth, args.k)
+    exact_stats.update(backend='exact', build_s=round(time.perf_counter() - start, 2))
+    results['runs'].append(exact_stats)
+    print(f"exact            latency {exact_stats['latency_ms']:8.3f} ms")
+
+    start = time.perf_counter()
+    ivf = IVFIndex().build(vectors)
+    build_s = round(time.perf_counter() - start, 2)
+    print(f"ivf              nlist {ivf.nlist}, built in {build_s}s")
+    for nprobe in (1, 2, 4, 8, 16, 32, 64):
+        if nprobe > ivf.nlist:
+            break
+        stats = evaluate(ivf, queries, truth, args.k, nprobe=nprobe)
+        stats.update(backend='ivf', nprobe=nprobe, build_s=build_s)
+        results['runs'].append(stats)
+        print(f"ivf nprobe={nprobe:<4}  recall@{args.k} {stats[f'recall@{args.k}']:.3f}  "
+              f"latency {stats['latency_ms']:8.3f} ms")
+
+    if HNSWLIB_AVAILABLE:
+        start = time.perf_counter()
+        hnsw = HNSWIndex().build(vectors)
+        build_s = round(time.perf_counter() - start, 2)
+        for ef in (16, 32, 64, 128, 256):
+            hnsw.ef = ef
+            stats = evaluate(hnsw, queries, truth, args.k)
+            stats.update(backend='hnsw', ef=ef, build_s=build_s)
+            results['runs'].append(stats)
+            print(f"hnsw ef={ef:<4}      recall@{args.k} {stats[f'recall@{args.k}']:.3f}  "
+                  f"latency {stats['latency_ms']:8.3f} ms")
+    else:
+        print("hnswlib not installed, skipping HNSW")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,349 @@
+"""Shared helpers for benchmarks: deterministic stubs, synthetic databases, questions and documents"""
+
+import hashlib
+import importlib.util
+import os
+import random
+import re
+import sqlite3
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+FIRST_NAMES = ['john', 'sarah', 'mike', 'emma', 'robert', 'linda', 'james', 'maria', 'david', 'susan',
+               'daniel', 'laura', 'peter', 'olivia', 'kevin', 'nina', 'thomas', 'grace', 'oscar', 'ruth']
+LAST_NAMES = ['smith', 'johnson', 'davis', 'wilson', 'brown', 'taylor', 'moore', 'clark', 'lewis', 'walker',
+              'hall', 'young', 'king', 'wright', 'scott', 'green', 'baker', 'adams', 'nelson', 'hill']
+CITIES = ['new york', 'boston', 'chicago', 'seattle', 'austin', 'denver', 'miami', 'atlanta', 'portland',
+          'phoenix', 'dallas', 'detroit']
+STREETS = ['main st', 'oak avenue', 'pine road', 'maple drive', 'cedar lane', 'elm street', 'lake view']
+PRODUCTS = ['laptop', 'monitor', 'keyboard', 'mouse', 'printer', 'tablet', 'headset', 'webcam', 'router',
+            'speaker', 'dock', 'charger']
+CATEGORIES = ['electronics', 'accessories', 'office', 'networking', 'audio']
+STATUSES = ['pending', 'shipped', 'delivered', 'cancelled', 'returned']
+
+
+class HashingEncoder:
+    """Deterministic bag-of-words encoder standing in for the sentence model
+
+    Each word is hashed into a fixed number of dimensions; texts sharing words
+    get similar vectors, which is enough to exercise every code path offline.
+    """
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+        self.calls = 0
+        self.encoded = 0
+
+    def _vector(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for word in text.lower().split():
+            digest = hashlib.md5(word.encode('utf-8')).digest()
+            for i in range(0, 8, 2):
+                index = int.from_bytes(digest[i:i + 2], 'little') % self.dim
+                vector[index] += 1.0 if digest[i + 8] & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def encode(self, sentences, **kwargs):
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        self.calls += 1
+        self.encoded += len(texts)
+        matrix = np.stack([self._vector(t) for t in texts]) if texts else np.zeros((0, self.dim), np.float32)
+        return matrix[0] if single else matrix
+
+
+def install_stub_encoder(dim: int = 384) -> HashingEncoder:
+    """Route every SharedEncoder lookup to a HashingEncoder"""
+    from sutra.embeddings import set_encoder
+    encoder = HashingEncoder(dim)
+    set_encoder(encoder)
+    return encoder
+
+
+class StubLLM:
+    """Deterministic stand-in for the chat model used by NLPProcessor
+
+    Answers with a query over the first table in the prompt's schema, filtered
+    by the first literal value listed, after an optional simulated latency.
+    """
+
+    def __init__(self, latency_ms: float = 0.0):
+        self.latency_ms = latency_ms
+        self.calls = 0
+
+    def __call__(self, model: str, prompt: str, temperature: float) -> str:
+        self.calls += 1
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        table = re.search(r"CREATE TABLE [`\"]?(\w+)", prompt)
+        literal = re.search(r"^- (\w+)\.(\w+) = '((?:[^']|'')*)'", prompt, re.MULTILINE)
+        if literal:
+            return f"SELECT * FROM {literal.group(1)} WHERE {literal.group(2)} = '{literal.group(3)}'"
+        return f"SELECT * FROM {table.group(1) if table else 'sqlite_master'} LIMIT 50"
+
+
+def install_stub_llm(latency_ms: float = 0.0) -> StubLLM:
+    """Route chat_completion API calls to a StubLLM (and bypass the on-disk LLM cache)"""
+    import config
+    from sutra.llm_cache import set_completion_backend
+    config.LLM_CACHE_MODE = 'off'
+    llm = StubLLM(latency_ms)
+    set_completion_backend(llm)
+    return llm
+
+
+def use_workdir(workdir) -> Path:
+    """chdir into workdir and move every config path under data/ into it, keeping the repo clean"""
+    import config
+    workdir = Path(workdir)
+    os.chdir(workdir)
+    data_dir = config.DATA_DIR
+    for name, value in list(vars(config).items()):
+        if isinstance(value, Path) and value.is_relative_to(data_dir):
+            setattr(config, name, workdir / value.relative_to(config.BASE_DIR))
+    config.FEEDBACK_DB = config.OUTPUT_DIR / 'feedback.db'
+    return workdir
+
+
+def vocabulary(base: List[str], size: Optional[int]) -> List[str]:
+    """base words, extended with numbered variants up to size distinct entries"""
+    if not size or size <= len(base):
+        return base[:size] if size else base
+    return base + [f"{base[i % len(base)]} {i // len(base) + 1}" for i in range(size - len(base))]
+
+
+def make_sqlite_db(path: Path, customers: int = 1000, orders: int = 5000, seed: int = 0,
+                   cities: Optional[int] = None, products: Optional[int] = None) -> Path:
+    """Shop database with customers, products and orders of configurable size
+
+    cities / products set the cardinality of those columns (default: the base lists).
+    """
+    rng = random.Random(seed)
+    city_names = vocabulary(CITIES, cities)
+    product_names = vocabulary(PRODUCTS, products)
+    path = Path(path)
+    if path.exists():
+        path.unlink()
+
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE customers (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT, email TEXT, phone TEXT, city TEXT, address TEXT
+        );
+        CREATE TABLE products (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT, category TEXT, price REAL
+        );
+        CREATE TABLE orders (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            customer_id INTEGER, product_id INTEGER, quantity INTEGER,
+            total REAL, order_date TEXT, status TEXT,
+            FOREIGN KEY (customer_id) REFERENCES customers(id),
+            FOREIGN KEY (product_id) REFERENCES products(id)
+        );
+    """)
+
+    customer_rows = []
+    for i in range(customers):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        customer_rows.append((
+            f"{first.title()} {last.title()}",
+            f"{first}.{last}{i}@email.com",
+            f"555-{rng.randint(1000, 9999)}",
+            rng.choice(city_names).title(),
+            f"{rng.randint(1, 999)} {rng.choice(STREETS).title()}, {rng.choice(city_names).title()}",
+        ))
+    conn.executemany("INSERT INTO customers (name, email, phone, city, address) VALUES (?, ?, ?, ?, ?)",
+                     customer_rows)
+
+    product_rows = [(p.title(), rng.choice(CATEGORIES), round(rng.uniform(10, 2000), 2)) for p in product_names]
+    conn.executemany("INSERT INTO products (name, category, price) VALUES (?, ?, ?)", product_rows)
+
+    order_rows = []
+    for _ in range(orders):
+        quantity = rng.randint(1, 10)
+        order_rows.append((
+            rng.randint(1, customers), rng.randint(1, len(product_names)), quantity,
+            round(quantity * rng.uniform(10, 2000), 2),
+            f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            rng.choice(STATUSES),
+        ))
+    conn.executemany("INSERT INTO orders (customer_id, product_id, quantity, total, order_date, status) "
+                     "VALUES (?, ?, ?, ?, ?, ?)", order_rows)
+    conn.commit()
+    conn.close()
+    return path
+
+
+def sqlite_manager(path: Path):
+    """DatabaseManager on a SQLite file, with config pointed at it"""
+    import config
+    from sutra.database_manager import DatabaseManager
+    config.DB_TYPE = 'sqlite'
+    config.MYSQL_DATABASE = Path(path).stem
+    return DatabaseManager(str(path), db_type='sqlite')
+
+
+def file_size(path: Path) -> int:
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+
+def tokens_of(texts: List[str]) -> int:
+    return sum(len(t.split()) for t in texts)
+
+
+def question_corpus(db_path: Path, size: int = 200, seed: int = 0) -> List[Tuple[str, str]]:
+    """(question, kind) pairs using values stored in a make_sqlite_db database
+
+    Kinds: simple (fast-path shapes), lookup (names a stored value), analytic
+    (needs the LLM), repeat (an earlier question again) and offtopic.
+    """
+    rng = random.Random(seed)
+    conn = sqlite3.connect(db_path)
+    names = [r[0] for r in conn.execute("SELECT DISTINCT name FROM customers LIMIT 500")]
+    cities = [r[0] for r in conn.execute("SELECT DISTINCT city FROM customers")]
+    products = [r[0] for r in conn.execute("SELECT DISTINCT name FROM products")]
+    conn.close()
+
+    shapes = {
+        'simple': [
+            lambda: f"list customers in {rng.choice(cities)}",
+            lambda: f"how many customers in {rng.choice(cities)}",
+            lambda: f"show {rng.choice(STATUSES)} orders",
+            lambda: "how many orders per status",
+            lambda: "average price by category",
+        ],
+        'lookup': [
+            lambda: f"orders placed by {rng.choice(names)}",
+            lambda: f"what is the email of {rng.choice(names)}",
+            lambda: f"who bought a {rng.choice(products)}",
+        ],
+        'analytic': [
+            lambda: f"top 5 customers by total spending in {rng.choice(cities)}",
+            lambda: "monthly revenue trend for 2024",
+            lambda: f"which city buys the most {rng.choice(products)}s",
+        ],
+        'offtopic': [
+            lambda: "what is the weather tomorrow",
+            lambda: "tell me a joke about databases",
+        ],
+    }
+    weights = {'simple': 0.35, 'lookup': 0.3, 'analytic': 0.15, 'offtopic': 0.05, 'repeat': 0.15}
+
+    corpus: List[Tuple[str, str]] = []
+    kinds = list(weights)
+    for _ in range(size):
+        kind = rng.choices(kinds, [weights[k] for k in kinds])[0]
+        if kind == 'repeat' and corpus:
+            corpus.append((rng.choice(corpus)[0], 'repeat'))
+        else:
+            kind = 'simple' if kind == 'repeat' else kind
+            corpus.append((rng.choice(shapes[kind])(), kind))
+    return corpus
+
+
+def write_docx(path: Path, heading: str, paragraphs: List[str], table: List[List[str]]):
+    """Minimal .docx (heading, paragraphs, one table) written with zipfile, no python-docx needed"""
+    import zipfile
+    from xml.sax.saxutils import escape
+
+    def paragraph(text, style=None):
+        props = f'<w:pPr><w:pStyle w:val="{style}"/></w:pPr>' if style else ''
+        return f'<w:p>{props}<w:r><w:t xml:space="preserve">{escape(text)}</w:t></w:r></w:p>'
+
+    rows = ''.join('<w:tr>' + ''.join(f'<w:tc>{paragraph(cell)}</w:tc>' for cell in row) + '</w:tr>'
+                   for row in table)
+    body = paragraph(heading, 'Heading1') + ''.join(paragraph(p) for p in paragraphs) + f'<w:tbl>{rows}</w:tbl>'
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('[Content_Types].xml',
+                         '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                         '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+                         '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+                         '<Default Extension="xml" ContentType="application/xml"/>'
+                         '<Override PartName="/word/document.xml" ContentType="application/'
+                         'vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/></Types>')
+        archive.writestr('_rels/.rels',
+                         '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                         '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+                         '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/'
+                         'relationships/officeDocument" Target="word/document.xml"/></Relationships>')
+        archive.writestr('word/document.xml',
+                         '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                         '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+                         f'<w:body>{body}</w:body></w:document>')
+
+
+def make_documents(directory: Path, rows: int = 1000, seed: int = 0) -> List[Path]:
+    """Sample purchase records as .txt, .csv and .docx (plus .xlsx when openpyxl is installed)"""
+    rng = random.Random(seed)
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    records = []
+    for i in range(rows):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        records.append({
+            'name': f"{first.title()} {last.title()}", 'email': f"{first}.{last}{i}@email.com",
+            'product': rng.choice(PRODUCTS), 'quantity': rng.randint(1, 10),
+            'total': round(rng.uniform(10, 5000), 2),
+            'date': f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+        })
+
+    paths = []
+    text_path = directory / 'purchases.txt'
+    text_path.write_text('\n'.join(
+        f"{r['name']} bought {r['quantity']} {r['product']}s on {r['date']} for ${r['total']:,.2f}. "
+        f"Email: {r['email']}." for r in records))
+    paths.append(text_path)
+
+    import pandas as pd
+    frame = pd.DataFrame(records)
+    csv_path = directory / 'purchases.csv'
+    frame.to_csv(csv_path, index=False)
+    paths.append(csv_path)
+
+    if importlib.util.find_spec('openpyxl'):
+        xlsx_path = directory / 'purchases.xlsx'
+        frame.to_excel(xlsx_path, index=False)
+        paths.append(xlsx_path)
+
+    docx_path = directory / 'purchases.docx'
+    write_docx(docx_path, 'Purchases',
+               [f"{r['name']} bought {r['quantity']} {r['product']}s on {r['date']}." for r in records[:rows // 2]],
+               [list(records[0])] + [[str(v) for v in r.values()] for r in records[rows // 2:]])
+    paths.append(docx_path)
+    return paths
+
+
+def summarize(timings_ms: List[float]) -> Dict[str, float]:
+    """count / total / mean / median / p95 of a list of millisecond timings"""
+    if not timings_ms:
+        return {'count': 0}
+    ordered = sorted(timings_ms)
+    return {
+        'count': len(ordered),
+        'total_ms': round(sum(ordered), 3),
+        'mean_ms': round(statistics.fmean(ordered), 3),
+        'median_ms': round(statistics.median(ordered), 3),
+        'p95_ms': round(ordered[int(0.95 * (len(ordered) - 1))], 3),
+    }
+
+
+def git_revision() -> Dict[str, object]:
+    """Commit hash of the working tree and whether it has uncommitted changes"""
+    def git(*args):
+        return subprocess.run(['git', *args], cwd=REPO_ROOT, capture_output=True, text=True).stdout.strip()
+    try:
+        return {'commit': git('rev-parse', 'HEAD') or None, 'dirty': bool(git('status', '--porcelain'))}
+    except OSError:
+        return {'commit': None, 'dirty': None}
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""Share of questions answered by the local rule-based fast path, and the latency it saves
+
+Builds a synthetic SQLite shop database, runs a mixed corpus of simple
+(list / count / aggregate / filter) and complex questions through
+SchemaEmbeddings.is_relevant + RuleBasedSQL, and reports how many clear the
+confidence threshold, whether their SQL executes, and the local latency.
+LLM round-trip time is not measured here; pass the latency observed in your
+deployment with --llm-latency-ms to estimate the time saved.
+
+    python benchmarks/fast_path.py --llm-latency-ms 1800
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from common import (CATEGORIES, CITIES, STATUSES, install_stub_encoder, make_sqlite_db, sqlite_manager,
+                    use_workdir)
+
+SIMPLE = [
+    "show all customers", "list products", "how many orders", "how many customers",
+    "show name and email of customers", "average price of products", "maximum total of orders",
+    "how many orders per status", "number of products per category", "average price by category",
+    "total quantity by status", "average quantity of orders",
+] + [f"list customers in {c.title()}" for c in CITIES[:6]] \
+  + [f"how many customers in {c.title()}" for c in CITIES[6:]] \
+  + [f"show {s} orders" for s in STATUSES] \
+  + [f"count {s} orders" for s in STATUSES] \
+  + [f"show products in {c} category" for c in CATEGORIES] \
+  + [f"show orders of customers in {c.title()}" for c in CITIES[:4]]
+
+COMPLEX = [
+    "which customers bought more than 3 laptops", "top 5 customers by total spending",
+    "what is the most popular product in Boston", "customers who never placed an order",
+    "monthly revenue trend for 2024", "which city has the highest average order value",
+    "show orders placed after march", "compare shipped and returned orders by month",
+    "products never ordered", "average number of orders per customer",
+    "who spent the most on monitors", "list customers with more than 10 orders",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local fast path coverage and latency benchmark')
+    parser.add_argument('--customers', type=int, default=2000)
+    parser.add_argument('--orders', type=int, default=10000)
+    parser.add_argument('--llm-latency-ms', type=float, default=1500.0,
+                        help='Assumed LLM round trip per question, for the time-saved estimate')
+    parser.add_argument('--json', type=str, help='Write results to this JSON file')
+    args = parser.parse_args()
+
+    json_path = Path(args.json).resolve() if args.json else None
+    install_stub_encoder()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        use_workdir(workdir)
+        db = sqlite_manager(make_sqlite_db(Path(workdir) / 'bench_shop.db', args.customers, args.orders))
+
+        from sutra.schema_embeddings import SchemaEmbeddings
+        from sutra.fast_path import RuleBasedSQL
+        embeddings = SchemaEmbeddings(db, background=False)
+        fast_path = RuleBasedSQL(db, embeddings.data_inventory)
+
+        rows = []
+        for kind, questions in (('simple', SIMPLE), ('complex', COMPLEX)):
+            for question in questions:
+                _, _, _, hits = embeddings.is_relevant(question)
+                start = time.perf_counter()
+                result = fast_path.generate(question, hits)
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                local = bool(result and result.confidence >= fast_path.threshold)
+                executes = local and db.execute_query(result.sql) is not None
+                rows.append({'question': question, 'kind': kind, 'local': local, 'executes': executes,
+                             'confidence': result.confidence if result else 0.0,
+                             'intent': result.intent if result else None, 'ms': elapsed_ms})
+        db.close()
+
+    print(f"{'corpus':<10}{'questions':>10}{'local':>8}{'share':>8}{'executes':>10}")
+    summary = {}
+    for kind in ('simple', 'complex', 'all'):
+        subset = [r for r in rows if kind == 'all' or r['kind'] == kind]
+        local = [r for r in subset if r['local']]
+        summary[kind] = {'questions': len(subset), 'local': len(local),
+                         'share': round(len(local) / max(1, len(subset)), 3),
+                         'executes': sum(r['executes'] for r in local)}
+        s = summary[kind]
+        print(f"{kind:<10}{s['questions']:>10}{s['local']:>8}{s['share']:>8.0%}{s['executes']:>10}")
+
+    local_ms = statistics.median(r['ms'] for r in rows)
+    saved_s = summary['all']['local'] * (args.llm_latency_ms - local_ms) / 1000
+    print(f"local rule latency: median {local_ms:.2f} ms per question")
+    print(f"estimated LLM time saved: {saved_s:.1f} s over {len(rows)} questions "
+          f"(at {args.llm_latency_ms:.0f} ms per call)")
+
+    false_local = [r['question'] for r in rows if r['kind'] == 'complex' and r['local']]
+    if false_local:
+        print(f"⚠️ complex questions answered locally: {false_local}")
+
+    if json_path:
+        with open(json_path, 'w') as f:
+            json.dump({'customers': args.customers, 'orders': args.orders, 'threshold': fast_path.threshold,
+                       'llm_latency_ms': args.llm_latency_ms, 'summary': summary,
+                       'local_median_ms': local_ms, 'estimated_saved_s': saved_s, 'questions': rows}, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
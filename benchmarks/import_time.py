@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""Import-time regression guard for the entry points
+
+Runs `python -X importtime -c "import <module>"` in a fresh interpreter for
+every entry point, reports the cumulative import time and fails when a module
+exceeds its budget or pulls in a heavy dependency that should load lazily.
+
+    python benchmarks/import_time.py            # check budgets
+    python benchmarks/import_time.py --json out.json
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Heavy packages that must only be imported by the code path that uses them
+HEAVY_MODULES = (
+    'torch', 'sentence_transformers', 'transformers',
+    'matplotlib', 'seaborn', 'plotly', 'streamlit',
+    'openai', 'PyPDF2', 'docx', 'openpyxl',
+)
+
+# Entry point -> cumulative import budget in milliseconds
+BUDGETS_MS = {
+    'main': 400,
+    'sutra.direct_query': 400,
+    'sutra.nlp_processor': 600,
+    'sutra.schema_generator': 200,
+    'sutra.data_loader': 100,
+}
+
+
+def measure(module: str) -> dict:
+    """Import a module in a fresh interpreter and parse -X importtime output"""
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=REPO_ROOT, capture_output=True, text=True
+    )
+
+    imported = {}
+    for line in proc.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        parts = line[len('import time:'):].split('|')
+        try:
+            cumulative_us = int(parts[1].strip())
+        except ValueError:
+            continue  # header line
+        name = parts[2].strip()
+        imported[name] = cumulative_us
+
+    if proc.returncode != 0:
+        error = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else 'import failed'
+        return {'module': module, 'ok': False, 'error': error}
+
+    heavy = sorted({name.split('.')[0] for name in imported
+                    if name.split('.')[0] in HEAVY_MODULES})
+    return {
+        'module': module,
+        'ok': True,
+        'cumulative_ms': round(imported.get(module, 0) / 1000, 1),
+        'heavy_imports': heavy,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Guard entry point import time')
+    parser.add_argument('--json', type=str, help='Write results to this JSON file')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per module (best is kept)')
+    args = parser.parse_args()
+
+    results = []
+    failed = False
+
+    for module, budget in BUDGETS_MS.items():
+        runs = [measure(module) for _ in range(max(1, args.repeat))]
+        ok_runs = [r for r in runs if r['ok']]
+        if not ok_runs:
+            result = runs[0]
+            print(f"⚠️ {module}: could not import ({result['error']})")
+            results.append(result)
+            continue
+
+        result = min(ok_runs, key=lambda r: r['cumulative_ms'])
+        result['budget_ms'] = budget
+        result['over_budget'] = result['cumulative_ms'] > budget
+        results.append(result)
+
+        status = '✅'
+        if result['over_budget'] or result['heavy_imports']:
+            status = '❌'
+            failed = True
+        heavy = f" heavy: {', '.join(result['heavy_imports'])}" if result['heavy_imports'] else ''
+        print(f"{status} {module:<24} {result['cumulative_ms']:>8.1f} ms (budget {budget} ms){heavy}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""Replay a query log before and after creating the advisor's recommended indexes
+
+Builds a synthetic SQLite shop database (no secondary indexes, like a
+generated schema), writes a query log of filter and join queries, lets
+IndexAdvisor recommend and create indexes from it, and replays the log on
+both sides reporting per-query and total execution time.
+
+    python benchmarks/index_advisor.py --customers 50000 --orders 500000
+"""
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from common import CITIES, STATUSES, make_sqlite_db, sqlite_manager, use_workdir
+
+
+def query_log(customers: int, size: int, seed: int = 0):
+    """Filter / join queries of the kind the LLM generates for lookup questions"""
+    rng = random.Random(seed)
+    shapes = [
+        lambda: f"SELECT * FROM customers WHERE city = '{rng.choice(CITIES).title()}'",
+        lambda: f"SELECT COUNT(*) FROM orders WHERE status = '{rng.choice(STATUSES)}'",
+        lambda: f"SELECT * FROM orders WHERE customer_id = {rng.randint(1, customers)}",
+        lambda: (f"SELECT o.id, o.total FROM orders o JOIN customers c ON o.customer_id = c.id "
+                 f"WHERE c.city = '{rng.choice(CITIES).title()}' AND o.status = '{rng.choice(STATUSES)}'"),
+        lambda: f"SELECT SUM(total) FROM orders WHERE order_date >= '2024-{rng.randint(1, 12):02d}-01' "
+                f"AND order_date < '2024-{rng.randint(1, 12):02d}-15'",
+    ]
+    return [rng.choice(shapes)() for _ in range(size)]
+
+
+def replay(db, queries, repeats: int):
+    timings = []
+    for sql in queries:
+        best = float('inf')
+        for _ in range(repeats):
+            start = time.perf_counter()
+            db.cursor.execute(sql)
+            db.cursor.fetchall()
+            best = min(best, time.perf_counter() - start)
+        timings.append(best * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Index advisor before/after benchmark')
+    parser.add_argument('--customers', type=int, default=20000)
+    parser.add_argument('--orders', type=int, default=200000)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--json', type=str, help='Write results to this JSON file')
+    args = parser.parse_args()
+
+    json_path = Path(args.json).resolve() if args.json else None
+
+    with tempfile.TemporaryDirectory() as workdir:
+        use_workdir(workdir)
+        db = sqlite_manager(make_sqlite_db(Path(workdir) / 'bench_shop.db', args.customers, args.orders))
+
+        from sutra.index_advisor import IndexAdvisor
+        advisor = IndexAdvisor(db)
+        queries = query_log(args.customers, args.queries)
+        for sql in queries:
+            advisor.record(sql)
+
+        before = replay(db, queries, args.repeats)
+        recommendations = advisor.recommend()
+        advisor.display(recommendations)
+        created = advisor.create(recommendations)
+        after = replay(db, queries, args.repeats)
+        db.close()
+
+    total_before, total_after = sum(before), sum(after)
+    print(f"\n{'':<10}{'total ms':>10}{'median ms':>11}{'p95 ms':>9}")
+    for label, timings in (('before', before), ('after', after)):
+        p95 = sorted(timings)[int(0.95 * (len(timings) - 1))]
+        print(f"{label:<10}{sum(timings):>10.1f}{statistics.median(timings):>11.3f}{p95:>9.3f}")
+    print(f"speedup: {total_before / max(total_after, 1e-9):.1f}x over {len(queries)} replayed queries, "
+          f"{len(created)} indexes created")
+
+    if json_path:
+        with open(json_path, 'w') as f:
+            json.dump({'customers': args.customers, 'orders': args.orders, 'queries': len(queries),
+                       'indexes': created, 'before_ms': total_before, 'after_ms': total_after,
+                       'before_median_ms': statistics.median(before),
+                       'after_median_ms': statistics.median(after)}, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
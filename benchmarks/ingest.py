@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""Appending a document: incremental inventory update versus a full rebuild
+
+Builds the SchemaEmbeddings inventory of a synthetic SQLite shop database,
+then appends the rows an extractor would return for a new document (new
+customers plus orders that reference customers and products by name) with
+sutra.ingest.append_rows, and folds them in with SchemaEmbeddings.add_rows.
+The same database is then inventoried from scratch for comparison. Uses the
+deterministic stub encoder; the extraction LLM call itself is not timed.
+
+    python benchmarks/ingest.py --customers 20000 --orders 100000 --new-rows 50
+"""
+
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from common import (FIRST_NAMES, LAST_NAMES, PRODUCTS, install_stub_encoder, make_sqlite_db, sqlite_manager,
+                    use_workdir)
+
+
+def document_rows(new_rows: int, seed: int = 1) -> dict:
+    """Extractor output for a document mentioning new_rows orders"""
+    rng = random.Random(seed)
+    customers, orders = [], []
+    for i in range(new_rows):
+        name = f"{rng.choice(FIRST_NAMES).title()} Newcomer{i}"
+        if i % 2 == 0:
+            customers.append({'name': name, 'email': f"newcomer{i}@email.com", 'city': 'Springfield'})
+        else:
+            name = customers[-1]['name']  # Repeat buyer within the document
+        orders.append({'customer_id': {'name': name}, 'product_id': {'name': rng.choice(PRODUCTS).title()},
+                       'quantity': rng.randint(1, 5), 'total': round(rng.uniform(10, 2000), 2),
+                       'order_date': f"2025-01-{rng.randint(1, 28):02d}", 'status': 'pending'})
+    return {'customers': customers, 'orders': orders}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Incremental ingestion benchmark')
+    parser.add_argument('--customers', type=int, default=5000)
+    parser.add_argument('--orders', type=int, default=20000)
+    parser.add_argument('--new-rows', type=int, default=50, help='Orders in the appended document')
+    parser.add_argument('--json', type=str, help='Write results to this JSON file')
+    args = parser.parse_args()
+
+    json_path = Path(args.json).resolve() if args.json else None
+    install_stub_encoder()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        use_workdir(workdir)
+        import config
+        from sutra.ingest import append_rows
+        from sutra.schema_embeddings import SchemaEmbeddings
+
+        db = sqlite_manager(make_sqlite_db(Path(workdir) / 'bench_shop.db', args.customers, args.orders))
+        embeddings = SchemaEmbeddings(db, background=False)
+        before = len(embeddings.data_inventory['embedded_texts'])
+
+        start = time.perf_counter()
+        inserted = append_rows(db, document_rows(args.new_rows))
+        loaded = time.perf_counter()
+        embeddings.add_rows(inserted)
+        appended = time.perf_counter()
+        incremental = sorted(embeddings.data_inventory['embedded_texts'])
+
+        for stale in (embeddings.embed_file, embeddings.index_file):
+            stale.unlink()
+        start_full = time.perf_counter()
+        rebuilt = SchemaEmbeddings(db, background=False)
+        full_s = time.perf_counter() - start_full
+        same = incremental == sorted(rebuilt.data_inventory['embedded_texts'])
+        db.close()
+
+    result = {
+        'rows_inserted': sum(len(frame) for frame in inserted.values()),
+        'embedded_before': before,
+        'embedded_added': len(incremental) - before,
+        'load_ms': round((loaded - start) * 1000, 1),
+        'inventory_update_ms': round((appended - loaded) * 1000, 1),
+        'full_rebuild_ms': round(full_s * 1000, 1),
+        'same_inventory': same,
+        'index_kind': config.ANN_BACKEND if before >= config.ANN_MIN_SIZE else 'exact',
+    }
+    print(f"\nInserted {result['rows_inserted']} rows, embedded {result['embedded_added']} new items "
+          f"(inventory had {before})")
+    print(f"{'append (load + update)':<26}{result['load_ms'] + result['inventory_update_ms']:>10.1f} ms")
+    print(f"{'full rebuild':<26}{result['full_rebuild_ms']:>10.1f} ms")
+    print(f"same embedded texts as a rebuild: {same}")
+
+    if json_path:
+        with open(json_path, 'w') as f:
+            json.dump({'args': vars(args), 'result': result}, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""Inventory size and build time: compact layout versus the legacy expanded layout
+
+Builds the SchemaEmbeddings inventory of a synthetic SQLite shop database
+twice, with INVENTORY_EXPANDED off and on, using the deterministic stub
+encoder, and reports strings, embedded texts, pickle size and build time.
+
+    python benchmarks/inventory_size.py --customers 20000 --orders 100000
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from common import install_stub_encoder, make_sqlite_db, sqlite_manager, file_size, use_workdir
+
+
+def build(db_path: Path, expanded: bool) -> dict:
+    import config
+    from sutra.schema_embeddings import SchemaEmbeddings
+
+    config.INVENTORY_EXPANDED = expanded
+    db = sqlite_manager(db_path)
+    embed_file = config.OUTPUT_DIR / f"schema_embeddings_{config.MYSQL_DATABASE}.pkl"
+    for stale in (embed_file, embed_file.with_suffix('.ann.npz')):
+        if stale.exists():
+            stale.unlink()
+
+    start = time.perf_counter()
+    embeddings = SchemaEmbeddings(db, background=False)
+    elapsed = time.perf_counter() - start
+    db.close()
+
+    inventory = embeddings.data_inventory
+    return {
+        'layout': 'expanded' if expanded else 'compact',
+        'strings': len(inventory['values']),
+        'embedded_texts': len(inventory['embedded_texts']),
+        'pickle_mb': round(file_size(embed_file) / 1e6, 2),
+        'build_s': round(elapsed, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Inventory size/build-time benchmark')
+    parser.add_argument('--customers', type=int, default=5000)
+    parser.add_argument('--orders', type=int, default=20000)
+    parser.add_argument('--json', type=str, help='Write results to this JSON file')
+    args = parser.parse_args()
+
+    json_path = Path(args.json).resolve() if args.json else None
+    install_stub_encoder()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        use_workdir(workdir)
+        db_path = make_sqlite_db(Path(workdir) / 'bench_shop.db', args.customers, args.orders)
+        runs = [build(db_path, expanded=True), build(db_path, expanded=False)]
+
+    legacy, compact = runs
+    print(f"{'layout':<10}{'strings':>10}{'embedded':>10}{'pickle MB':>11}{'build s':>9}")
+    for run in runs:
+        print(f"{run['layout']:<10}{run['strings']:>10}{run['embedded_texts']:>10}"
+              f"{run['pickle_mb']:>11}{run['build_s']:>9}")
+
+    reduction = {
+        'embedded_texts': round(1 - compact['embedded_texts'] / max(1, legacy['embedded_texts']), 3),
+        'pickle_size': round(1 - compact['pickle_mb'] / max(1e-9, legacy['pickle_mb']), 3),
+        'build_time': round(1 - compact['build_s'] / max(1e-9, legacy['build_s']), 3),
+    }
+    print(f"reduction: embedded {reduction['embedded_texts']:.0%}, pickle {reduction['pickle_size']:.0%}, "
+          f"build time {reduction['build_time']:.0%}")
+
+    if json_path:
+        with open(json_path, 'w') as f:
+            json.dump({'customers': args.customers, 'orders': args.orders,
+                       'runs': runs, 'reduction': reduction}, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
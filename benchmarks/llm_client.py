@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""LLMClient against a local mock OpenAI server: rate limits, retries and priorities
+
+Starts an OpenAI-compatible mock (POST /v1/chat/completions) that answers
+after a latency proportional to the prompt and returns 429 with Retry-After
+once its requests / tokens per minute are used up. A burst of large batch
+calls (schema generation sized) is sent while interactive questions keep
+arriving at a fixed interval, in three setups:
+
+    no_limits     client-side limits off: the server's 429s drive retries
+    fifo          client-side limits, every call at the same priority
+    priorities    client-side limits, interactive calls ahead of batch
+
+    python benchmarks/llm_client.py --batch 40 --interactive 20
+"""
+
+import argparse
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from common import summarize
+from sutra.llm_client import BATCH, INTERACTIVE, LLMClient, TokenBucket
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        prompt = body['messages'][0]['content']
+        prompt_tokens = max(1, len(prompt) // 4)
+        server: MockLLMServer = self.server
+
+        retry_after = server.admit(prompt_tokens + server.completion_tokens)
+        if retry_after:
+            self._reply(429, {'error': {'message': 'Rate limit reached', 'type': 'requests'}},
+                        {'Retry-After': f"{retry_after:.3f}"})
+            return
+
+        time.sleep(server.latency_s + prompt_tokens / 1000 * server.s_per_1k_tokens)
+        self._reply(200, {
+            'choices': [{'message': {'role': 'assistant', 'content': 'SELECT 1'}}],
+            'usage': {'prompt_tokens': prompt_tokens, 'completion_tokens': server.completion_tokens,
+                      'total_tokens': prompt_tokens + server.completion_tokens},
+        })
+
+    def _reply(self, status: int, payload: dict, headers: dict = None):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class MockLLMServer(ThreadingHTTPServer):
+    """OpenAI-style endpoint with its own requests / tokens per minute limits"""
+
+    daemon_threads = True
+
+    def __init__(self, requests_per_min: int, tokens_per_min: int, window_s: float,
+                 latency_ms: float, ms_per_1k_tokens: float, completion_tokens: int = 20):
+        super().__init__(('127.0.0.1', 0), MockHandler)
+        self.requests = TokenBucket(requests_per_min, window_s)
+        self.tokens = TokenBucket(tokens_per_min, window_s)
+        self.latency_s = latency_ms / 1000
+        self.s_per_1k_tokens = ms_per_1k_tokens / 1000
+        self.completion_tokens = completion_tokens
+        self.lock = threading.Lock()
+        self.accepted = 0
+        self.rejected = 0
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/v1"
+
+    def admit(self, tokens: int) -> float:
+        """0 when the request is within limits, else seconds to wait"""
+        with self.lock:
+            now = time.monotonic()
+            wait = max(self.requests.delay(1, now), self.tokens.delay(tokens, now))
+            if wait > 0:
+                self.rejected += 1
+                return wait
+            self.requests.take(1, now)
+            self.tokens.take(tokens, now)
+            self.accepted += 1
+            return 0.0
+
+
+def run(setup: str, args) -> dict:
+    server = MockLLMServer(args.rpm, args.tpm, args.window, args.latency_ms, args.ms_per_1k)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    limited = setup != 'no_limits'
+    client = LLMClient(base_url=server.url, api_key='mock', requests_per_min=args.rpm if limited else 0,
+                       tokens_per_min=args.tpm if limited else 0, max_concurrency=args.concurrency,
+                       backoff_s=0.2, window_s=args.window)
+    interactive_priority = INTERACTIVE if setup == 'priorities' else BATCH
+    batch_prompt = 'x' * (args.batch_tokens * 4)
+    interactive_prompt = 'q' * (args.interactive_tokens * 4)
+    interactive_ms, batch_ms, errors = [], [], []
+
+    def call(prompt, priority, timings):
+        start = time.perf_counter()
+        try:
+            client.complete('mock', prompt, 0.0, priority=priority)
+            timings.append((time.perf_counter() - start) * 1000)
+        except Exception as e:
+            errors.append(str(e))
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=call, args=(batch_prompt, BATCH, batch_ms)) for _ in range(args.batch)]
+    for thread in threads:
+        thread.start()
+    for _ in range(args.interactive):
+        time.sleep(args.interval_ms / 1000)
+        thread = threading.Thread(target=call, args=(interactive_prompt, interactive_priority, interactive_ms))
+        thread.start()
+        threads.append(thread)
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    server.shutdown()
+    server.server_close()
+    return {'setup': setup, 'interactive': summarize(interactive_ms), 'batch': summarize(batch_ms),
+            'server_429': server.rejected, 'retries': client.retries, 'errors': len(errors),
+            'elapsed_s': round(elapsed, 2), 'tokens': client.prompt_tokens + client.response_tokens}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='LLM client scheduling benchmark (local mock server)')
+    parser.add_argument('--batch', type=int, default=40, help='Batch calls sent at once')
+    parser.add_argument('--interactive', type=int, default=20, help='Interactive calls, one per interval')
+    parser.add_argument('--interval-ms', type=float, default=250, help='Time between interactive calls')
+    parser.add_argument('--batch-tokens', type=int, default=3000)
+    parser.add_argument('--interactive-tokens', type=int, default=300)
+    parser.add_argument('--rpm', type=int, default=1200, help='Mock (and client) requests per minute')
+    parser.add_argument('--tpm', type=int, default=1_200_000, help='Mock (and client) tokens per minute')
+    parser.add_argument('--window', type=float, default=1.0, help='Seconds of the limits usable in one burst')
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--latency-ms', type=float, default=50)
+    parser.add_argument('--ms-per-1k', type=float, default=100, help='Mock latency per 1000 prompt tokens')
+    parser.add_argument('--json', type=str, help='Write results to this JSON file')
+    args = parser.parse_args()
+
+    results = [run(setup, args) for setup in ('no_limits', 'fifo', 'priorities')]
+
+    print(f"\n{'setup':<12}{'inter p50':>11}{'inter p95':>11}{'batch p50':>11}{'429s':>7}{'retries':>9}"
+          f"{'errors':>8}{'total s':>9}")
+    for r in results:
+        print(f"{r['setup']:<12}{r['interactive'].get('median_ms', 0):>11.0f}{r['interactive'].get('p95_ms', 0):>11.0f}"
+              f"{r['batch'].get('median_ms', 0):>11.0f}{r['server_429']:>7}{r['retries']:>9}{r['errors']:>8}"
+              f"{r['elapsed_s']:>9.1f}")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps({'args': vars(args), 'results': results}, indent=2))
+
+    failed = [r['setup'] for r in results if r['errors']]
+    if failed:
+        print(f"❌ Calls failed in: {', '.join(failed)}")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
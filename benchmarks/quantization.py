@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""Memory and accuracy of float16/int8 embedding storage versus float32
+
+Reports bytes per vector, score error, top-1 agreement and how often the
+relevance decision at the strict threshold (0.85) flips. By default it uses
+synthetic 384-dim unit vectors with queries spread around the threshold;
+pass --texts FILE (one string per line) to embed real values with the model.
+
+    python benchmarks/quantization.py --size 100000
+    python benchmarks/quantization.py --texts values.txt
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sutra.ann_index import normalize
+from sutra.quantization import QuantizedMatrix
+
+THRESHOLD = 0.85  # SchemaEmbeddings.strict_threshold / FeedbackMatcher.similarity_threshold
+
+
+def synthetic(size: int, dim: int, queries: int, seed: int):
+    rng = np.random.default_rng(seed)
+    corpus = normalize(rng.standard_normal((size, dim)).astype(np.float32))
+    picks = corpus[rng.choice(size, queries, replace=False)]
+    # Noise levels chosen so best-match similarities (about 0.71-0.96) straddle the threshold
+    noise = rng.uniform(0.3, 1.0, size=(queries, 1)).astype(np.float32) / np.sqrt(dim)
+    query_vectors = normalize(picks + rng.standard_normal(picks.shape).astype(np.float32) * noise)
+    return corpus, query_vectors
+
+
+def embedded(path: str, queries: int, seed: int):
+    from sutra.embeddings import get_encoder
+    texts = [line.strip() for line in open(path, encoding='utf-8') if line.strip()]
+    corpus = normalize(get_encoder().encode(texts))
+    rng = np.random.default_rng(seed)
+    # Queries are corrupted copies of stored values (typos, truncation)
+    samples = [texts[i] for i in rng.choice(len(texts), min(queries, len(texts)), replace=False)]
+    variants = [s[:max(2, int(len(s) * 0.8))] if i % 2 else s.replace('e', 'a') for i, s in enumerate(samples)]
+    return corpus, normalize(get_encoder().encode(variants))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Quantized embedding storage benchmark')
+    parser.add_argument('--size', type=int, default=100000)
+    parser.add_argument('--dim', type=int, default=384)
+    parser.add_argument('--queries', type=int, default=500)
+    parser.add_argument('--texts', type=str, help='Embed these strings instead of synthetic vectors')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', type=str, help='Write results to this JSON file')
+    args = parser.parse_args()
+
+    if args.texts:
+        corpus, queries = embedded(args.texts, args.queries, args.seed)
+    else:
+        corpus, queries = synthetic(args.size, args.dim, args.queries, args.seed)
+
+    reference = QuantizedMatrix(corpus, 'float32')
+    ref_scores = [reference.dot(q) for q in queries]
+    ref_best = np.array([int(np.argmax(s)) for s in ref_scores])
+    ref_max = np.array([float(s.max()) for s in ref_scores])
+    ref_pass = ref_max >= THRESHOLD
+
+    results = {
+        'vectors': len(corpus), 'dim': corpus.shape[1], 'queries': len(queries),
+        'threshold': THRESHOLD, 'queries_near_threshold': int(np.sum(np.abs(ref_max - THRESHOLD) < 0.05)),
+        'runs': []
+    }
+
+    print(f"{len(corpus)} vectors x {corpus.shape[1]} dims, {len(queries)} queries, "
+          f"{results['queries_near_threshold']} within ±0.05 of {THRESHOLD}")
+    print(f"{'storage':<14}{'bytes/vec':>10}{'total MB':>10}{'max err':>10}{'mean err':>10}"
+          f"{'top1 agree':>12}{'flips':>7}{'ms/query':>10}")
+
+    for dtype, integer_dot in (('float32', False), ('float16', False), ('int8', False), ('int8', True)):
+        matrix = QuantizedMatrix(corpus, dtype, integer_dot=integer_dot)
+
+        start = time.perf_counter()
+        scores = [matrix.dot(q) for q in queries]
+        latency = (time.perf_counter() - start) / len(queries) * 1000
+
+        errors = np.concatenate([np.abs(s - r) for s, r in zip(scores, ref_scores)])
+        best = np.array([int(np.argmax(s)) for s in scores])
+        best_scores = np.array([float(s.max()) for s in scores])
+        flips = int(np.sum((best_scores >= THRESHOLD) != ref_pass))
+
+        name = f"{dtype}{' (int dot)' if integer_dot else ''}"
+        run = {
+            'storage': name,
+            'bytes_per_vector': round(matrix.nbytes / len(matrix), 1),
+            'total_mb': round(matrix.nbytes / 1e6, 2),
+            'max_abs_error': float(errors.max()),
+            'mean_abs_error': float(errors.mean()),
+            'top1_agreement': float(np.mean(best == ref_best)),
+            'threshold_flips': flips,
+            'threshold_flip_rate': flips / len(queries),
+            'latency_ms': round(latency, 3),
+        }
+        results['runs'].append(run)
+        print(f"{name:<14}{run['bytes_per_vector']:>10}{run['total_mb']:>10}{run['max_abs_error']:>10.5f}"
+              f"{run['mean_abs_error']:>10.6f}{run['top1_agreement']:>12.3f}{flips:>7}{run['latency_ms']:>10.3f}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
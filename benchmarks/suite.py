@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""Reproducible benchmark suite for the question pipeline
+
+Generates a SQLite shop database of configurable size and cardinality, a
+synthetic question corpus and sample documents, then times:
+
+    inventory_build   SchemaEmbeddings from scratch
+    inventory_load    SchemaEmbeddings from the pickled inventory
+    relevance         SchemaEmbeddings.is_relevant per question
+    cache_lookup      CacheManager.get_cached_query per question (half the corpus cached)
+    feedback_match    FeedbackMatcher load and find_similar_query per question
+    document_loading  UnstructuredDataLoader.auto_load per document
+    end_to_end        NLPProcessor.process_question per question, with per-stage timings
+
+The embedding model and LLM are deterministic stubs, so runs are comparable
+across commits. Results are written as JSON with the git commit; --compare
+prints the change against an earlier result file.
+
+    python benchmarks/suite.py --json results.json
+    python benchmarks/suite.py --customers 20000 --orders 100000 --compare results.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from common import (git_revision, install_stub_encoder, install_stub_llm, make_documents, make_sqlite_db,
+                    question_corpus, sqlite_manager, summarize, use_workdir)
+
+STAGES = ('inventory_build', 'inventory_load', 'relevance', 'cache_lookup', 'feedback_match',
+          'document_loading', 'end_to_end')
+
+
+@contextlib.contextmanager
+def quiet(enabled: bool = True):
+    """Silence the pipeline's progress prints while timing"""
+    if not enabled:
+        yield
+        return
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def run(args, workdir: Path) -> dict:
+    import config
+    config.RESULT_CACHE_DIR = workdir / 'result_cache'
+    config.FEEDBACK_DB = workdir / 'feedback.db'
+    config.SAVE_QUERIES = False
+    install_stub_encoder()
+    llm = install_stub_llm(args.llm_latency_ms)
+
+    db_path = make_sqlite_db(workdir / 'bench_shop.db', args.customers, args.orders, args.seed,
+                             cities=args.cities, products=args.products)
+    corpus = question_corpus(db_path, args.questions, args.seed)
+    questions = [q for q, _ in corpus]
+    results = {}
+
+    with quiet(not args.verbose):
+        db = sqlite_manager(db_path)
+        from sutra.schema_embeddings import SchemaEmbeddings
+        embeddings, ms = timed(SchemaEmbeddings, db, background=False)
+    results['inventory_build'] = {'ms': round(ms, 3), 'strings': len(embeddings.data_inventory['values']),
+                                  'embedded': len(embeddings.data_inventory['embedded_texts'])}
+
+    with quiet(not args.verbose):
+        _, ms = timed(SchemaEmbeddings, db, background=False)
+    results['inventory_load'] = {'ms': round(ms, 3)}
+
+    with quiet(not args.verbose):
+        hits_by_question = {}
+        timings = []
+        for question in questions:
+            result, ms = timed(embeddings.is_relevant, question)
+            hits_by_question[question] = result[3]
+            timings.append(ms)
+    results['relevance'] = summarize(timings)
+
+    # Cache: SQL for the first half of the distinct questions, then look up all of them
+    with quiet(not args.verbose):
+        from sutra.cache_manager import CacheManager
+        cache = CacheManager()
+        distinct = list(dict.fromkeys(questions))
+        for question in distinct[:len(distinct) // 2]:
+            typed = embeddings.typed_values(question)
+            cache.add_to_cache(question, llm('stub', f"- x.y = 'z'\n{question}", 0), typed)
+        timings, hits = [], 0
+        for question in questions:
+            sql, ms = timed(cache.get_cached_query, question, embeddings.typed_values(question))
+            timings.append(ms)
+            hits += sql is not None
+    results['cache_lookup'] = {**summarize(timings), 'hits': hits}
+
+    # Feedback: every other distinct question recorded as good
+    with quiet(not args.verbose):
+        from sutra.feedback_matcher import FeedbackMatcher
+        from sutra.feedback_store import get_feedback_store
+        store = get_feedback_store()
+        for question in distinct[::2]:
+            store.add(config.MYSQL_DATABASE, question, "SELECT * FROM customers LIMIT 1", 'good')
+        matcher, load_ms = timed(FeedbackMatcher, embeddings.typed_values)
+        timings, hits = [], 0
+        for question in questions:
+            (sql, _), ms = timed(matcher.find_similar_query, question)
+            timings.append(ms)
+            hits += sql is not None
+    results['feedback_match'] = {**summarize(timings), 'load_ms': round(load_ms, 3), 'hits': hits}
+
+    with quiet(not args.verbose):
+        from sutra.data_loader import UnstructuredDataLoader
+        loader = UnstructuredDataLoader()
+        documents = {}
+        for path in make_documents(workdir / 'docs', args.document_rows, args.seed):
+            text, ms = timed(loader.auto_load, str(path))
+            documents[path.suffix] = {'ms': round(ms, 3), 'bytes': path.stat().st_size,
+                                      'chars': len(text or '')}
+    results['document_loading'] = documents
+
+    # End to end with fresh caches and no feedback; the metrics registry gives the stage breakdown
+    config.FEEDBACK_DB = workdir / 'feedback_end_to_end.db'
+    with quiet(not args.verbose):
+        from sutra.metrics import metrics
+        from sutra.nlp_processor import NLPProcessor
+        metrics.reset()
+        llm.calls = 0
+        processor = NLPProcessor(db)
+        processor.cache.clear_cache()
+        timings = []
+        for question in questions:
+            _, ms = timed(processor.process_question, question)
+            timings.append(ms)
+        snapshot = metrics.snapshot()
+    results['end_to_end'] = {**summarize(timings), 'llm_calls': llm.calls,
+                             'stages': {name: {k: round(v, 3) for k, v in s.items()}
+                                        for name, s in snapshot['stages'].items()},
+                             'outcomes': snapshot['outcomes']}
+    db.close()
+    return results
+
+
+def headline(name: str, result: dict) -> float:
+    """Single number per stage used for comparisons (ms)"""
+    if name == 'document_loading':
+        return sum(doc['ms'] for doc in result.values())
+    return result.get('ms', result.get('median_ms', 0.0))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark suite with synthetic data and stub models')
+    parser.add_argument('--customers', type=int, default=2000)
+    parser.add_argument('--orders', type=int, default=10000)
+    parser.add_argument('--cities', type=int, help='Distinct cities (cardinality)')
+    parser.add_argument('--products', type=int, help='Distinct products (cardinality)')
+    parser.add_argument('--questions', type=int, default=200)
+    parser.add_argument('--document-rows', type=int, default=2000)
+    parser.add_argument('--llm-latency-ms', type=float, default=0.0, help='Simulated LLM latency')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', type=str, help='Write results to this JSON file')
+    parser.add_argument('--compare', type=str, help='Earlier results JSON to compare against')
+    parser.add_argument('--verbose', action='store_true', help='Show pipeline output')
+    args = parser.parse_args()
+
+    json_path = Path(args.json).resolve() if args.json else None
+    compare_path = Path(args.compare).resolve() if args.compare else None
+    params = {k: v for k, v in vars(args).items() if k not in ('json', 'compare', 'verbose')}
+
+    with tempfile.TemporaryDirectory() as workdir:
+        use_workdir(workdir)
+        results = run(args, Path(workdir))
+
+    baseline = json.loads(compare_path.read_text())['results'] if compare_path else {}
+    print(f"{'stage':<18}{'ms':>12}" + (f"{'baseline':>12}{'change':>9}" if baseline else ''))
+    for name in STAGES:
+        value = headline(name, results[name])
+        line = f"{name:<18}{value:>12.3f}"
+        if name in baseline:
+            before = headline(name, baseline[name])
+            change = (value - before) / before if before else 0.0
+            line += f"{before:>12.3f}{change:>+9.0%}"
+        print(line)
+    e2e = results['end_to_end']
+    print(f"end_to_end: {e2e['llm_calls']} LLM calls for {e2e['count']} questions")
+
+    if json_path:
+        with open(json_path, 'w') as f:
+            json.dump({'git': git_revision(), 'timestamp': datetime.now().isoformat(),
+                       'python': platform.python_version(), 'params': params, 'results': results}, f, indent=2)
+        print(f"📄 Results written to {json_path}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
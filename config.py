@@ -12,9 +12,10 @@ DATA_DIR = BASE_DIR / 'data'
 INPUT_DIR = DATA_DIR / 'input'
 OUTPUT_DIR = DATA_DIR / 'output'
 
-# Create directories if they don't exist
-for dir_path in [DATA_DIR, INPUT_DIR, OUTPUT_DIR]:
-    dir_path.mkdir(parents=True, exist_ok=True)
+# Create directories lazily (on first write) to keep imports side-effect free
+def ensure_dirs():
+    for dir_path in [DATA_DIR, INPUT_DIR, OUTPUT_DIR]:
+        dir_path.mkdir(parents=True, exist_ok=True)
 
 # OpenAI Configuration
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
@@ -27,10 +28,95 @@ SAVE_QUERIES = os.getenv('SAVE_QUERIES', 'false').lower() == 'true'
 QUERY_LOG_FILE = OUTPUT_DIR / 'query_history.json'
 SIMILARITY_THRESHOLD = 0.9
 
- 
+# Feedback store (SQLite, WAL; shared by all databases and processes)
+FEEDBACK_DB = Path(os.getenv('FEEDBACK_DB', str(OUTPUT_DIR / 'feedback.db')))
+FEEDBACK_POLL_S = float(os.getenv('FEEDBACK_POLL_S', '1'))  # How often matchers look for new feedback
+
+# LLM Response Cache
+# off | readwrite | record | replay (replay never calls the API)
+LLM_CACHE_MODE = os.getenv('LLM_CACHE_MODE', 'readwrite').lower()
+LLM_CACHE_DIR = OUTPUT_DIR / 'llm_cache'
+LLM_CACHE_MAX_ENTRIES = int(os.getenv('LLM_CACHE_MAX_ENTRIES', '2000'))
+
+# LLM Client: every completion is rate limited, queued by priority (interactive before batch) and retried
+LLM_API_BASE = os.getenv('OPENAI_BASE_URL', 'https://api.openai.com/v1')  # Any OpenAI-compatible endpoint, e.g. a local mock
+LLM_REQUESTS_PER_MIN = int(os.getenv('LLM_REQUESTS_PER_MIN', '500'))  # 0 = unlimited
+LLM_TOKENS_PER_MIN = int(os.getenv('LLM_TOKENS_PER_MIN', '90000'))  # 0 = unlimited
+LLM_RATE_WINDOW_S = float(os.getenv('LLM_RATE_WINDOW_S', '60'))  # Burst allowance in seconds of the limits (providers may enforce per second)
+LLM_COMPLETION_TOKENS = int(os.getenv('LLM_COMPLETION_TOKENS', '500'))  # Response size budgeted until usage is known
+LLM_MAX_CONCURRENCY = int(os.getenv('LLM_MAX_CONCURRENCY', '4'))  # Batch calls leave one slot to interactive ones
+LLM_MAX_RETRIES = int(os.getenv('LLM_MAX_RETRIES', '5'))
+LLM_BACKOFF_S = float(os.getenv('LLM_BACKOFF_S', '1.0'))  # First retry delay, doubled per attempt
+LLM_TIMEOUT_S = float(os.getenv('LLM_TIMEOUT_S', '120'))
+
+# Embedding Model
+EMBEDDING_MODEL = os.getenv('EMBEDDING_MODEL', 'all-MiniLM-L6-v2')
+# Optional local embedding daemon (python -m sutra.embedding_server)
+EMBEDDING_SOCKET = Path(os.getenv('EMBEDDING_SOCKET', str(OUTPUT_DIR / 'embedding.sock')))
+EMBEDDING_BATCH_WINDOW_MS = float(os.getenv('EMBEDDING_BATCH_WINDOW_MS', '5'))
+EMBEDDING_MAX_BATCH = int(os.getenv('EMBEDDING_MAX_BATCH', '256'))
+# Stored embedding precision: float32 | float16 | int8 (see benchmarks/quantization.py)
+# int8 quarters memory at float32 speed; float16 halves it but scores several times slower per query
+EMBEDDING_STORAGE = os.getenv('EMBEDDING_STORAGE', 'float32').lower()
+
+# Data Inventory
+# Legacy layout: intern and embed every value part, word and word pair (much larger)
+INVENTORY_EXPANDED = os.getenv('INVENTORY_EXPANDED', 'false').lower() == 'true'
+# Build a missing inventory in a background thread and answer from the partial one meanwhile
+INVENTORY_BACKGROUND = os.getenv('INVENTORY_BACKGROUND', 'true').lower() == 'true'
+# Questions the partial inventory cannot place: allow (send on) | reject
+INVENTORY_PARTIAL_FALLBACK = os.getenv('INVENTORY_PARTIAL_FALLBACK', 'allow').lower()
+
+# Nearest Neighbour Index over inventory embeddings
+ANN_BACKEND = os.getenv('ANN_BACKEND', 'ivf').lower()  # exact | ivf | hnsw (needs hnswlib)
+ANN_MIN_SIZE = int(os.getenv('ANN_MIN_SIZE', '50000'))  # Exact search below this many vectors
+ANN_NLIST = int(os.getenv('ANN_NLIST', '0'))  # IVF cells, 0 = sqrt(n)
+ANN_NPROBE = int(os.getenv('ANN_NPROBE', '16'))  # IVF cells searched per query (recall vs latency)
+ANN_HNSW_EF = int(os.getenv('ANN_HNSW_EF', '64'))  # HNSW search breadth (recall vs latency)
+
+# Local Fast Path (rule-based SQL for simple questions, no LLM call)
+FAST_PATH_ENABLED = os.getenv('FAST_PATH_ENABLED', 'true').lower() == 'true'
+FAST_PATH_THRESHOLD = float(os.getenv('FAST_PATH_THRESHOLD', '0.8'))  # Minimum confidence to skip the LLM
+
+# Speculative Execution: the LLM call starts alongside the local lookups, and the closest
+# near-miss from feedback / the query cache is executed while it runs (abandoned LLM calls still cost tokens)
+SPECULATIVE_ENABLED = os.getenv('SPECULATIVE_ENABLED', 'false').lower() == 'true'
+SPECULATIVE_MARGIN = float(os.getenv('SPECULATIVE_MARGIN', '0.1'))  # How far below a reuse threshold a near-miss may be
+SPECULATIVE_WORKERS = int(os.getenv('SPECULATIVE_WORKERS', '8'))
+
+# SQL Validation: generated SQL is checked against the schema before it runs; failures get one repair LLM call
+SQL_VALIDATION_ENABLED = os.getenv('SQL_VALIDATION_ENABLED', 'true').lower() == 'true'
+
+# Analytical Backend: aggregations over large tables run in DuckDB on Parquet snapshots (needs duckdb)
+ANALYTICS_ENABLED = os.getenv('ANALYTICS_ENABLED', 'false').lower() == 'true'
+ANALYTICS_MIN_ROWS = int(os.getenv('ANALYTICS_MIN_ROWS', '100000'))  # Smaller tables stay on the row store
+ANALYTICS_DIR = OUTPUT_DIR / 'analytics'  # Per-process table snapshots
+
+# Query Result Cache (keyed on normalized SQL + table versions)
+RESULT_CACHE_ENABLED = os.getenv('RESULT_CACHE_ENABLED', 'true').lower() == 'true'
+RESULT_CACHE_MAX_MB = float(os.getenv('RESULT_CACHE_MAX_MB', '64'))  # In-memory results
+RESULT_CACHE_DIR = OUTPUT_DIR / 'result_cache'  # Per-process Parquet spill of evicted results (needs pyarrow)
+RESULT_CACHE_DISK_MB = float(os.getenv('RESULT_CACHE_DISK_MB', '512'))
+
+# Query Guard (EXPLAIN-based cost check before executing generated SQL)
+QUERY_COST_BUDGET = int(os.getenv('QUERY_COST_BUDGET', '5000000'))  # Estimated rows examined
+QUERY_ROW_LIMIT = int(os.getenv('QUERY_ROW_LIMIT', '1000'))  # LIMIT added to over-budget queries
+QUERY_TIMEOUT_S = float(os.getenv('QUERY_TIMEOUT_S', '30'))  # Statement timeout, 0 = none
+
+# Service Mode (python -m sutra.service)
+SERVICE_HOST = os.getenv('SERVICE_HOST', '127.0.0.1')
+SERVICE_PORT = int(os.getenv('SERVICE_PORT', '8000'))
+SERVICE_MAX_ROWS = int(os.getenv('SERVICE_MAX_ROWS', '1000'))  # Rows returned per answer
+
+# Database Contexts (warm per-database state; least recently used are unloaded)
+CONTEXT_POOL_SIZE = int(os.getenv('CONTEXT_POOL_SIZE', '8'))
+CONTEXT_POOL_MAX_MB = float(os.getenv('CONTEXT_POOL_MAX_MB', '0'))  # Inventory memory budget, 0 = none
+
 # Visualization Configuration
 FIGURE_SIZE = (10, 6)
 MAX_DISPLAY_ROWS = 15
+VIZ_POINT_BUDGET = int(os.getenv('VIZ_POINT_BUDGET', '5000'))  # Larger results are aggregated or downsampled
+VIZ_HISTOGRAM_BINS = int(os.getenv('VIZ_HISTOGRAM_BINS', '50'))
 
 # Text Processing
 MAX_TEXT_LENGTH = 20000  # Characters
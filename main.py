@@ -4,20 +4,24 @@
 import argparse
 import sys
 from pathlib import Path
-from sutra.data_loader import UnstructuredDataLoader
-from sutra.schema_generator import SchemaGenerator
-from sutra.database_manager import DatabaseManager
-from sutra.nlp_processor import NLPProcessor
-from sutra.visualizer import DataVisualizer
 import config
-from sutra.direct_query import list_databases
+
+# Heavy modules (torch via sentence-transformers, plotly, document parsers)
+# are imported inside main() only on the code path that needs them.
 
 def main():
     parser = argparse.ArgumentParser(description='Convert unstructured data to SQL database')
     parser.add_argument('--input', type=str, help='Input file path')
     parser.add_argument('--sample', action='store_true', help='Use sample data')
+    parser.add_argument('--append', action='store_true',
+                        help='Add the --input / --sample document to the selected existing database')
     parser.add_argument('--interactive', action='store_true', help='Interactive mode')
     parser.add_argument('--visualize', action='store_true', help='Enable visualization')
+    parser.add_argument('--advise-indexes', action='store_true', help='Recommend indexes from the query log')
+    parser.add_argument('--create-indexes', action='store_true', help='Create the recommended indexes')
+    parser.add_argument('--metrics', action='store_true', help='Print per-stage timings at the end')
+    parser.add_argument('--metrics-out', type=str,
+                        help='Write metrics: .prom for Prometheus text, anything else for JSON lines per question')
     
     args = parser.parse_args()
     
@@ -25,14 +29,23 @@ def main():
     print("NLP TO SQL CONVERTER")
     print("="*60)
     
+    config.ensure_dirs()
+    from sutra.database_manager import DatabaseManager
+    from sutra.metrics import metrics
+    
+    metrics_out = Path(args.metrics_out) if args.metrics_out else None
+    if metrics_out and metrics_out.suffix != '.prom':
+        metrics.jsonl_path = metrics_out
+    
     # Choose mode: Use existing or create new
     if config.DB_TYPE == 'mysql':
+        from sutra.direct_query import list_databases
         databases = list_databases()
         
         print("\n📂 Options:")
         print("  0. Create NEW database (uses API)")
         for i, db_name in enumerate(databases, 1):
-            print(f"  {i}. Use existing: {db_name} (no API)")
+            print(f"  {i}. Use existing: {db_name} ({'append document' if args.append else 'no API'})")
         
         choice = input("\nSelect option: ").strip()
         
@@ -47,6 +60,9 @@ def main():
             
             print(f"\n✅ Creating new database: {config.MYSQL_DATABASE}")
             
+            from sutra.data_loader import UnstructuredDataLoader
+            from sutra.schema_generator import SchemaGenerator
+            
             # Load data and generate schema
             loader = UnstructuredDataLoader()
             if args.sample:
@@ -56,18 +72,22 @@ def main():
             else:
                 data = loader.load_sample()
             
-            if not data:
+            if not data and not loader.tables:
                 print("❌ No data loaded.")
                 return 1
             
-            # Generate schema with API
-            print("\n📄 Generating SQL Schema...")
-            generator = SchemaGenerator(config.OPENAI_API_KEY, config.MODEL_NAME)
-            schema_sql = generator.generate_schema(data)
+            # Tables read from documents go in as rows; only the prose needs the LLM
+            prose = '\n'.join(line for line in (data or '').splitlines() if not line.startswith('[Table '))
             
             # Create database
             db = DatabaseManager(config.DB_PATH if not config.IN_MEMORY_DB else ':memory:', db_type=config.DB_TYPE)
-            db.execute_schema(schema_sql)
+            loader.load_tables(db)
+            if prose.strip():
+                # Generate schema with API
+                print("\n📄 Generating SQL Schema...")
+                generator = SchemaGenerator(config.OPENAI_API_KEY, config.MODEL_NAME)
+                schema_sql = generator.generate_schema(data)
+                db.execute_schema(schema_sql)
             db.display_tables()
             
         else:
@@ -77,19 +97,63 @@ def main():
             
             # Just connect to existing database
             db = DatabaseManager(config.DB_PATH if not config.IN_MEMORY_DB else ':memory:', db_type=config.DB_TYPE)
+            
+            if args.append and (args.input or args.sample):
+                # APPEND A DOCUMENT - rows only, the schema and inventory are extended not rebuilt
+                from sutra.data_loader import UnstructuredDataLoader
+                from sutra.ingest import append_frame, append_rows
+                from sutra.schema_embeddings import SchemaEmbeddings
+                
+                loader = UnstructuredDataLoader()
+                data = loader.auto_load(args.input) if args.input else loader.load_sample()
+                if not data and not loader.tables:
+                    print("❌ No data loaded.")
+                    return 1
+                
+                inserted = {}
+                for name, frame in loader.tables.items():
+                    if not frame.empty:
+                        inserted[name] = append_frame(db, name, frame)
+                        print(f"📥 Appended {len(inserted[name])} rows to {name}")
+                prose = '\n'.join(line for line in (data or '').splitlines() if not line.startswith('[Table '))
+                if prose.strip():
+                    print("\n📄 Extracting rows for the existing schema...")
+                    from sutra.schema_generator import SchemaGenerator
+                    generator = SchemaGenerator(config.OPENAI_API_KEY, config.MODEL_NAME)
+                    rows = generator.generate_rows(prose, db.get_schema_context())
+                    inserted.update(append_rows(db, rows))
+                if inserted:
+                    SchemaEmbeddings(db, background=False).add_rows(inserted)
             db.display_tables()
     
+    # Secondary indexes for columns that logged queries filter and join on
+    if args.advise_indexes or args.create_indexes:
+        from sutra.index_advisor import IndexAdvisor
+        advisor = IndexAdvisor(db)
+        recommendations = advisor.recommend()
+        advisor.display(recommendations)
+        if args.create_indexes and recommendations:
+            advisor.create(recommendations)
+    
     # Interactive mode works with either new or existing database
     if args.interactive:
         print("\n💬 Starting Interactive Mode...")
+        from sutra.nlp_processor import NLPProcessor
         processor = NLPProcessor(db, None)
-        visualizer = DataVisualizer() if args.visualize else None
+        
+        visualizer = None
+        if args.visualize:
+            from sutra.visualizer import DataVisualizer
+            visualizer = DataVisualizer(db)
         
         while True:
             print("\n" + "="*60)
             question = input("❓ Enter your question (or 'exit' to quit): ").strip()
             
             if question.lower() == 'exit':
+                if processor.results:
+                    stats = processor.results.stats()
+                    print(f"💾 Result cache: {stats['hits'] + stats['disk_hits']} hits, {stats['misses']} misses")
                 break
             
             if question:
@@ -100,7 +164,14 @@ def main():
                     processor.display_results(result_df)
                     
                     if visualizer and args.visualize and len(result_df) > 1:
-                        visualizer.visualize(result_df, question)
+                        visualizer.visualize(result_df, question, sql_query)
+    
+    if args.metrics:
+        print("\n⏱️ Stage timings:")
+        print(metrics.summary())
+    if metrics_out and metrics_out.suffix == '.prom':
+        metrics.write_prometheus(metrics_out)
+        print(f"📈 Metrics written to {metrics_out}")
     
     print("\n✅ Process completed successfully!")
     return 0
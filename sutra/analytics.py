@@ -0,0 +1,267 @@
+"""Columnar execution of aggregation queries over Parquet snapshots (DuckDB)
+
+    engine = AnalyticsEngine(db)
+    df = engine.execute_query("SELECT city, SUM(total) FROM orders GROUP BY city")
+
+Read-only aggregations (GROUP BY, SUM / AVG / COUNT / MIN / MAX) over tables
+of at least config.ANALYTICS_MIN_ROWS rows run in DuckDB against Parquet
+snapshots of those tables; everything else goes to the row store through
+DatabaseManager.execute_query. A snapshot belongs to one table version
+(DatabaseManager.get_table_versions): a query that finds its snapshot stale
+runs on the row store while a fresh one is exported in the background.
+Queries DuckDB cannot run (dialect differences) also fall back.
+"""
+
+import importlib.util
+import os
+import re
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple, TYPE_CHECKING
+import config
+from sutra.metrics import metrics
+from sutra.result_cache import STRING_LITERAL, is_cacheable, normalize_sql, referenced_tables, remove_orphans
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# duckdb is imported by the engine only (checked without importing it)
+DUCKDB_AVAILABLE = importlib.util.find_spec('duckdb') is not None
+
+AGGREGATE = re.compile(r"\b(sum|avg|count|min|max|total)\s*\(|\bgroup\s+by\b", re.IGNORECASE)
+
+SQLITE_STRFTIME = re.compile(r"\bstrftime\(\s*('(?:[^']|'')*')\s*,\s*([\w.\"]+)\s*\)", re.IGNORECASE)
+LIKE = re.compile(r"\bLIKE\b", re.IGNORECASE)
+DIVISION = re.compile(r"(?<![/*])/(?![/*])")  # Not part of a comment marker
+
+# Rows read from the row store per chunk while exporting a snapshot
+EXPORT_CHUNK_ROWS = 200_000
+
+
+def is_aggregation(sql: str) -> bool:
+    """Read-only query that groups or aggregates"""
+    return is_cacheable(sql) and AGGREGATE.search(STRING_LITERAL.sub("''", sql)) is not None
+
+
+def to_duckdb(sql: str, dialect: str = 'sqlite') -> str:
+    """Common SQLite / MySQL spellings in DuckDB's dialect, with the same results
+    
+    Outside string literals: backtick identifiers become double quotes, LIKE
+    becomes ILIKE (SQLite and MySQL match case-insensitively, DuckDB does not)
+    and, for SQLite, / becomes //, which divides integers into an integer as
+    SQLite does (MySQL's / is DuckDB's already). SQLite's strftime(format,
+    column) becomes strftime(column, format).
+    """
+    def rewrite(code: str) -> str:
+        code = LIKE.sub('ILIKE', code.replace('`', '"'))
+        return DIVISION.sub('//', code) if dialect == 'sqlite' else code
+
+    parts, position = [], 0
+    for match in STRING_LITERAL.finditer(sql):
+        parts.append(rewrite(sql[position:match.start()]))
+        parts.append(match.group())
+        position = match.end()
+    parts.append(rewrite(sql[position:]))
+    sql = ''.join(parts).strip().rstrip(';')
+    return SQLITE_STRFTIME.sub(r"strftime(CAST(\2 AS TIMESTAMP), \1)", sql)
+
+
+class AnalyticsEngine:
+    """DuckDB over per-version Parquet snapshots of a database's tables"""
+
+    def __init__(self, db_manager, snapshot_dir: Optional[Path] = None, min_rows: Optional[int] = None):
+        import duckdb
+
+        self.db = db_manager
+        self.min_rows = config.ANALYTICS_MIN_ROWS if min_rows is None else min_rows
+        database = getattr(db_manager, 'database', None) or 'default'
+        # Version markers are per connection, so snapshots are private to this process
+        root = Path(snapshot_dir or config.ANALYTICS_DIR) / database
+        remove_orphans(root)
+        self.snapshot_dir = root / str(os.getpid())
+        self.snapshot_dir.mkdir(parents=True, exist_ok=True)
+
+        self.conn = duckdb.connect()
+        self._lock = threading.RLock()  # One DuckDB statement at a time
+        self._snapshots: Dict[str, Tuple[str, Path]] = {}  # table -> (version, parquet file)
+        self._rows: Dict[str, Tuple[str, int]] = {}        # table -> (version, row count)
+        self._exporting: Set[str] = set()
+        self._exports = 0
+        self._unsupported: Set[str] = set()  # Normalized queries DuckDB failed on
+        self._tables: Tuple[int, List[str]] = (-1, [])
+        self.routed = 0
+        self.fallbacks = 0
+
+    # ----- Snapshots -----
+
+    def tables_in(self, sql: str) -> List[str]:
+        if self._tables[0] != self.db.schema_version:
+            self._tables = (self.db.schema_version, self.db.get_tables())
+        return referenced_tables(sql, self._tables[1])
+
+    def _row_count(self, table: str, version: str) -> int:
+        known = self._rows.get(table)
+        if known is None or known[0] != version:
+            known = (version, self.db.get_row_count(self.db.quote(table)))
+            self._rows[table] = known
+        return known[1]
+
+    def _export(self, table: str, version: str):
+        """Copy a table from the row store to Parquet and point its DuckDB view at it"""
+        import pandas as pd
+
+        with self._lock:
+            self._exports += 1
+            path = self.snapshot_dir / f"{re.sub(r'[^0-9A-Za-z_]', '_', table)}-{self._exports}.parquet"
+            exporter = self.conn.cursor()  # Own DuckDB connection: queries keep running meanwhile
+        start = time.perf_counter()
+        reader = self.db.open_reader()
+        try:
+            query = f"SELECT * FROM {self.db.quote(table)}"
+            if reader is None:
+                with self.db.lock:
+                    chunks = list(pd.read_sql_query(query, self.db.conn, chunksize=EXPORT_CHUNK_ROWS))
+            else:
+                chunks = pd.read_sql_query(query, reader, chunksize=EXPORT_CHUNK_ROWS)
+
+            rows = 0
+            for number, chunk in enumerate(chunks):
+                exporter.register('chunk', chunk)
+                if number == 0:
+                    exporter.execute("CREATE TEMP TABLE staging AS SELECT * FROM chunk")
+                else:
+                    exporter.execute("INSERT INTO staging SELECT * FROM chunk")
+                exporter.unregister('chunk')
+                rows += len(chunk)
+            if not rows:
+                return  # Empty tables stay on the row store
+            exporter.execute(f"COPY staging TO '{path}' (FORMAT PARQUET)")
+        finally:
+            exporter.close()
+            if reader is not None:
+                reader.close()
+
+        quoted = table.replace('"', '""')
+        with self._lock:
+            self.conn.execute(f"CREATE OR REPLACE VIEW \"{quoted}\" AS SELECT * FROM read_parquet('{path}')")
+            old = self._snapshots.get(table)
+            self._snapshots[table] = (version, path)
+        if old:
+            old[1].unlink(missing_ok=True)
+        metrics.record('analytics_snapshot', time.perf_counter() - start)
+        print(f"🧊 Snapshot of {table}: {rows:,} rows in {time.perf_counter() - start:.1f}s")
+
+    def _export_in_background(self, table: str, version: str):
+        with self._lock:
+            if table in self._exporting:
+                return
+            self._exporting.add(table)
+
+        def run():
+            try:
+                self._export(table, version)
+            except Exception as e:
+                print(f"⚠️ Could not snapshot {table}: {e}")
+            finally:
+                with self._lock:
+                    self._exporting.discard(table)
+
+        threading.Thread(target=run, name=f"snapshot-{table}", daemon=True).start()
+
+    def refresh(self, tables: Optional[List[str]] = None):
+        """Bring snapshots of tables (default: all) up to date, waiting for the exports"""
+        tables = self.db.get_tables() if tables is None else tables
+        versions = self.db.get_table_versions(tables)
+        for table in tables:
+            snapshot = self._snapshots.get(table)
+            if snapshot is None or snapshot[0] != versions[table]:
+                self._export(table, versions[table])
+
+    # ----- Queries -----
+
+    def accepts(self, sql: str) -> Optional[List[str]]:
+        """Tables of an aggregation worth running here (None: use the row store)"""
+        if not is_aggregation(sql):
+            return None
+        tables = self.tables_in(sql)
+        if not tables:
+            return None
+        versions = self.db.get_table_versions(tables)
+        if sum(self._row_count(t, versions[t]) for t in tables) < self.min_rows:
+            return None
+
+        ready = True
+        for table in tables:
+            snapshot = self._snapshots.get(table)
+            if snapshot is None or snapshot[0] != versions[table]:
+                self._export_in_background(table, versions[table])
+                ready = False
+        return tables if ready else None
+
+    def _run(self, sql: str, timeout: Optional[float], cancel: Optional[threading.Event]) -> Optional['pd.DataFrame']:
+        """Run on DuckDB, interrupted after timeout seconds or once cancel is set
+        
+        Returns None when interrupted; raises on errors.
+        """
+        done = threading.Event()
+        interrupted = []
+
+        def watch():
+            deadline = time.monotonic() + timeout if timeout else None
+            while not done.wait(0.05):
+                if (cancel is not None and cancel.is_set()) or (deadline and time.monotonic() > deadline):
+                    interrupted.append(True)
+                    self.conn.interrupt()
+                    return
+
+        if timeout or cancel is not None:
+            threading.Thread(target=watch, daemon=True).start()
+        try:
+            with self._lock:
+                return self.conn.execute(to_duckdb(sql, self.db.db_type)).fetchdf()
+        except Exception:
+            if not interrupted:
+                raise
+            if cancel is not None and cancel.is_set():
+                print("⏹️ Query cancelled")
+            else:
+                print(f"⏱️ Query stopped after {timeout:g}s")
+            return None
+        finally:
+            done.set()
+
+    def execute_query(self, sql: str, timeout: Optional[float] = None,
+                      cancel: Optional[threading.Event] = None, reader: bool = False) -> Optional['pd.DataFrame']:
+        """Same contract as DatabaseManager.execute_query, aggregations answered by DuckDB"""
+        if cancel is not None and cancel.is_set():
+            return None
+        try:
+            routed = None if normalize_sql(sql) in self._unsupported else self.accepts(sql)
+        except Exception as e:
+            print(f"⚠️ Analytics routing failed: {e}")
+            routed = None
+        if routed:
+            try:
+                with metrics.stage('analytics_execute'):
+                    df = self._run(sql, timeout, cancel)
+                self.routed += 1
+                metrics.outcome('analytics', 'columnar')
+                if df is not None:
+                    print(f"🧊 Aggregation answered from columnar snapshots ({', '.join(routed)})")
+                return df
+            except Exception as e:
+                # Dialect the engine does not speak: remember and use the row store
+                print(f"⚠️ Columnar engine could not run the query, using the database: {str(e).splitlines()[0]}")
+                if len(self._unsupported) < 1000:
+                    self._unsupported.add(normalize_sql(sql))
+                self.fallbacks += 1
+        metrics.outcome('analytics', 'row_store')
+        return self.db.execute_query(sql, timeout=timeout, cancel=cancel, reader=reader)
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+            self._snapshots.clear()
+        shutil.rmtree(self.snapshot_dir, ignore_errors=True)
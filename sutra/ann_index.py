@@ -0,0 +1,386 @@
+"""Nearest neighbour indexes over inventory embeddings (cosine similarity)"""
+
+from pathlib import Path
+from typing import Optional, Tuple
+import numpy as np
+import config
+from sutra.quantization import QuantizedMatrix
+
+# Optional HNSW backend
+try:
+    import hnswlib
+    HNSWLIB_AVAILABLE = True
+except ImportError:
+    HNSWLIB_AVAILABLE = False
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalize rows so inner product equals cosine similarity"""
+    if isinstance(vectors, QuantizedMatrix):
+        vectors = vectors.dequantize()
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        norm = np.linalg.norm(vectors)
+        return vectors / norm if norm > 0 else vectors
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def _stored(vectors, storage: Optional[str]) -> Tuple[QuantizedMatrix, bool]:
+    """Matrix an index searches, and whether it is shared with the caller
+
+    A QuantizedMatrix (the inventory's embeddings) is searched in place, so
+    its rows must already be unit vectors; arrays are normalized into a copy.
+    """
+    if isinstance(vectors, QuantizedMatrix):
+        return vectors, True
+    return QuantizedMatrix(normalize(vectors), storage), False
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first"""
+    if k >= len(scores):
+        return np.argsort(-scores)
+    idx = np.argpartition(-scores, k - 1)[:k]
+    return idx[np.argsort(-scores[idx])]
+
+
+class VectorIndex:
+    """Common interface: build once, search many, persist next to the inventory
+
+    Exact and IVF indexes built over a QuantizedMatrix share it rather than
+    copy it, and save only their own structure; load_index re-attaches it.
+    """
+
+    kind = 'base'
+    shared = False
+
+    @property
+    def storage(self) -> str:
+        """Precision of the stored vectors"""
+        return 'float32'
+
+    def build(self, vectors: np.ndarray):
+        raise NotImplementedError
+
+    def add(self, vectors: np.ndarray):
+        """Append vectors (ids continue from len(self)) without rebuilding
+
+        A shared matrix gets the rows appended too.
+        """
+        raise NotImplementedError
+
+    def search(self, query: np.ndarray, k: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (scores, ids) of the k most similar vectors, best first"""
+        raise NotImplementedError
+
+    def save(self, path: Path):
+        raise NotImplementedError
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the index itself (a shared matrix is not counted)"""
+        raise NotImplementedError
+
+    def __len__(self):
+        raise NotImplementedError
+
+    def _vector_arrays(self) -> dict:
+        return {} if self.shared else self.vectors.to_arrays('vectors_')
+
+    def _load_vectors(self, data, vectors: Optional[QuantizedMatrix]):
+        if vectors is not None:
+            self.vectors, self.shared = vectors, True
+        elif 'vectors_data' in data:
+            self.vectors = QuantizedMatrix.from_arrays(data, 'vectors_')
+        else:
+            raise ValueError(f"{self.kind} index was saved without its vectors; pass the matrix it was built on")
+
+
+class ExactIndex(VectorIndex):
+    """Brute-force search with one matrix-vector product"""
+
+    kind = 'exact'
+
+    def __init__(self, storage: Optional[str] = None):
+        self.vectors = QuantizedMatrix(dtype=storage)
+
+    @property
+    def storage(self):
+        return self.vectors.dtype
+
+    def build(self, vectors: np.ndarray):
+        self.vectors, self.shared = _stored(vectors, self.vectors.dtype)
+        return self
+
+    def add(self, vectors):
+        self.vectors.append(normalize(vectors))
+        return self
+
+    def search(self, query, k=1):
+        if not len(self):
+            return np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.int64)
+        scores = self.vectors.dot(normalize(query))
+        ids = _top_k(scores, k)
+        return scores[ids], ids
+
+    def save(self, path):
+        np.savez(path, kind=self.kind, **self._vector_arrays())
+
+    @classmethod
+    def from_arrays(cls, data, vectors: Optional[QuantizedMatrix] = None):
+        index = cls()
+        index._load_vectors(data, vectors)
+        return index
+
+    @property
+    def nbytes(self):
+        return 0 if self.shared else self.vectors.nbytes
+
+    def __len__(self):
+        return len(self.vectors)
+
+
+class IVFIndex(VectorIndex):
+    """Inverted file index: spherical k-means cells, search only the nprobe closest cells
+
+    nlist trades build time for search speed; nprobe trades latency for recall
+    (nprobe == nlist is exact search).
+    """
+
+    kind = 'ivf'
+
+    def __init__(self, nlist: int = 0, nprobe: int = 8, train_size: int = 100000,
+                 iterations: int = 10, seed: int = 0, storage: Optional[str] = None):
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.train_size = train_size
+        self.iterations = iterations
+        self.seed = seed
+        self.centroids = np.zeros((0, 0), dtype=np.float32)
+        self.vectors = QuantizedMatrix(dtype=storage)
+        self.ids = np.zeros(0, dtype=np.int64)      # vector ids grouped by cell
+        self.offsets = np.zeros(1, dtype=np.int64)  # cell c owns ids[offsets[c]:offsets[c+1]]
+
+    @property
+    def storage(self):
+        return self.vectors.dtype
+
+    @staticmethod
+    def _assign(vectors: np.ndarray, centroids: np.ndarray, chunk: int = 65536) -> np.ndarray:
+        """Closest centroid per vector, computed in chunks to bound memory"""
+        labels = np.empty(len(vectors), dtype=np.int64)
+        for start in range(0, len(vectors), chunk):
+            block = vectors[start:start + chunk]
+            labels[start:start + chunk] = np.argmax(block @ centroids.T, axis=1)
+        return labels
+
+    def build(self, vectors):
+        stored, shared = _stored(vectors, self.vectors.dtype)
+        vectors = normalize(vectors)
+        n = len(vectors)
+        nlist = self.nlist or max(1, int(np.sqrt(n)))
+        nlist = min(nlist, n) if n else 1
+        rng = np.random.default_rng(self.seed)
+
+        if n:
+            sample = vectors
+            if n > self.train_size:
+                sample = vectors[rng.choice(n, self.train_size, replace=False)]
+
+            centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+            for _ in range(self.iterations):
+                labels = self._assign(sample, centroids)
+                counts = np.bincount(labels, minlength=nlist)
+                sums = np.zeros_like(centroids)
+                order = np.argsort(labels, kind='stable')
+                filled = np.flatnonzero(counts)
+                starts = np.concatenate([[0], np.cumsum(counts)])[filled]
+                sums[filled] = np.add.reduceat(sample[order], starts, axis=0)
+                empty = counts == 0
+                if empty.any():
+                    # Re-seed empty cells with random points so every cell stays useful
+                    sums[empty] = sample[rng.choice(len(sample), int(empty.sum()))]
+                centroids = normalize(sums)
+
+            labels = self._assign(vectors, centroids)
+        else:
+            centroids = np.zeros((1, vectors.shape[1] if vectors.ndim == 2 else 0), dtype=np.float32)
+            labels = np.zeros(0, dtype=np.int64)
+
+        order = np.argsort(labels, kind='stable')
+        counts = np.bincount(labels, minlength=len(centroids))
+
+        self.nlist = len(centroids)
+        self.centroids = centroids.astype(np.float32)
+        self.vectors, self.shared = stored, shared
+        self.ids = order.astype(np.int64)
+        self.offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        return self
+
+    def add(self, vectors):
+        """Assign new vectors to the existing cells (centroids are not retrained)"""
+        vectors = normalize(vectors)
+        if not len(vectors):
+            return self
+        if not len(self):
+            return self.build(vectors)
+        counts = np.diff(self.offsets)
+        labels = np.concatenate([np.repeat(np.arange(self.nlist), counts), self._assign(vectors, self.centroids)])
+        ids = np.concatenate([self.ids, np.arange(len(self), len(self) + len(vectors))])
+        order = np.argsort(labels, kind='stable')
+        self.ids = ids[order].astype(np.int64)
+        self.offsets = np.concatenate([[0], np.cumsum(np.bincount(labels, minlength=self.nlist))]).astype(np.int64)
+        self.vectors.append(vectors)
+        return self
+
+    def search(self, query, k=1, nprobe: Optional[int] = None):
+        if not len(self):
+            return np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.int64)
+
+        query = normalize(query)
+        nprobe = min(nprobe or self.nprobe, self.nlist)
+        cells = _top_k(self.centroids @ query, nprobe)
+
+        candidates = np.concatenate([self.ids[self.offsets[c]:self.offsets[c + 1]] for c in cells])
+        if not len(candidates):
+            return np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.int64)
+
+        scores = self.vectors.dot(query, rows=candidates)
+        best = _top_k(scores, k)
+        return scores[best], candidates[best]
+
+    def save(self, path):
+        np.savez(path, kind=self.kind, centroids=self.centroids, ids=self.ids,
+                 offsets=self.offsets, nprobe=self.nprobe, **self._vector_arrays())
+
+    @classmethod
+    def from_arrays(cls, data, vectors: Optional[QuantizedMatrix] = None):
+        index = cls(nprobe=int(data['nprobe']))
+        index.centroids = data['centroids']
+        index._load_vectors(data, vectors)
+        index.ids = data['ids']
+        index.offsets = data['offsets']
+        index.nlist = len(index.centroids)
+        return index
+
+    @property
+    def nbytes(self):
+        size = self.centroids.nbytes + self.ids.nbytes + self.offsets.nbytes
+        return size + (0 if self.shared else self.vectors.nbytes)
+
+    def __len__(self):
+        return len(self.vectors)
+
+
+class HNSWIndex(VectorIndex):
+    """Graph index backed by hnswlib (optional dependency); ef tunes recall/latency
+
+    hnswlib keeps its own float32 copy of the vectors next to the graph.
+    """
+
+    kind = 'hnsw'
+
+    def __init__(self, ef: int = 64, m: int = 16, ef_construction: int = 200):
+        if not HNSWLIB_AVAILABLE:
+            raise ImportError("hnswlib not installed. Run: pip install hnswlib")
+        self.ef = ef
+        self.m = m
+        self.ef_construction = ef_construction
+        self.index = None
+        self.count = 0
+
+    def build(self, vectors):
+        vectors = normalize(vectors)
+        self.count = len(vectors)
+        self.index = hnswlib.Index(space='ip', dim=vectors.shape[1])
+        self.index.init_index(max_elements=max(1, self.count), M=self.m,
+                              ef_construction=self.ef_construction)
+        if self.count:
+            self.index.add_items(vectors, np.arange(self.count))
+        self.index.set_ef(self.ef)
+        return self
+
+    def add(self, vectors):
+        vectors = normalize(vectors)
+        if not len(vectors):
+            return self
+        self.index.resize_index(self.count + len(vectors))
+        self.index.add_items(vectors, np.arange(self.count, self.count + len(vectors)))
+        self.count += len(vectors)
+        return self
+
+    def search(self, query, k=1):
+        if not self.count:
+            return np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.int64)
+        k = min(k, self.count)
+        self.index.set_ef(max(self.ef, k))
+        labels, distances = self.index.knn_query(normalize(query), k=k)
+        # hnswlib 'ip' distance is 1 - inner product
+        return (1.0 - distances[0]).astype(np.float32), labels[0].astype(np.int64)
+
+    def save(self, path):
+        path = Path(path)
+        self.index.save_index(str(path.with_suffix('.hnsw')))
+        np.savez(path, kind=self.kind, ef=self.ef, count=self.count,
+                 dim=self.index.dim, m=self.m)
+
+    @classmethod
+    def from_arrays(cls, data, path):
+        index = cls(ef=int(data['ef']), m=int(data['m']))
+        index.count = int(data['count'])
+        index.index = hnswlib.Index(space='ip', dim=int(data['dim']))
+        index.index.load_index(str(Path(path).with_suffix('.hnsw')), max_elements=max(1, index.count))
+        index.index.set_ef(index.ef)
+        return index
+
+    @property
+    def nbytes(self):
+        if self.index is None:
+            return 0
+        # float32 vector, label and level-0 links per element (upper levels are ~1/M of that)
+        per_element = self.index.dim * 4 + 8 + 4 + self.m * 2 * 4
+        return int(self.index.element_count * per_element * (1 + 1 / max(1, self.m)))
+
+    def __len__(self):
+        return self.count
+
+
+def index_kind(size: int, kind: Optional[str] = None) -> str:
+    """Backend used for an inventory of this size; small ones always use exact search"""
+    kind = (kind or config.ANN_BACKEND).lower()
+    if size < config.ANN_MIN_SIZE:
+        return 'exact'
+    if kind == 'hnsw' and not HNSWLIB_AVAILABLE:
+        print("⚠️ hnswlib not installed, using IVF index instead")
+        return 'ivf'
+    return kind if kind in ('ivf', 'hnsw') else 'exact'
+
+
+def create_index(kind: Optional[str] = None, size: int = 0) -> VectorIndex:
+    """Index for the configured backend"""
+    kind = index_kind(size, kind)
+    if kind == 'ivf':
+        return IVFIndex(nlist=config.ANN_NLIST, nprobe=config.ANN_NPROBE)
+    if kind == 'hnsw':
+        return HNSWIndex(ef=config.ANN_HNSW_EF)
+    return ExactIndex()
+
+
+def load_index(path: Path, vectors: Optional[QuantizedMatrix] = None) -> VectorIndex:
+    """Load an index saved with VectorIndex.save
+
+    vectors is the matrix an exact or IVF index was built on, shared again.
+    """
+    with np.load(path, allow_pickle=False) as data:
+        kind = str(data['kind'])
+        if kind == 'ivf':
+            index = IVFIndex.from_arrays(data, vectors)
+            index.nprobe = config.ANN_NPROBE
+            return index
+        if kind == 'hnsw':
+            index = HNSWIndex.from_arrays(data, path)
+            index.ef = config.ANN_HNSW_EF
+            return index
+        return ExactIndex.from_arrays(data, vectors)
@@ -1,20 +1,25 @@
 """Query caching and similarity matching"""
 
 import json
+import threading
 from pathlib import Path
 from typing import Optional, Dict, Tuple
 from datetime import datetime
 from difflib import SequenceMatcher
 import config
+from sutra import query_templates
 
 class CacheManager:
     """Manage query cache with semantic similarity"""
     
-    def __init__(self):
+    def __init__(self, database: Optional[str] = None):
         self.cache: Dict[str, Dict] = {}
+        self.lock = threading.RLock()  # Shared between request threads in service mode
         self.similarity_threshold = config.SIMILARITY_THRESHOLD
         self.save_to_disk_enabled = config.SAVE_QUERIES
-        self.cache_file = config.QUERY_LOG_FILE
+        # One history file per database when a name is given
+        self.cache_file = (config.QUERY_LOG_FILE if database is None else
+                           config.QUERY_LOG_FILE.with_name(f"{config.QUERY_LOG_FILE.stem}_{database}.json"))
         
         if self.save_to_disk_enabled:
             self.load_from_disk()
@@ -36,6 +41,7 @@ class CacheManager:
             return
         
         try:
+            config.ensure_dirs()
             with open(self.cache_file, 'w') as f:
                 json.dump(self.cache, f, indent=2)
         except Exception as e:
@@ -45,12 +51,16 @@ class CacheManager:
         """Compute similarity between two queries"""
         return SequenceMatcher(None, query1.lower(), query2.lower()).ratio()
     
-    def find_similar_query(self, question: str) -> Tuple[Optional[str], float]:
-        """Find most similar cached query"""
+    def find_similar_query(self, question: str, templates: bool = False) -> Tuple[Optional[str], float]:
+        """Find most similar cached query (literal entries, or templates when templates=True)"""
         best_match = None
         best_similarity = 0
         
-        for cached_q in self.cache:
+        with self.lock:
+            entries = list(self.cache.items())
+        for cached_q, entry in entries:
+            if ('slots' in entry) != templates:
+                continue
             similarity = self.compute_similarity(question, cached_q)
             if similarity > best_similarity:
                 best_similarity = similarity
@@ -58,29 +68,83 @@ class CacheManager:
         
         return best_match, best_similarity
     
-    def get_cached_query(self, question: str) -> Optional[str]:
-        """Get cached SQL for a question if similar enough"""
-        similar_q, similarity = self.find_similar_query(question)
+    def get_cached_query(self, question: str, hits=None) -> Optional[str]:
+        """Get cached SQL for a question if similar enough
         
-        if similarity >= self.similarity_threshold and similar_q:
+        hits are the stored values typed in the question; with them a template
+        cached for a question of the same shape is re-bound to the new values.
+        """
+        sql, similarity, is_template = self.lookup(question, hits)
+        if sql and is_template:
+            print(f"🧩 Found query template (similarity: {similarity:.1%})")
+        elif sql:
             print(f"📊 Found similar query (similarity: {similarity:.1%})")
-            return self.cache[similar_q]['sql']
+        return sql
+    
+    def lookup(self, question: str, hits=None, threshold: Optional[float] = None) -> Tuple[Optional[str], float, bool]:
+        """(sql, similarity, from_template) of the best cached entry at or above threshold
         
-        return None
+        threshold defaults to similarity_threshold; sql is None when nothing qualifies.
+        """
+        return self._match(question, hits, threshold)[1:]
     
-    def add_to_cache(self, question: str, sql: str):
-        """Add query to cache"""
-        self.cache[question] = {
-            'sql': sql,
-            'timestamp': datetime.now().isoformat()
-        }
+    def _match(self, question: str, hits=None, threshold: Optional[float] = None):
+        """(cache key, sql, similarity, from_template) behind lookup"""
+        threshold = self.similarity_threshold if threshold is None else threshold
+        template = query_templates.extract(question, hits)
         
-        if self.save_to_disk_enabled:
-            self.save_to_disk()
+        if template:
+            similar_t, similarity = self.find_similar_query(template.question, templates=True)
+            if similarity >= threshold and similar_t:
+                entry = self.cache.get(similar_t)
+                if entry and query_templates.compatible(entry['slots'], template):
+                    return similar_t, query_templates.bind(entry['sql'], template.values), similarity, True
+        
+        similar_q, similarity = self.find_similar_query(question)
+        
+        if similarity >= threshold and similar_q:
+            # A near-identical question about other values needs other SQL
+            if template and not query_templates.mentions(similar_q, template.values):
+                return None, None, similarity, False
+            entry = self.cache.get(similar_q)
+            return similar_q, (entry['sql'] if entry else None), similarity, False
+        
+        return None, None, similarity, False
+    
+    def discard(self, question: str, hits=None, threshold: Optional[float] = None):
+        """Drop the entry lookup would serve for a question (e.g. its SQL no longer validates)"""
+        key = self._match(question, hits, threshold)[0]
+        if key is None:
+            return
+        with self.lock:
+            self.cache.pop(key, None)
+            if self.save_to_disk_enabled:
+                self.save_to_disk()
+    
+    def add_to_cache(self, question: str, sql: str, hits=None):
+        """Add query to cache, plus a parameterized template when the question names stored values"""
+        template = query_templates.extract(question, hits)
+        template_sql = query_templates.parameterize(sql, template) if template else None
+        
+        with self.lock:
+            self.cache[question] = {
+                'sql': sql,
+                'timestamp': datetime.now().isoformat()
+            }
+            if template_sql:
+                self.cache[template.question] = {
+                    'sql': template_sql,
+                    'slots': [list(columns) for columns in template.columns],
+                    'timestamp': datetime.now().isoformat()
+                }
+            
+            if self.save_to_disk_enabled:
+                self.save_to_disk()
     
     def clear_cache(self):
         """Clear all cached queries"""
-        self.cache = {}
-        if self.save_to_disk_enabled and self.cache_file.exists():
-            self.cache_file.unlink()
+        with self.lock:
+            self.cache = {}
+            if self.save_to_disk_enabled and self.cache_file.exists():
+                self.cache_file.unlink()
         print("🗑️ Cache cleared")
\ No newline at end of file
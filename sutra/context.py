@@ -0,0 +1,214 @@
+"""Per-database contexts and a bounded LRU pool of warm ones
+
+    pool = ContextPool(max_contexts=8)
+    with pool.use('sales_db') as ctx:
+        df, sql = ctx.processor.process_question("total orders per city")
+
+A DatabaseContext bundles everything one database needs: its connection, the
+data inventory and vector index, the feedback index and the query / result
+caches. All of it is named after the context's database explicitly, so
+contexts for different databases live side by side in one process. The pool
+keeps the most recently used contexts and closes cold ones, releasing their
+inventories; a closed database is reloaded from its pickled inventory on the
+next request.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+import config
+
+
+def database_path(name: str) -> Path:
+    """SQLite file for a database name (config.DB_PATH when the name is its stem)"""
+    if name == config.DB_PATH.stem:
+        return config.DB_PATH
+    return config.OUTPUT_DIR / f"{name}.db"
+
+
+def available_databases() -> List[str]:
+    if config.DB_TYPE == 'mysql':
+        from sutra.direct_query import list_databases
+        return list_databases()
+    return sorted(path.stem for path in config.OUTPUT_DIR.glob('*.db'))
+
+
+class DatabaseContext:
+    """Connection, inventory, feedback index and caches of one database"""
+
+    def __init__(self, name: str, db_type: Optional[str] = None, db_path: Optional[str] = None):
+        from sutra.database_manager import DatabaseManager
+        from sutra.nlp_processor import NLPProcessor
+
+        self.name = name
+        self.db_type = db_type or config.DB_TYPE
+        if self.db_type != 'mysql':
+            db_path = db_path or str(database_path(name))
+            if db_path != ':memory:' and not Path(db_path).exists():
+                raise KeyError(name)
+
+        start = time.perf_counter()
+        self.db = DatabaseManager(db_path or ':memory:', db_type=self.db_type, database=name)
+        self.processor = NLPProcessor(self.db, database=name)
+        self.load_seconds = time.perf_counter() - start
+        self._memory_bytes = 0
+        self._memory_final = False  # Measured after the inventory was complete
+
+        self.loaded_at = time.time()
+        self.last_used = self.loaded_at
+        self.requests = 0
+        self.users = 0        # Requests currently using the context
+        self.retired = False  # Evicted; closed once the last user is done
+
+    @property
+    def embeddings(self):
+        return self.processor.relevancy_checker
+
+    @property
+    def feedback_matcher(self):
+        return self.processor.feedback_matcher
+
+    @property
+    def memory_bytes(self) -> int:
+        """Inventory memory; grows while a background build is running"""
+        if self.processor is not None and not self._memory_final:
+            self._memory_final = self.embeddings.complete
+            self._memory_bytes = self.embeddings.memory_bytes()
+        return self._memory_bytes
+
+    def close(self):
+        """Close the connection and drop the inventory and caches"""
+        if self.processor is None:
+            return
+        self.embeddings.stop()
+        if self.processor.analytics:
+            self.processor.analytics.close()
+        with self.db.lock:
+            self.db.close()
+        self.processor = None
+
+    def info(self) -> Dict:
+        return {'database': self.name, 'requests': self.requests, 'users': self.users,
+                'loaded_at': self.loaded_at, 'last_used': self.last_used,
+                'load_s': round(self.load_seconds, 3), 'memory_mb': round(self.memory_bytes / 1e6, 2),
+                'inventory': self.embeddings.status() if self.processor is not None else 'closed'}
+
+
+class ContextPool:
+    """Bounded LRU of warm DatabaseContexts shared by threads
+
+    At most max_contexts contexts (and, when max_mb is set, about that much
+    inventory memory) stay loaded; the least recently used are evicted. Loads
+    of different databases run in parallel, concurrent requests for the same
+    cold database share one load, and a context in use is only closed after
+    its last request finishes.
+    """
+
+    def __init__(self, max_contexts: Optional[int] = None, max_mb: Optional[float] = None,
+                 db_type: Optional[str] = None):
+        self.max_contexts = max(1, max_contexts or config.CONTEXT_POOL_SIZE)
+        self.max_bytes = int((config.CONTEXT_POOL_MAX_MB if max_mb is None else max_mb) * 1e6)
+        self.db_type = db_type
+        self._contexts: 'OrderedDict[str, DatabaseContext]' = OrderedDict()
+        self._loading: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()  # Guards the dicts; never held while loading
+        self.loads = 0
+        self.evictions = 0
+
+    def _checkout(self, name: str) -> Optional[DatabaseContext]:
+        with self._lock:
+            ctx = self._contexts.get(name)
+            if ctx is not None:
+                self._contexts.move_to_end(name)
+                ctx.users += 1
+                ctx.requests += 1
+                ctx.last_used = time.time()
+            return ctx
+
+    def acquire(self, name: str) -> DatabaseContext:
+        """Context for a database, loading it if needed (pair with release)"""
+        ctx = self._checkout(name)
+        if ctx is not None:
+            return ctx
+
+        with self._lock:
+            loading = self._loading.setdefault(name, threading.Lock())
+        with loading:
+            ctx = self._checkout(name)
+            if ctx is not None:
+                return ctx
+            print(f"🔥 Loading context for {name}")
+            ctx = DatabaseContext(name, self.db_type)
+            print(f"🔥 {name} ready in {ctx.load_seconds:.1f}s ({ctx.memory_bytes / 1e6:.1f} MB)")
+            with self._lock:
+                self._contexts[name] = ctx
+                self.loads += 1
+                ctx.users += 1
+                ctx.requests += 1
+                evicted = self._over_budget()
+        for old in evicted:
+            self._retire(old)
+        return ctx
+
+    def release(self, ctx: DatabaseContext):
+        with self._lock:
+            ctx.users -= 1
+            close = ctx.retired and ctx.users == 0
+        if close:
+            ctx.close()
+
+    @contextmanager
+    def use(self, name: str) -> Iterator[DatabaseContext]:
+        ctx = self.acquire(name)
+        try:
+            yield ctx
+        finally:
+            self.release(ctx)
+
+    def _over_budget(self) -> List[DatabaseContext]:
+        """Pop least recently used contexts beyond the limits (caller holds the lock)"""
+        evicted = []
+        while len(self._contexts) > 1:
+            total = sum(ctx.memory_bytes for ctx in self._contexts.values())
+            if len(self._contexts) <= self.max_contexts and (not self.max_bytes or total <= self.max_bytes):
+                break
+            _, ctx = self._contexts.popitem(last=False)
+            evicted.append(ctx)
+        return evicted
+
+    def _retire(self, ctx: DatabaseContext):
+        with self._lock:
+            ctx.retired = True
+            self.evictions += 1
+            close = ctx.users == 0
+        print(f"❄️ Unloading {ctx.name}")
+        if close:
+            ctx.close()
+
+    def evict(self, name: str) -> bool:
+        with self._lock:
+            ctx = self._contexts.pop(name, None)
+        if ctx is None:
+            return False
+        self._retire(ctx)
+        return True
+
+    def contexts(self) -> List[Dict]:
+        """Loaded contexts, most recently used last"""
+        with self._lock:
+            return [ctx.info() for ctx in self._contexts.values()]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {'loaded': len(self._contexts), 'max_contexts': self.max_contexts,
+                    'memory_mb': round(sum(c.memory_bytes for c in self._contexts.values()) / 1e6, 2),
+                    'loads': self.loads, 'evictions': self.evictions}
+
+    def close(self):
+        with self._lock:
+            names = list(self._contexts)
+        for name in names:
+            self.evict(name)
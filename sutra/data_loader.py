@@ -1,15 +1,21 @@
 """Data loading utilities for various file formats"""
 
-import PyPDF2
-import docx
-import pandas as pd
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 class UnstructuredDataLoader:
-    """Load unstructured data from various sources"""
+    """Load unstructured data from various sources
+
+    Format libraries (PyPDF2, pandas) are imported by the loader
+    that needs them, so importing this module stays cheap.
+    """
     
     def __init__(self):
+        # Tables read as rows by the last load: name -> DataFrame
+        self.tables: Dict[str, 'pd.DataFrame'] = {}
         self.supported_formats = {
             '.pdf': self.load_pdf,
             '.docx': self.load_word,
@@ -22,6 +28,8 @@ class UnstructuredDataLoader:
     
     def load_pdf(self, file_path: Path) -> str:
         """Load PDF file"""
+        import PyPDF2
+        
         try:
             print(f"📕 Loading PDF: {file_path.name}")
             with open(file_path, 'rb') as file:
@@ -39,23 +47,32 @@ class UnstructuredDataLoader:
             return ""
     
     def load_word(self, file_path: Path) -> str:
-        """Load Word document"""
+        """Load Word document
+        
+        Paragraphs come back as text in document order. Tables are kept as rows
+        in self.tables (see load_tables) and only named in the text, so the
+        LLM does not have to retype them as INSERTs.
+        """
+        from sutra.docx_reader import DocxTable, read_docx, table_frame, table_name
+        
         try:
             print(f"📘 Loading Word doc: {file_path.name}")
-            doc = docx.Document(file_path)
-            text = ""
-            
-            for paragraph in doc.paragraphs:
-                text += paragraph.text + "\n"
-            
-            for table in doc.tables:
-                for row in table.rows:
-                    for cell in row.cells:
-                        text += cell.text + " "
-                    text += "\n"
+            lines = []
+            for record in read_docx(file_path):
+                if isinstance(record, DocxTable):
+                    frame = table_frame(record)
+                    name = table_name(record, file_path.stem)
+                    while name in self.tables:
+                        name += '_2'
+                    self.tables[name] = frame
+                    lines.append(f"[Table {name} ({len(frame)} rows, loaded directly): {', '.join(frame.columns)}]")
+                    print(f"   → Table {name}: {len(frame)} rows x {len(frame.columns)} columns")
+                else:
+                    lines.append(record.text)
+            text = "\n".join(lines)
             
             word_count = len(text.split())
-            print(f"✅ Extracted {word_count} words from Word doc")
+            print(f"✅ Extracted {word_count} words and {len(self.tables)} tables from Word doc")
             return text.strip()
         except Exception as e:
             print(f"❌ Error reading Word document: {e}")
@@ -63,6 +80,8 @@ class UnstructuredDataLoader:
     
     def load_excel(self, file_path: Path) -> str:
         """Load Excel file"""
+        import pandas as pd
+        
         try:
             print(f"📊 Loading Excel: {file_path.name}")
             excel_file = pd.ExcelFile(file_path)
@@ -90,6 +109,8 @@ class UnstructuredDataLoader:
     
     def load_csv(self, file_path: Path) -> str:
         """Load CSV file"""
+        import pandas as pd
+        
         try:
             print(f"📊 Loading CSV: {file_path.name}")
             df = pd.read_csv(file_path)
@@ -123,12 +144,27 @@ class UnstructuredDataLoader:
             return None
         
         extension = path.suffix.lower()
+        self.tables = {}
         if extension in self.supported_formats:
             return self.supported_formats[extension](path)
         else:
             print(f"❌ Unsupported file format: {extension}")
             return None
     
+    def load_tables(self, db) -> List[str]:
+        """Bulk load the tables read by the last load into a database; returns their names"""
+        loaded = []
+        for name, frame in self.tables.items():
+            if frame.empty:
+                continue
+            try:
+                rows = db.bulk_load(name, frame, replace=True)
+                print(f"📥 Loaded {rows} rows into {name}")
+                loaded.append(name)
+            except Exception as e:
+                print(f"❌ Could not load table {name}: {e}")
+        return loaded
+    
     def load_sample(self) -> str:
         """Load sample data for testing"""
         print("📝 Loading sample data...")
@@ -1,31 +1,18 @@
 """Database management for both SQLite and MySQL"""
 
+import functools
+import itertools
+import re
 import sqlite3
-import pandas as pd
+import threading
+import time
 from pathlib import Path
-from typing import Optional, Tuple, List
+from typing import Dict, Optional, Tuple, List, TYPE_CHECKING
 from tabulate import tabulate
 import config
 
-# Add MySQL support
-try:
-    import mysql.connector
-    MYSQL_AVAILABLE = True
-except ImportError:
-    MYSQL_AVAILABLE = False
-    print("⚠️ MySQL not installed. Run: pip install mysql-connector-python")
-
-class DatabaseManager:
-    """Manage database operations (SQLite or MySQL)"""
-    
-    """Database management for both SQLite and MySQL"""
-
-import sqlite3
-import pandas as pd
-from pathlib import Path
-from typing import Optional, Tuple, List
-from tabulate import tabulate
-import config
+if TYPE_CHECKING:
+    import pandas as pd
 
 # Add MySQL support
 try:
@@ -35,11 +22,29 @@ except ImportError:
     MYSQL_AVAILABLE = False
     print("⚠️ MySQL not installed. Run: pip install mysql-connector-python")
 
+def _locked(method):
+    """Serialize use of the shared connection between threads"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
 class DatabaseManager:
-    """Manage database operations (SQLite or MySQL)"""
+    """Manage database operations (SQLite or MySQL)
+    
+    One connection per manager; methods that use it hold self.lock, so a
+    manager can be shared by the threads of a long-running service.
+    """
     
-    def __init__(self, db_path: str = ':memory:', db_type: str = 'sqlite'):  # FIX: Added indentation
+    def __init__(self, db_path: str = ':memory:', db_type: str = 'sqlite', database: Optional[str] = None):  # FIX: Added indentation
         self.db_type = db_type.lower()
+        # Name used for the MySQL schema and for per-database files (inventory, logs, feedback)
+        self.database = database or config.MYSQL_DATABASE
+        self.db_path = db_path
+        self.lock = threading.RLock()
+        self.schema_version = 0  # Bumped on every schema/data change made through this manager
+        self._volatile = itertools.count()  # Markers of tables written within the current second
         
         if self.db_type == 'mysql':
             if not MYSQL_AVAILABLE:
@@ -54,9 +59,9 @@ class DatabaseManager:
                         password=config.MYSQL_PASSWORD
                     )
                     cursor_temp = conn_temp.cursor()
-                    cursor_temp.execute(f"CREATE DATABASE IF NOT EXISTS {config.MYSQL_DATABASE}")
+                    cursor_temp.execute(f"CREATE DATABASE IF NOT EXISTS {self.database}")
                     conn_temp.close()
-                    print(f"✅ Database {config.MYSQL_DATABASE} ready")
+                    print(f"✅ Database {self.database} ready")
                 except Exception as e:
                     print(f"❌ Could not create database: {e}")
                 
@@ -65,18 +70,25 @@ class DatabaseManager:
                     host=config.MYSQL_HOST,
                     user=config.MYSQL_USER,
                     password=config.MYSQL_PASSWORD,
-                    database=config.MYSQL_DATABASE
+                    database=self.database
                 )
                 self.cursor = self.conn.cursor()
-                print(f"📂 Connected to MySQL: {config.MYSQL_DATABASE}")
+                # MySQL 8 caches information_schema.TABLES statistics (the table version
+                # markers) for a day by default; read them live
+                try:
+                    self.cursor.execute("SET SESSION information_schema_stats_expiry = 0")
+                except mysql.connector.Error:
+                    pass  # MySQL 5.7 / MariaDB: statistics are not cached
+                print(f"📂 Connected to MySQL: {self.database}")
         
         if self.db_type == 'sqlite':  # FIX: Added this block for SQLite
-            self.conn = sqlite3.connect(db_path)
+            self.conn = sqlite3.connect(db_path, check_same_thread=False)  # Access guarded by self.lock
             self.cursor = self.conn.cursor()
             print(f"📂 SQLite {'created in memory' if db_path == ':memory:' else f'connected: {db_path}'}")
     
     # Rest of the methods stay the same...
     
+    @_locked
     def execute_schema(self, schema_sql: str) -> bool:
         """Execute SQL schema with MySQL compatibility"""
         try:
@@ -102,16 +114,106 @@ class DatabaseManager:
         except Exception as e:
             print(f"❌ Error executing schema: {e}")
             return False
+        finally:
+            # Even a failed script may have applied some statements
+            self.bump_version()
+    
+    def bump_version(self):
+        """Mark cached results as stale (call after writes made outside this manager)"""
+        self.schema_version += 1
+    
+    @_locked
+    def get_table_versions(self, tables: Optional[List[str]] = None) -> Dict[str, str]:
+        """Cheap per-table change markers; a marker differs once the table may have changed
+        
+        SQLite: the connection's total_changes, PRAGMA data_version (writes by other
+        connections) and MAX(rowid). MySQL: UPDATE_TIME and TABLE_ROWS from
+        information_schema, read live; UPDATE_TIME has one-second resolution, so a
+        table written within the current second gets a new marker on every call.
+        Both include the manual schema_version bump.
+        """
+        tables = self.get_tables() if tables is None else tables
+        versions = {}
+        if self.db_type == 'mysql':
+            cursor = self.conn.cursor()
+            cursor.execute(
+                "SELECT TABLE_NAME, UPDATE_TIME, TABLE_ROWS, UPDATE_TIME >= NOW() - INTERVAL 1 SECOND "
+                "FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE()"
+            )
+            stats = {}
+            for name, updated, rows, recent in cursor.fetchall():
+                # May change again this second without UPDATE_TIME moving
+                stats[name] = f"{updated}:{rows}" + (f":{next(self._volatile)}" if recent else '')
+            cursor.close()
+            for table in tables:
+                versions[table] = f"{self.schema_version}:{stats.get(table, '')}"
+        else:
+            cursor = self.conn.cursor()
+            cursor.execute("PRAGMA data_version")
+            database = f"{self.schema_version}:{self.conn.total_changes}:{cursor.fetchone()[0]}"
+            for table in tables:
+                try:
+                    cursor.execute(f'SELECT MAX(rowid) FROM "{table}"')
+                    last = cursor.fetchone()[0]
+                except sqlite3.Error:
+                    last = None  # WITHOUT ROWID tables and views
+                versions[table] = f"{database}:{last}"
+            cursor.close()
+        return versions
     
-    def execute_query(self, query: str) -> Optional[pd.DataFrame]:
-        """Execute query on either database"""
+    def execute_query(self, query: str, timeout: Optional[float] = None,
+                      cancel: Optional[threading.Event] = None, reader: bool = False) -> Optional['pd.DataFrame']:
+        """Execute query on either database, stopping it after timeout seconds
+        
+        On SQLite, setting cancel stops the query too (used to drop speculative work).
+        reader runs it on a connection of its own (open_reader) instead of holding
+        self.lock, so a speculative or long read does not hold up other threads.
+        """
+        if cancel is not None and cancel.is_set():
+            return None
+        if reader:
+            conn = self.open_reader()
+            if conn is not None:
+                try:
+                    return self._read_query(conn, query, timeout, cancel)
+                finally:
+                    conn.close()
+        with self.lock:
+            return self._read_query(self.conn, query, timeout, cancel)
+    
+    def _read_query(self, conn, query: str, timeout: Optional[float],
+                    cancel: Optional[threading.Event]) -> Optional['pd.DataFrame']:
+        import pandas as pd
+        
+        if self.db_type == 'mysql':
+            conn.commit()  # Autocommit is off: end the previous read snapshot to see other clients' writes
+        watch = timeout or (cancel is not None and self.db_type == 'sqlite')
+        if timeout and self.db_type == 'mysql':
+            # Per-statement limit, honoured by MySQL 5.7.8+ for top-level SELECTs
+            query = re.sub(r"^\s*SELECT\b", f"SELECT /*+ MAX_EXECUTION_TIME({int(timeout * 1000)}) */",
+                           query, count=1, flags=re.IGNORECASE)
+        elif watch:
+            # SQLite has no statement timeout; abort from the VM progress callback
+            deadline = time.monotonic() + timeout if timeout else float('inf')
+            conn.set_progress_handler(
+                lambda: time.monotonic() > deadline or (cancel is not None and cancel.is_set()), 10000)
+        
         try:
-            df = pd.read_sql_query(query, self.conn)
+            df = pd.read_sql_query(query, conn)
             return df
         except Exception as e:
-            print(f"❌ Query error: {e}")
+            if cancel is not None and cancel.is_set():
+                print("⏹️ Query cancelled")
+            elif timeout and ('interrupted' in str(e) or 'maximum statement execution time' in str(e)):
+                print(f"⏱️ Query stopped after {timeout:g}s")
+            else:
+                print(f"❌ Query error: {e}")
             return None
+        finally:
+            if watch and self.db_type == 'sqlite':
+                conn.set_progress_handler(None, 0)
     
+    @_locked
     def get_tables(self):
         """Get list of all tables in database"""
         if self.db_type == 'mysql':
@@ -122,11 +224,12 @@ class DatabaseManager:
             return tables
         else:  # sqlite
             cursor = self.conn.cursor()
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
+            cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%'")
             tables = [table[0] for table in cursor.fetchall()]
             cursor.close()
             return tables
 
+    @_locked
     def get_columns(self, table_name):
         """Get list of columns for a specific table"""
         if self.db_type == 'mysql':
@@ -142,20 +245,27 @@ class DatabaseManager:
             cursor.close()
             return columns
     
-    def get_schema_context(self) -> str:
-        """Get database schema"""
+    @_locked
+    def get_table_ddl(self) -> Dict[str, str]:
+        """CREATE TABLE statement for every table"""
         if self.db_type == 'mysql':
-            tables = self.get_tables()
-            schema = []
-            for table in tables:
-                self.cursor.execute(f"SHOW CREATE TABLE {table}")
-                schema.append(self.cursor.fetchone()[1])
-            return '\n'.join(schema)
+            ddl = {}
+            for table in self.get_tables():
+                self.cursor.execute(f"SHOW CREATE TABLE `{table}`")
+                ddl[table] = self.cursor.fetchone()[1]
+            return ddl
         else:
             self.cursor.execute(
-                "SELECT sql FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%';"
+                "SELECT name, sql FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%';"
             )
-            return '\n'.join([row[0] for row in self.cursor.fetchall()])
+            return {name: sql for name, sql in self.cursor.fetchall()}
+    
+    def get_schema_context(self, tables: Optional[List[str]] = None) -> str:
+        """Get database schema, optionally only for the given tables"""
+        ddl = self.get_table_ddl()
+        if tables is not None:
+            ddl = {table: ddl[table] for table in tables if table in ddl}
+        return '\n'.join(ddl.values())
     
     def display_tables(self):  # FIX: Proper indentation - part of class
         """Display all tables with their structure and data"""
@@ -174,6 +284,7 @@ class DatabaseManager:
             count = self.get_row_count(table)
             print(f"    Records: {count}")
     
+    @_locked
     def get_table_info(self, table_name: str) -> List[Tuple]:  # FIX: Proper indentation
         """Get column information for a table"""
         if self.db_type == 'mysql':
@@ -183,11 +294,117 @@ class DatabaseManager:
             self.cursor.execute(f"PRAGMA table_info({table_name})")
             return self.cursor.fetchall()
     
+    @_locked
     def get_row_count(self, table_name: str) -> int:  # FIX: Proper indentation
         """Get number of rows in a table"""
         self.cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
         return self.cursor.fetchone()[0]
-    
+
+    def open_reader(self):
+        """A second connection for long reads that should not hold self.lock
+
+        None for in-memory SQLite, whose data only this manager's connection sees.
+        The caller closes it.
+        """
+        if self.db_type == 'mysql':
+            return mysql.connector.connect(host=config.MYSQL_HOST, user=config.MYSQL_USER,
+                                           password=config.MYSQL_PASSWORD, database=self.database)
+        if not self.db_path or str(self.db_path) == ':memory:':
+            return None
+        return sqlite3.connect(str(self.db_path), check_same_thread=False)
+
+    @_locked
+    def bulk_load(self, table: str, frame: 'pd.DataFrame', replace: bool = False, batch_rows: int = 5000) -> int:
+        """Create a table for a DataFrame (if missing) and insert its rows in batches
+
+        Column types follow the frame's dtypes; an id primary key is added.
+        replace drops an existing table first. Returns the number of rows inserted.
+        """
+        import pandas as pd
+
+        mysql = self.db_type == 'mysql'
+        types = []
+        for column, dtype in frame.dtypes.items():
+            if pd.api.types.is_integer_dtype(dtype):
+                types.append('BIGINT' if mysql else 'INTEGER')
+            elif pd.api.types.is_float_dtype(dtype):
+                types.append('DOUBLE' if mysql else 'REAL')
+            else:
+                types.append('TEXT')
+        key = 'id INT PRIMARY KEY AUTO_INCREMENT' if mysql else 'id INTEGER PRIMARY KEY AUTOINCREMENT'
+        columns = ', '.join(f"{self.quote(c)} {t}" for c, t in zip(frame.columns, types))
+        if replace:
+            self.cursor.execute(f"DROP TABLE IF EXISTS {self.quote(table)}")
+        self.cursor.execute(f"CREATE TABLE IF NOT EXISTS {self.quote(table)} ({key}, {columns})")
+
+        marker = '%s' if mysql else '?'
+        insert = (f"INSERT INTO {self.quote(table)} ({', '.join(self.quote(c) for c in frame.columns)}) "
+                  f"VALUES ({', '.join([marker] * len(frame.columns))})")
+        # NaN/None -> NULL, numpy scalars -> Python values
+        values = frame.astype(object).where(frame.notna(), None)
+        try:
+            for start in range(0, len(values), batch_rows):
+                self.cursor.executemany(insert, list(values.iloc[start:start + batch_rows].itertuples(index=False, name=None)))
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        finally:
+            self.bump_version()
+        return len(values)
+
+    # ----- Aggregation pushed down over a query's result -----
+
+    def quote(self, identifier: str) -> str:
+        """Quote a column or table name for this database"""
+        if self.db_type == 'mysql':
+            return "`" + identifier.replace("`", "``") + "`"
+        return '"' + identifier.replace('"', '""') + '"'
+
+    @staticmethod
+    def _subquery(sql: str) -> str:
+        return f"({sql.strip().rstrip(';')}) AS q"
+
+    def histogram(self, sql: str, column: str, bins: int = 50,
+                  timeout: Optional[float] = None) -> Optional['pd.DataFrame']:
+        """Equal-width bin counts of a numeric column of a query's result, computed in the database
+
+        Returns columns bin_start, bin_end, count (only the bins that have rows).
+        """
+        import pandas as pd
+
+        source, col = self._subquery(sql), self.quote(column)
+        bounds = self.execute_query(f"SELECT MIN({col}) AS lo, MAX({col}) AS hi FROM {source}", timeout=timeout)
+        if bounds is None or bounds.empty or pd.isna(bounds.iloc[0, 0]):
+            return None
+        lo, hi = float(bounds.iloc[0, 0]), float(bounds.iloc[0, 1])
+        width = (hi - lo) / bins or 1.0
+
+        # Values are >= lo, so truncation is floor
+        offset = f"({col} - {lo!r}) / {width!r}"
+        bucket = f"FLOOR({offset})" if self.db_type == 'mysql' else f"CAST({offset} AS INTEGER)"
+        counts = self.execute_query(
+            f"SELECT {bucket} AS bin, COUNT(*) AS n FROM {source} WHERE {col} IS NOT NULL GROUP BY 1",
+            timeout=timeout)
+        if counts is None:
+            return None
+
+        # The maximum lands on bin == bins; it belongs to the last bin
+        counts['bin'] = counts['bin'].astype(int).clip(0, bins - 1)
+        counts = counts.groupby('bin', as_index=False)['n'].sum()
+        return pd.DataFrame({'bin_start': lo + counts['bin'] * width,
+                             'bin_end': lo + (counts['bin'] + 1) * width,
+                             'count': counts['n'].astype(int)})
+
+    def group_sum(self, sql: str, by: List[str], value: str,
+                  timeout: Optional[float] = None) -> Optional['pd.DataFrame']:
+        """SUM of a column of a query's result per group, computed in the database"""
+        groups = ', '.join(self.quote(c) for c in by)
+        return self.execute_query(
+            f"SELECT {groups}, SUM({self.quote(value)}) AS {self.quote(value)} "
+            f"FROM {self._subquery(sql)} GROUP BY {groups}",
+            timeout=timeout)
+
     def close(self):
         """Close database connection"""
         self.conn.close()
@@ -1,7 +1,6 @@
 """Direct query existing MySQL databases without API calls"""
 
 import mysql.connector
-import pandas as pd
 from tabulate import tabulate
 import config
 
@@ -23,6 +22,8 @@ def list_databases():
 
 def query_database(db_name, query):
     """Run SQL query on specific database"""
+    import pandas as pd
+    
     conn = mysql.connector.connect(
         host=config.MYSQL_HOST,
         user=config.MYSQL_USER,
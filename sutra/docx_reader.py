@@ -0,0 +1,179 @@
+"""Streaming DOCX reader yielding paragraphs and tables in document order
+
+    for record in read_docx('report.docx'):
+        if isinstance(record, DocxTable):
+            frame = table_frame(record)      # typed rows, ready for DatabaseManager.bulk_load
+        else:
+            print(record.text)
+
+word/document.xml is parsed incrementally from the zip (ElementTree
+iterparse) and every finished block is dropped from the tree, so memory stays
+flat however long the document is. Only the standard library is needed.
+"""
+
+import re
+import zipfile
+from pathlib import Path
+from typing import Iterator, List, NamedTuple, Optional, Union, TYPE_CHECKING
+from xml.etree import ElementTree
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+NUMBER = re.compile(r"^[-+]?[$€£]?\s*\d[\d,]*(\.\d+)?%?$")
+
+
+class DocxParagraph(NamedTuple):
+    text: str
+    style: Optional[str]  # e.g. 'Heading1'
+
+
+class DocxTable(NamedTuple):
+    index: int             # 1-based position among the document's tables
+    rows: List[List[str]]  # Cell text, merged cells repeated across their span (empty rows skipped)
+    caption: Optional[str]  # Text of the paragraph just before the table (often its title)
+
+
+DocxRecord = Union[DocxParagraph, DocxTable]
+
+
+def _text(element) -> str:
+    """Text of runs under an element (tabs and breaks kept)"""
+    parts = []
+    for node in element.iter():
+        if node.tag == f'{W}t' and node.text:
+            parts.append(node.text)
+        elif node.tag == f'{W}tab':
+            parts.append('\t')
+        elif node.tag in (f'{W}br', f'{W}cr'):
+            parts.append('\n')
+    return ''.join(parts)
+
+
+def _style(paragraph) -> Optional[str]:
+    style = paragraph.find(f'{W}pPr/{W}pStyle')
+    return style.get(f'{W}val') if style is not None else None
+
+
+def _row(tr, above: Optional[List[str]] = None) -> List[str]:
+    """Cell text per grid column; above is the previous row, for vertically merged cells"""
+    row = []
+    for tc in tr.findall(f'{W}tc'):
+        span = tc.find(f'{W}tcPr/{W}gridSpan')
+        merge = tc.find(f'{W}tcPr/{W}vMerge')
+        if merge is not None and merge.get(f'{W}val') != 'restart' and above and len(row) < len(above):
+            text = above[len(row)]  # Continues the merged cell above
+        else:
+            # Paragraphs of a cell joined by spaces (nested tables included)
+            text = ' '.join(t for t in (_text(p) for p in tc.iter(f'{W}p')) if t).strip()
+        row.extend([text] * (int(span.get(f'{W}val', 1)) if span is not None else 1))
+    return row
+
+
+def read_docx(path: Union[str, Path]) -> Iterator[DocxRecord]:
+    """Paragraphs and tables of a .docx in document order"""
+    with zipfile.ZipFile(path) as archive, archive.open('word/document.xml') as stream:
+        stack = []
+        paragraph_depth = table_depth = 0
+        tables = 0
+        rows: List[List[str]] = []  # Rows of the top-level table being read
+        row = None
+        last_text = None
+
+        for event, element in ElementTree.iterparse(stream, events=('start', 'end')):
+            tag = element.tag
+            if event == 'start':
+                stack.append(element)
+                if tag == f'{W}tbl':
+                    table_depth += 1
+                elif tag == f'{W}p':
+                    paragraph_depth += 1
+                continue
+
+            stack.pop()
+            parent = stack[-1] if stack else None
+            if tag == f'{W}p':
+                paragraph_depth -= 1
+                if paragraph_depth or table_depth:
+                    continue
+                text = _text(element).strip()
+                if text:
+                    last_text = text
+                    yield DocxParagraph(text, _style(element))
+            elif tag == f'{W}tr' and table_depth == 1:
+                row = _row(element, row)
+                if any(row):
+                    rows.append(row)
+            elif tag == f'{W}tbl':
+                table_depth -= 1
+                if table_depth:
+                    continue
+                tables += 1
+                if rows:
+                    yield DocxTable(tables, rows, last_text)
+                rows, row, last_text = [], None, None
+            else:
+                continue
+
+            # Finished blocks and rows are not needed any more
+            if parent is not None and (parent.tag == f'{W}body' or tag == f'{W}tr'):
+                parent.remove(element)
+
+
+def _identifier(text: str) -> str:
+    name = re.sub(r"[^0-9a-zA-Z]+", '_', text.strip().lower()).strip('_')
+    return f"c_{name}" if name[:1].isdigit() else name
+
+
+def column_names(header: List[str]) -> List[str]:
+    """SQL-safe, unique column names for a header row"""
+    names = []
+    for position, cell in enumerate(header, 1):
+        name = _identifier(cell)[:60] or f"column_{position}"
+        if name == 'id':
+            name = 'source_id'  # id is the generated primary key
+        base, suffix = name, 2
+        while name in names:
+            name, suffix = f"{base}_{suffix}", suffix + 1
+        names.append(name)
+    return names
+
+
+def has_header(rows: List[List[str]]) -> bool:
+    """First row looks like column titles: filled, distinct and not numeric"""
+    if len(rows) < 2:
+        return False
+    first = rows[0]
+    return all(first) and len(set(first)) == len(first) and not any(NUMBER.match(c) for c in first)
+
+
+def table_frame(table: DocxTable) -> 'pd.DataFrame':
+    """Rows of a table as a DataFrame; numeric columns ($1,200.50, 15%) become numbers"""
+    import pandas as pd
+
+    rows = table.rows
+    width = max(len(row) for row in rows)
+    if has_header(rows):
+        header, rows = rows[0] + [''] * (width - len(rows[0])), rows[1:]
+    else:
+        header = [''] * width
+    frame = pd.DataFrame([row + [''] * (width - len(row)) for row in rows], columns=column_names(header))
+
+    for column in frame.columns:
+        values = frame[column].str.strip()
+        filled = values != ''
+        if filled.any() and values[filled].str.match(NUMBER).all():
+            frame[column] = pd.to_numeric(values.str.replace(r"[$€£,%\s]", '', regex=True), errors='coerce')
+        else:
+            frame[column] = values.where(filled, None)
+    return frame
+
+
+def table_name(table: DocxTable, prefix: str) -> str:
+    """Table name from the caption before it, else <prefix>_table_<n>"""
+    if table.caption and len(table.caption) <= 60:
+        name = _identifier(table.caption)
+        if name:
+            return name
+    return f"{_identifier(prefix) or 'document'}_table_{table.index}"
@@ -0,0 +1,93 @@
+"""Point reduction for charts of large results
+
+    lttb(x, y, 2000)     -> indices of points that keep the visual shape of a line
+    min_max(x, y, 2000)  -> indices of the lowest and highest point per x bucket
+
+Both return sorted row positions, so the caller keeps every column of the
+selected rows (labels, colours, hover data).
+"""
+
+from typing import Optional, Tuple
+import numpy as np
+import pandas as pd
+
+
+def numeric_axis(values: pd.Series) -> np.ndarray:
+    """Float positions for an axis: numbers as is, dates as timestamps, anything else by order"""
+    if pd.api.types.is_numeric_dtype(values):
+        return values.to_numpy(dtype=float)
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values.astype('int64').to_numpy(dtype=float)
+    return np.arange(len(values), dtype=float)
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets: keeps first and last point plus, per bucket,
+    the point forming the largest triangle with its neighbours (x must be sorted)"""
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    previous = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], max(edges[i + 1], edges[i] + 1)
+        # Average of the next bucket (the last point for the final bucket)
+        next_start, next_end = end, edges[i + 2] if i + 2 < len(edges) else n
+        if next_end <= next_start:
+            next_end = next_start + 1
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        px, py = x[previous], y[previous]
+        areas = np.abs((px - avg_x) * (y[start:end] - py) - (px - x[start:end]) * (avg_y - py))
+        previous = start + int(np.argmax(areas)) if len(areas) else start
+        selected[i + 1] = previous
+    return np.unique(selected)
+
+
+def min_max(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Lowest and highest y in each of threshold / 2 equal-width x buckets"""
+    n = len(x)
+    if threshold >= n or threshold < 2:
+        return np.arange(n)
+
+    buckets = max(threshold // 2, 1)
+    lo, hi = np.nanmin(x), np.nanmax(x)
+    width = (hi - lo) / buckets or 1.0
+    bucket = np.clip(((x - lo) / width).astype(np.int64), 0, buckets - 1)
+
+    order = np.lexsort((y, bucket))  # By bucket, then y within it
+    sorted_buckets = bucket[order]
+    firsts = np.flatnonzero(np.r_[True, sorted_buckets[1:] != sorted_buckets[:-1]])
+    lasts = np.r_[firsts[1:] - 1, n - 1]
+    return np.unique(np.concatenate([order[firsts], order[lasts]]))
+
+
+def reduce_points(df: pd.DataFrame, x: str, y: str, budget: int, method: str = 'lttb',
+                  group: Optional[str] = None) -> Tuple[pd.DataFrame, bool]:
+    """Rows of df kept for a line (lttb) or scatter (min_max) chart of at most ~budget points
+
+    With group, every series gets a share of the budget proportional to its size.
+    Returns the reduced frame and whether anything was dropped.
+    """
+    if len(df) <= budget:
+        return df, False
+    reducer = lttb if method == 'lttb' else min_max
+    if group and df[group].nunique(dropna=False) > budget // 3:
+        group = None  # Too many series to give each a useful share
+
+    parts = []
+    groups = df.groupby(group, sort=False, dropna=False) if group else [(None, df)]
+    for _, part in groups:
+        if method == 'lttb':
+            part = part.sort_values(x, kind='stable')
+        share = max(int(budget * len(part) / len(df)), 3)
+        valid = part[y].notna().to_numpy()
+        keep = part[valid]
+        xs = numeric_axis(keep[x])
+        indices = reducer(xs, keep[y].to_numpy(dtype=float), share)
+        parts.append(keep.iloc[indices])
+    return pd.concat(parts), True
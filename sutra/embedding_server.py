@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""Local embedding server that keeps the sentence model warm
+
+Clients (SharedEncoder in sutra.embeddings) connect over a Unix socket.
+Requests arriving from different clients within a short window are merged
+into a single model.encode call, then split back per client.
+
+    python -m sutra.embedding_server [--socket PATH] [--model NAME]
+"""
+
+import argparse
+import os
+import queue
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional
+import numpy as np
+import config
+from sutra.embeddings import send_message, recv_header
+
+
+class PendingRequest:
+    """Texts from one client waiting for the next batch"""
+
+    def __init__(self, texts: List[str]):
+        self.texts = texts
+        self.result: Optional[np.ndarray] = None
+        self.error: Optional[str] = None
+        self.done = threading.Event()
+
+
+class EmbeddingServer:
+    """Serve encode requests from many processes with one loaded model"""
+
+    def __init__(self, socket_path: Optional[Path] = None, model_name: Optional[str] = None,
+                 max_batch: Optional[int] = None, batch_window_ms: Optional[float] = None):
+        self.socket_path = Path(socket_path or config.EMBEDDING_SOCKET)
+        self.model_name = model_name or config.EMBEDDING_MODEL
+        self.max_batch = max_batch or config.EMBEDDING_MAX_BATCH
+        window = config.EMBEDDING_BATCH_WINDOW_MS if batch_window_ms is None else batch_window_ms
+        self.batch_window = window / 1000.0
+        self.requests: "queue.Queue[PendingRequest]" = queue.Queue()
+        self.model = None
+        self.batches = 0
+        self.encoded = 0
+
+    def load_model(self):
+        from sentence_transformers import SentenceTransformer
+        print(f"🧠 Loading embedding model {self.model_name}...")
+        self.model = SentenceTransformer(self.model_name)
+        # Warm up so the first client does not pay for lazy initialization
+        self.model.encode(["warm up"])
+        print("✅ Model ready")
+
+    def _collect_batch(self) -> List[PendingRequest]:
+        """Block for one request, then gather others arriving within the batch window"""
+        batch = [self.requests.get()]
+        total = len(batch[0].texts)
+        deadline = time.monotonic() + self.batch_window
+
+        while total < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                request = self.requests.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(request)
+            total += len(request.texts)
+
+        return batch
+
+    def _batch_loop(self):
+        while True:
+            batch = self._collect_batch()
+            texts = [text for request in batch for text in request.texts]
+
+            try:
+                embeddings = np.asarray(self.model.encode(texts), dtype=np.float32)
+            except Exception as e:
+                for request in batch:
+                    request.error = str(e)
+                    request.done.set()
+                continue
+
+            self.batches += 1
+            self.encoded += len(texts)
+
+            offset = 0
+            for request in batch:
+                request.result = embeddings[offset:offset + len(request.texts)]
+                offset += len(request.texts)
+                request.done.set()
+
+    def _handle_client(self, conn: socket.socket):
+        with conn:
+            while True:
+                try:
+                    header = recv_header(conn)
+                except (ConnectionError, OSError):
+                    return
+
+                model = header.get('model')
+                if model and model != self.model_name:
+                    send_message(conn, {'error': f"Server runs {self.model_name}, not {model}"})
+                    continue
+
+                texts = [str(t) for t in header.get('texts', [])]
+                if not texts:
+                    send_message(conn, {'shape': [0, 0]})
+                    continue
+
+                request = PendingRequest(texts)
+                self.requests.put(request)
+                request.done.wait()
+
+                try:
+                    if request.error:
+                        send_message(conn, {'error': request.error})
+                    else:
+                        result = np.ascontiguousarray(request.result, dtype=np.float32)
+                        send_message(conn, {'shape': list(result.shape)}, result.tobytes())
+                except OSError:
+                    return
+
+    def serve_forever(self):
+        if self.model is None:
+            self.load_model()
+
+        if self.socket_path.exists():
+            self.socket_path.unlink()
+        self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(str(self.socket_path))
+        os.chmod(self.socket_path, 0o600)
+        server.listen()
+
+        threading.Thread(target=self._batch_loop, daemon=True).start()
+        print(f"📡 Embedding server listening on {self.socket_path}")
+
+        try:
+            while True:
+                conn, _ = server.accept()
+                threading.Thread(target=self._handle_client, args=(conn,), daemon=True).start()
+        except KeyboardInterrupt:
+            print(f"\n🛑 Stopping ({self.encoded} texts in {self.batches} batches)")
+        finally:
+            server.close()
+            if self.socket_path.exists():
+                self.socket_path.unlink()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the local embedding server')
+    parser.add_argument('--socket', type=str, help='Unix socket path')
+    parser.add_argument('--model', type=str, help='Sentence-transformers model name')
+    parser.add_argument('--max-batch', type=int, help='Max texts per forward pass')
+    parser.add_argument('--window-ms', type=float, help='Batching window in milliseconds')
+    args = parser.parse_args()
+
+    if not hasattr(socket, 'AF_UNIX'):
+        print("❌ Unix sockets are not supported on this platform")
+        return 1
+
+    EmbeddingServer(args.socket, args.model, args.max_batch, args.window_ms).serve_forever()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+"""Shared sentence encoder with optional embedding server backend"""
+
+import json
+import socket
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional, Union
+import numpy as np
+import config
+
+# Seconds to wait before retrying the server after a failed connection
+RETRY_INTERVAL = 30.0
+
+
+def send_message(sock: socket.socket, header: dict, payload: bytes = b''):
+    """Write a length-prefixed JSON header followed by a raw payload"""
+    header_bytes = json.dumps(header).encode('utf-8')
+    sock.sendall(struct.pack('>I', len(header_bytes)) + header_bytes + payload)
+
+
+def recv_exact(sock: socket.socket, size: int) -> bytes:
+    """Read exactly size bytes or raise ConnectionError"""
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 1 << 20))
+        if not chunk:
+            raise ConnectionError("Embedding server closed the connection")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+def recv_header(sock: socket.socket) -> dict:
+    """Read a length-prefixed JSON header"""
+    (length,) = struct.unpack('>I', recv_exact(sock, 4))
+    return json.loads(recv_exact(sock, length).decode('utf-8'))
+
+
+class SharedEncoder:
+    """Drop-in for SentenceTransformer.encode used by every component in the process
+
+    Requests go to the embedding server when its socket is up, so concurrent
+    processes share one warm model. Each thread has its own connection, so
+    requests from several threads reach the server together and are batched.
+    Otherwise the model is loaded once in this process and shared between
+    SchemaEmbeddings and FeedbackMatcher.
+    """
+
+    def __init__(self, model_name: Optional[str] = None, socket_path: Optional[Path] = None):
+        self.model_name = model_name or config.EMBEDDING_MODEL
+        self.socket_path = Path(socket_path or config.EMBEDDING_SOCKET)
+        self._local_model = None
+        self._local = threading.local()  # This thread's server connection (.sock)
+        self._remote_failed_at = None
+
+    @property
+    def local_model(self):
+        """In-process model, loaded on first use"""
+        if self._local_model is None:
+            from sentence_transformers import SentenceTransformer
+            print(f"🧠 Loading embedding model {self.model_name} in-process")
+            self._local_model = SentenceTransformer(self.model_name)
+        return self._local_model
+
+    def _remote_available(self) -> bool:
+        if not hasattr(socket, 'AF_UNIX') or not self.socket_path.exists():
+            return False
+        if self._remote_failed_at is not None:
+            return time.monotonic() - self._remote_failed_at >= RETRY_INTERVAL
+        return True
+
+    def _connect(self) -> socket.socket:
+        sock = getattr(self._local, 'sock', None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.connect(str(self.socket_path))
+            self._local.sock = sock
+        return sock
+
+    def _close(self):
+        sock = getattr(self._local, 'sock', None)
+        if sock is not None:
+            try:
+                sock.close()
+            except OSError:
+                pass
+            self._local.sock = None
+
+    def _encode_remote(self, texts: List[str]) -> np.ndarray:
+        try:
+            sock = self._connect()
+            send_message(sock, {'model': self.model_name, 'texts': texts})
+            header = recv_header(sock)
+            if 'error' in header:
+                raise RuntimeError(header['error'])
+            rows, dim = header['shape']
+            payload = recv_exact(sock, rows * dim * 4)
+        except Exception:
+            self._close()
+            raise
+        return np.frombuffer(payload, dtype=np.float32).reshape(rows, dim)
+
+    def encode(self, sentences: Union[str, List[str]], **kwargs) -> np.ndarray:
+        """Encode one sentence or a list of sentences
+
+        The server encodes with default options, so calls passing keyword
+        arguments (batch_size, normalize_embeddings, ...) run in-process.
+        """
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+
+        embeddings = None
+        if texts and not kwargs and self._remote_available():
+            try:
+                embeddings = self._encode_remote(texts)
+                self._remote_failed_at = None
+            except Exception as e:
+                print(f"⚠️ Embedding server unavailable ({e}), encoding in-process")
+                self._remote_failed_at = time.monotonic()
+
+        if embeddings is None:
+            embeddings = np.asarray(self.local_model.encode(texts, **kwargs), dtype=np.float32)
+
+        return embeddings[0] if single else embeddings
+
+
+_encoders = {}
+_encoders_lock = threading.Lock()
+
+
+def get_encoder(model_name: Optional[str] = None) -> SharedEncoder:
+    """Process-wide encoder for a model (the model itself loads lazily)"""
+    name = model_name or config.EMBEDDING_MODEL
+    with _encoders_lock:
+        if name not in _encoders:
+            _encoders[name] = SharedEncoder(name)
+        return _encoders[name]
+
+
+def set_encoder(encoder, model_name: Optional[str] = None):
+    """Install a custom encoder for a model name (e.g. a deterministic stub in benchmarks)"""
+    with _encoders_lock:
+        _encoders[model_name or config.EMBEDDING_MODEL] = encoder
@@ -0,0 +1,296 @@
+"""Local rule-based SQL for common question shapes (no LLM call)"""
+
+import re
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import config
+
+# Words that carry no meaning for the rules below
+STOP_WORDS = {
+    'a', 'an', 'the', 'all', 'of', 'in', 'on', 'at', 'for', 'by', 'with', 'from', 'to', 'me', 'us',
+    'is', 'are', 'was', 'were', 'what', 'which', 'who', 'whose', 'each', 'per', 'and', 'every',
+    'please', 'there', 'do', 'does', 'we', 'have', 'has', 'many', 'much', 'whole', 'entire', 'where',
+    'equals', 'equal', 'named', 'called', 'their', 'its', 'our', 'any', 'records', 'rows', 'data',
+}
+
+LIST_WORDS = {'show', 'list', 'display', 'get', 'give', 'find', 'view', 'see', 'fetch', 'return'}
+COUNT_WORDS = {'count', 'how', 'number'}
+AGGREGATES = {
+    'total': 'SUM', 'sum': 'SUM',
+    'average': 'AVG', 'avg': 'AVG', 'mean': 'AVG',
+    'maximum': 'MAX', 'max': 'MAX', 'highest': 'MAX', 'largest': 'MAX',
+    'minimum': 'MIN', 'min': 'MIN', 'lowest': 'MIN', 'smallest': 'MIN',
+}
+NUMERIC_TYPES = ('int', 'real', 'float', 'double', 'decimal', 'numeric')
+
+
+class FastPathResult(NamedTuple):
+    sql: str
+    confidence: float
+    intent: str
+
+
+def _variants(name: str) -> List[str]:
+    """Spellings a question may use for a table or column name"""
+    base = name.lower()
+    spaced = base.replace('_', ' ')
+    forms = {base, spaced}
+    for form in (base, spaced):
+        if form.endswith('ies'):
+            forms.add(form[:-3] + 'y')
+        elif form.endswith('ses') or form.endswith('xes'):
+            forms.add(form[:-2])
+        elif form.endswith('s'):
+            forms.add(form[:-1])
+        else:
+            forms.add(form + 's')
+            if form.endswith('y'):
+                forms.add(form[:-1] + 'ies')
+    return sorted(forms, key=len, reverse=True)
+
+
+def _quote(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+def _ident(name: str) -> str:
+    return name if re.fullmatch(r'[A-Za-z_][A-Za-z0-9_]*', name) else f"`{name}`"
+
+
+class RuleBasedSQL:
+    """Recognize list / count / aggregate / filter-by-known-value questions
+
+    Tables and columns come from the data inventory and values from the
+    relevance hits. A question with any content word the rules cannot explain
+    (negation, comparisons, ordering, an unknown "by" column) falls through
+    to the LLM; ambiguous values and joins lower the confidence.
+    """
+
+    def __init__(self, db_manager, inventory: Dict, threshold: Optional[float] = None):
+        self.db = db_manager
+        self.inventory = inventory
+        self.threshold = config.FAST_PATH_THRESHOLD if threshold is None else threshold
+        self._types: Dict[str, Dict[str, str]] = {}
+        self._foreign_keys: Optional[Dict[str, List[Tuple[str, str, str]]]] = None
+
+    # ----- Schema helpers -----
+
+    def reset(self):
+        """Forget cached column types and foreign keys (call after the schema changes)"""
+        self._types = {}
+        self._foreign_keys = None
+
+    def column_types(self, table: str) -> Dict[str, str]:
+        if table not in self._types:
+            try:
+                self._types[table] = {row[1]: str(row[2]).lower() for row in self.db.get_table_info(table)}
+            except Exception:
+                self._types[table] = {}
+        return self._types[table]
+
+    def is_numeric(self, table: str, column: str) -> bool:
+        return any(t in self.column_types(table).get(column, '') for t in NUMERIC_TYPES)
+
+    def primary_key(self, table: str) -> Optional[str]:
+        """Single-column primary key of a table, if known"""
+        try:
+            rows = self.db.get_table_info(table)
+        except Exception:
+            return None
+        keys = [row[1] for row in rows if len(row) > 5 and row[5]]  # SQLite PRAGMA table_info pk flag
+        if len(keys) == 1:
+            return keys[0]
+        return 'id' if not keys and 'id' in self.inventory['columns'].get(table, []) else None
+
+    def foreign_keys(self, table: str) -> List[Tuple[str, str, str]]:
+        """(column, referenced table, referenced column) for a table"""
+        if self._foreign_keys is None:
+            self._foreign_keys = {}
+            pattern = re.compile(
+                r"FOREIGN\s+KEY\s*\(\s*[`\"]?(\w+)[`\"]?\s*\)\s*REFERENCES\s+[`\"]?(\w+)[`\"]?\s*\(\s*[`\"]?(\w+)",
+                re.IGNORECASE)
+            for name, statement in self.db.get_table_ddl().items():
+                self._foreign_keys[name] = pattern.findall(statement or '')
+        return self._foreign_keys.get(table, [])
+
+    def _join(self, table: str, other: str) -> Optional[str]:
+        """JOIN clause linking table to other through a foreign key, either direction"""
+        for column, ref_table, ref_column in self.foreign_keys(table):
+            if ref_table == other:
+                return f"JOIN {_ident(other)} ON {_ident(table)}.{_ident(column)} = {_ident(other)}.{_ident(ref_column)}"
+        for column, ref_table, ref_column in self.foreign_keys(other):
+            if ref_table == table:
+                return f"JOIN {_ident(other)} ON {_ident(other)}.{_ident(column)} = {_ident(table)}.{_ident(ref_column)}"
+        return None
+
+    def _fans_out(self, table: str, other: str) -> bool:
+        """Whether joining other repeats rows of table (other points at table, not the reverse)"""
+        return (not any(ref == other for _, ref, _ in self.foreign_keys(table))
+                and any(ref == table for _, ref, _ in self.foreign_keys(other)))
+
+    # ----- Matching -----
+
+    @staticmethod
+    def _find(text: str, phrase: str, covered: List[bool]) -> Optional[Tuple[int, int]]:
+        """First whole-word occurrence of phrase outside already explained text"""
+        for match in re.finditer(rf"(?<![\w]){re.escape(phrase)}(?![\w])", text):
+            if not any(covered[match.start():match.end()]):
+                for i in range(*match.span()):
+                    covered[i] = True
+                return match.span()
+        return None
+
+    def _match_tables(self, text: str, covered: List[bool]) -> List[str]:
+        found = []
+        for table in self.inventory['tables']:
+            for form in _variants(table):
+                span = self._find(text, form, covered)
+                if span:
+                    found.append((span[0], table))
+                    break
+        return [table for _, table in sorted(found)]
+
+    def _match_columns(self, text: str, tables: List[str], covered: List[bool]) -> List[Tuple[str, str]]:
+        found = []
+        for table in tables:
+            for column in self.inventory['columns'].get(table, []):
+                for form in _variants(column):
+                    span = self._find(text, form, covered)
+                    if span:
+                        found.append((span[0], table, column))
+                        break
+        return [(table, column) for _, table, column in sorted(found)]
+
+    @staticmethod
+    def _unexplained(text: str, covered: List[bool]) -> List[str]:
+        words = []
+        for match in re.finditer(r"[\w'@.-]+", text):
+            if any(covered[match.start():match.end()]):
+                continue
+            word = match.group().strip(".'")
+            if word and word not in STOP_WORDS and word not in LIST_WORDS \
+                    and word not in COUNT_WORDS and word not in AGGREGATES:
+                words.append(word)
+        return words
+
+    # ----- Generation -----
+
+    def generate(self, question: str, hits=None) -> Optional[FastPathResult]:
+        """SQL for the question with a confidence in [0, 1], or None if no rule applies"""
+        text = re.sub(r"[?!.]+$", "", question.lower().strip())
+        if not text:
+            return None
+        covered = [False] * len(text)
+        words = re.findall(r"\w+", text)
+
+        # Literal values: only hits whose stored value was typed in full
+        by_value: Dict[str, list] = {}
+        for hit in hits or []:
+            if hit.value is not None and hit.column and hit.score >= 1.0:
+                by_value.setdefault(hit.value, []).append(hit)
+        by_value = {value: found for value, found in by_value.items()
+                    if self._find(text, value.lower(), covered)}
+
+        tables = self._match_tables(text, covered)
+        if not tables:
+            tables = list(dict.fromkeys(h.table for found in by_value.values() for h in found))
+        if not tables:
+            # Only columns named: usable when exactly one table has all of them
+            named = {c for _, c in self._match_columns(text, self.inventory['tables'], list(covered))}
+            tables = [t for t in self.inventory['tables']
+                      if named and named <= set(self.inventory['columns'].get(t, []))]
+            if len(tables) != 1:
+                return None
+        target = tables[0]
+        confidence = 0.6
+
+        # A value stored in several columns is only usable when the target table settles it
+        filters = []
+        for found in by_value.values():
+            own = [h for h in found if h.table == target]
+            candidates = own or found
+            if len(candidates) > 1:
+                confidence -= 0.3
+            filters.append(candidates[0])
+
+        # Intent
+        aggregate = next((AGGREGATES[w] for w in words if w in AGGREGATES), None)
+        counting = ('how' in words and 'many' in words) or 'count' in words or 'number' in words
+        if counting and aggregate:
+            return None  # Aggregates of counts ("average number of ...") need a subquery
+        if counting:
+            intent = 'count'
+        elif aggregate:
+            intent = 'aggregate'
+        elif (words and words[0] in LIST_WORDS) or filters:
+            intent = 'list'
+        else:
+            return None
+
+        # Filters and extra tables on other tables need a foreign key path to the target table
+        joins = []
+        for table in [h.table for h in filters] + tables[1:]:
+            if table != target and table not in joins:
+                if not self._join(target, table):
+                    return None
+                joins.append(table)
+                confidence -= 0.05
+
+        columns = self._match_columns(text, [target] + joins, covered)
+        filter_columns = {(h.table, h.column) for h in filters}
+        columns = [c for c in columns if c not in filter_columns]
+
+        def expr(table_column: Tuple[str, str]) -> str:
+            return f"{_ident(table_column[0])}.{_ident(table_column[1])}"
+
+        # Columns introduced by "by"/"per" become the grouping
+        group = [c for c in columns if re.search(
+            rf"\b(by|per|each|every)\s+(\w+\s+)?{re.escape(c[1].lower().replace('_', ' '))}", text)]
+        used = list(group)
+
+        # Joins to tables pointing at the target repeat its rows
+        fans_out = any(self._fans_out(target, t) for t in joins)
+        if intent == 'count':
+            if joins:
+                key = self.primary_key(target)
+                if not key:
+                    return None
+                select = f"COUNT(DISTINCT {expr((target, key))}) AS count"
+            else:
+                select = "COUNT(*) AS count"
+        elif intent == 'aggregate':
+            measures = [c for c in columns if c not in group and self.is_numeric(*c)]
+            if not measures or (fans_out and measures[0][0] == target):
+                return None
+            measure = measures[0]
+            used.append(measure)
+            select = f"{aggregate}({expr(measure)}) AS {aggregate.lower()}_{measure[1]}"
+        else:
+            if group:
+                return None  # "orders by status" is a grouping the list rule cannot express
+            used = [c for c in columns if c[0] == target]
+            select = ', '.join(expr(c) for c in used) if used else f"{_ident(target)}.*"
+            if fans_out:
+                select = f"DISTINCT {select}"
+
+        if group:
+            select = f"{', '.join(expr(c) for c in group)}, {select}"
+
+        sql = f"SELECT {select} FROM {_ident(target)}"
+        sql += ''.join(f" {self._join(target, t)}" for t in joins)
+        if filters:
+            sql += " WHERE " + ' AND '.join(f"{expr((h.table, h.column))} = {_quote(h.value)}" for h in filters)
+        if group:
+            sql += " GROUP BY " + ', '.join(expr(c) for c in group)
+
+        # Every content word must be explained by the SQL ("per customer" on a joined table is not)
+        unexplained = self._unexplained(text, covered) + [c[1] for c in columns if c not in used]
+        unexplained += [t for t in joins if any(
+            re.search(rf"\b(by|per|each|every)\s+{re.escape(form)}\b", text) for form in _variants(t))]
+        if unexplained:
+            return None  # "not", "after", "latest", "by city" on another table, ... change the meaning
+        confidence += 0.4
+        if words and (words[0] in LIST_WORDS or intent != 'list'):
+            confidence += 0.05
+        confidence = max(0.0, min(1.0, confidence))
+
+        return FastPathResult(sql, round(confidence, 2), intent)
@@ -1,74 +1,143 @@
 """Smart feedback matching using semantic similarity"""
 
-import csv
-from pathlib import Path
+import threading
+import time
+from typing import Dict, Optional
 import numpy as np
-from sentence_transformers import SentenceTransformer
 import config
+from sutra.embeddings import get_encoder
+from sutra.ann_index import normalize
+from sutra.quantization import QuantizedMatrix
+from sutra.feedback_store import FeedbackRecord, FeedbackStore, get_feedback_store, legacy_csv
+from sutra import query_templates
 
 class FeedbackMatcher:
-    def __init__(self):
-        self.model = SentenceTransformer('all-MiniLM-L6-v2')
+    def __init__(self, value_finder=None, database: Optional[str] = None, store: Optional[FeedbackStore] = None):
+        self.model = get_encoder()  # Shared, warm model (embedding server or in-process)
+        self.model_name = config.EMBEDDING_MODEL
+        # text -> hits for stored values typed in it (SchemaEmbeddings.typed_values);
+        # questions naming values are matched as templates and re-bound
+        self.value_finder = value_finder
         self.similarity_threshold = 0.85  # High threshold for SQL reuse
-        
-        # Load feedback for current database
-        db_name = config.MYSQL_DATABASE if hasattr(config, 'MYSQL_DATABASE') else "default_db"
-        self.feedback_file = Path(f"data/output/feedback_{db_name}.csv")
-        
-        # Load and embed all good queries
-        self.good_queries = self._load_good_queries()
-    
-    def _load_good_queries(self):
-        """Load and embed all good queries from feedback"""
-        good_queries = {}
-        
-        if not self.feedback_file.exists():
-            return good_queries
-        
-        with open(self.feedback_file, 'r') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                if row.get('status') == 'good':
-                    question = row['question'].lower().strip()
-                    sql = row['sql'].strip()
-                    
-                    # Skip if we already have this question with different SQL
-                    if question not in good_queries:
-                        good_queries[question] = {
-                            'sql': sql,
-                            'embedding': self.model.encode([question])[0]
-                        }
-        
-        print(f"📚 Loaded {len(good_queries)} good queries from feedback")
-        return good_queries
-    
-    def find_similar_query(self, question: str):
-        """Find similar query from feedback"""
-        if not self.good_queries:
+
+        # Feedback for the current database, read incrementally from the shared store
+        self.database = database or (config.MYSQL_DATABASE if hasattr(config, 'MYSQL_DATABASE') else "default_db")
+        self.store = store or get_feedback_store()
+        self.store.import_csv(self.database, legacy_csv(self.database))
+
+        # Readers take a consistent snapshot under _lock; refreshes run one at a time
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self.good_queries: Dict[str, dict] = {}
+        self.questions = []
+        self.matrix = QuantizedMatrix()
+        self.last_id = 0
+        self._polled = 0.0
+
+        self.refresh()
+        print(f"📚 Loaded {len(self.good_queries)} good queries from feedback")
+
+    def _template(self, question: str):
+        if self.value_finder is None:
+            return None
+        return query_templates.extract(question, self.value_finder(question))
+
+    def _apply(self, good_queries: Dict[str, dict], record: FeedbackRecord, pending: Dict[str, tuple]):
+        """Fold one feedback row into the entries; the newest verdict on a question wins"""
+        question = record.normalized
+        if record.status == 'good':
+            sql = record.sql.strip()
+        elif record.corrected_sql:
+            sql = record.corrected_sql.strip()  # A correction is verified SQL for the question
+        else:
+            # Rejected: forget the SQL if it is what we would have reused
+            if good_queries.get(question, {}).get('source') == record.sql.strip():
+                del good_queries[question]
+                pending.pop(question, None)
+            return
+
+        # Questions naming stored values are embedded in template form ("orders by {1}")
+        entry = {'sql': sql, 'source': sql, 'text': question}
+        template = self._template(question)
+        template_sql = query_templates.parameterize(sql, template) if template else None
+        if template_sql:
+            entry.update(text=template.question, sql=template_sql, slots=template.columns)
+
+        # Reuse the stored embedding when it was made of the same text by the same model
+        if (record.embedding is not None and record.embedding_model == self.model_name
+                and record.embedded_text == entry['text']):
+            entry['vector'] = record.embedding
+            pending.pop(question, None)
+        else:
+            pending[question] = (record.id, entry)
+        good_queries[question] = entry
+
+    def refresh(self) -> int:
+        """Apply feedback recorded since the last read (by this or any other process)"""
+        with self._refresh_lock:
+            changes = self.store.changes_since(self.database, self.last_id)
+            self._polled = time.monotonic()
+            if not changes:
+                return 0
+
+            good_queries = dict(self.good_queries)
+            pending = {}  # question -> (row id, entry) still needing an embedding
+            for record in changes:
+                self._apply(good_queries, record, pending)
+
+            # One batched encode for new texts, written back for other readers
+            if pending:
+                vectors = normalize(self.model.encode([entry['text'] for _, entry in pending.values()]))
+                for (record_id, entry), vector in zip(pending.values(), vectors):
+                    entry['vector'] = vector
+                    self.store.set_embedding(record_id, entry['text'], vector, self.model_name)
+
+            # Unit vectors stored at the configured precision
+            questions = list(good_queries)
+            matrix = QuantizedMatrix()
+            if questions:
+                matrix = QuantizedMatrix(np.stack([good_queries[q]['vector'] for q in questions]))
+            with self._lock:
+                self.questions, self.matrix, self.good_queries = questions, matrix, good_queries
+            self.last_id = changes[-1].id
+            return len(changes)
+
+    def find_similar_query(self, question: str, threshold: Optional[float] = None):
+        """Find similar query from feedback (SQL only at or above threshold, default similarity_threshold)"""
+        if time.monotonic() - self._polled >= config.FEEDBACK_POLL_S:
+            self.refresh()
+        with self._lock:
+            questions, matrix, good_queries = self.questions, self.matrix, self.good_queries
+        if not questions:
             return None, 0
-        
+
         question_lower = question.lower().strip()
-        question_embedding = self.model.encode([question_lower])[0]
-        
-        best_match = None
-        best_similarity = 0
-        
-        for stored_question, data in self.good_queries.items():
-            # Calculate cosine similarity
-            similarity = np.dot(question_embedding, data['embedding']) / (
-                np.linalg.norm(question_embedding) * np.linalg.norm(data['embedding'])
-            )
-            
-            if similarity > best_similarity:
-                best_similarity = similarity
-                best_match = data['sql']
-        
+        template = self._template(question_lower)
+        text = template.question if template else question_lower
+        question_embedding = normalize(self.model.encode([text])[0])
+
+        # Cosine similarity against every stored question in one product
+        similarities = matrix.dot(question_embedding)
+        best_idx = int(np.argmax(similarities))
+        best_similarity = float(similarities[best_idx])
+        best_question = questions[best_idx]
+        entry = good_queries[best_question]
+
         # Only return if similarity is high enough
-        if best_similarity >= self.similarity_threshold:
-            return best_match, best_similarity
-        
-        return None, best_similarity
-    
+        if best_similarity < (self.similarity_threshold if threshold is None else threshold):
+            return None, best_similarity
+
+        if 'slots' in entry:
+            # Template: re-bind to the values in this question
+            if template and query_templates.compatible(entry['slots'], template):
+                return query_templates.bind(entry['sql'], template.values), best_similarity
+            return None, best_similarity
+
+        # Literal SQL only answers questions about the same values
+        if template and not query_templates.mentions(best_question, template.values):
+            return None, best_similarity
+        return entry['sql'], best_similarity
+
     def reload_feedback(self):
-        """Reload feedback (call after new feedback is saved)"""
-        self.good_queries = self._load_good_queries()
\ No newline at end of file
+        """Pick up new feedback (call after new feedback is saved)"""
+        self.refresh()
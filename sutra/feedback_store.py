@@ -0,0 +1,177 @@
+"""Feedback store on SQLite shared by every database and process
+
+One WAL-mode file holds the feedback rows of all databases, indexed on
+(database, id) and (database, normalized question). Readers keep the last id
+they have seen and fetch only newer rows with changes_since, so several
+processes can record and consume feedback without re-reading everything.
+Question embeddings are stored next to the row (float32 blobs) and reused by
+any process using the same embedding model.
+"""
+
+import csv
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import List, NamedTuple, Optional
+import numpy as np
+import config
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS feedback (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    database TEXT NOT NULL,
+    question TEXT NOT NULL,
+    normalized TEXT NOT NULL,
+    sql TEXT NOT NULL,
+    status TEXT NOT NULL,
+    corrected_sql TEXT NOT NULL DEFAULT '',
+    embedded_text TEXT,
+    embedding BLOB,
+    embedding_model TEXT,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_feedback_database_id ON feedback (database, id);
+CREATE INDEX IF NOT EXISTS idx_feedback_database_question ON feedback (database, normalized);
+CREATE TABLE IF NOT EXISTS csv_imports (
+    database TEXT PRIMARY KEY,
+    rows INTEGER NOT NULL
+);
+"""
+COLUMNS = ("id, database, question, normalized, sql, status, corrected_sql, embedded_text, embedding, "
+           "embedding_model, created_at")
+
+
+def normalize_question(question: str) -> str:
+    return ' '.join(question.lower().split())
+
+
+def legacy_csv(database: str) -> Path:
+    """Per-database CSV written by earlier versions"""
+    safe_name = database.replace('/', '_').replace('\\', '_')
+    return config.OUTPUT_DIR / f"feedback_{safe_name}.csv"
+
+
+class FeedbackRecord(NamedTuple):
+    id: int
+    database: str
+    question: str
+    normalized: str
+    sql: str
+    status: str
+    corrected_sql: str
+    embedded_text: Optional[str]
+    embedding: Optional[np.ndarray]
+    embedding_model: Optional[str]
+    created_at: str
+
+
+class FeedbackStore:
+    """Append-only feedback rows with incremental reads"""
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path or config.FEEDBACK_DB)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Busy timeout lets concurrent writers from other processes wait instead of failing
+        self.conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+        self.lock = threading.Lock()
+        with self.lock:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.executescript(SCHEMA)
+            self.conn.commit()
+
+    def add(self, database: str, question: str, sql: str, status: str, corrected_sql: str = '',
+            embedded_text: Optional[str] = None, embedding: Optional[np.ndarray] = None,
+            embedding_model: Optional[str] = None) -> int:
+        """Record feedback ('good' or 'bad'); returns its id"""
+        blob = np.asarray(embedding, dtype=np.float32).tobytes() if embedding is not None else None
+        with self.lock:
+            cursor = self.conn.execute(
+                "INSERT INTO feedback (database, question, normalized, sql, status, corrected_sql, "
+                "embedded_text, embedding, embedding_model, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (database, question, normalize_question(question), sql or '', status, corrected_sql or '',
+                 embedded_text, blob, embedding_model, datetime.now().isoformat()))
+            self.conn.commit()
+            return cursor.lastrowid
+
+    @staticmethod
+    def _records(rows) -> List[FeedbackRecord]:
+        return [FeedbackRecord(*row[:8], np.frombuffer(row[8], dtype=np.float32) if row[8] else None, *row[9:])
+                for row in rows]
+
+    def changes_since(self, database: str, last_id: int = 0) -> List[FeedbackRecord]:
+        """Rows of a database with id > last_id, oldest first"""
+        with self.lock:
+            rows = self.conn.execute(f"SELECT {COLUMNS} FROM feedback WHERE database = ? AND id > ? ORDER BY id",
+                                     (database, last_id)).fetchall()
+        return self._records(rows)
+
+    def for_question(self, database: str, question: str) -> List[FeedbackRecord]:
+        """All feedback on one question (normalized), oldest first"""
+        with self.lock:
+            rows = self.conn.execute(f"SELECT {COLUMNS} FROM feedback WHERE database = ? AND normalized = ? "
+                                     "ORDER BY id", (database, normalize_question(question))).fetchall()
+        return self._records(rows)
+
+    def set_embedding(self, record_id: int, embedded_text: str, embedding: np.ndarray, model: str):
+        """Store the embedding a reader computed, for other readers to reuse"""
+        with self.lock:
+            self.conn.execute(
+                "UPDATE feedback SET embedded_text = ?, embedding = ?, embedding_model = ? WHERE id = ?",
+                (embedded_text, np.asarray(embedding, dtype=np.float32).tobytes(), model, record_id))
+            self.conn.commit()
+
+    def verified_sql(self, database: str) -> List[str]:
+        """SQL confirmed by users: good answers and corrections"""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT CASE WHEN status = 'good' THEN sql ELSE corrected_sql END FROM feedback "
+                "WHERE database = ? AND (status = 'good' OR corrected_sql != '') ORDER BY id",
+                (database,)).fetchall()
+        return [row[0] for row in rows if row[0]]
+
+    def import_csv(self, database: str, path: Optional[Path] = None) -> int:
+        """Copy rows of the legacy CSV not imported yet (safe to call on every start)"""
+        path = Path(path or legacy_csv(database))
+        if not path.exists():
+            return 0
+        with open(path, 'r', newline='') as f:
+            rows = list(csv.DictReader(f))
+
+        with self.lock:
+            # Take the write lock first, so two processes cannot import the same rows
+            self.conn.execute("BEGIN IMMEDIATE")
+            done = self.conn.execute("SELECT rows FROM csv_imports WHERE database = ?", (database,)).fetchone()
+            done = done[0] if done else 0
+            new_rows = rows[done:]
+            now = datetime.now().isoformat()
+            self.conn.executemany(
+                "INSERT INTO feedback (database, question, normalized, sql, status, corrected_sql, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(database, row.get('question') or '', normalize_question(row.get('question') or ''),
+                  (row.get('sql') or '').strip(), row.get('status') or 'bad',
+                  (row.get('corrected_sql') or '').strip(), now) for row in new_rows])
+            self.conn.execute("INSERT OR REPLACE INTO csv_imports (database, rows) VALUES (?, ?)",
+                              (database, len(rows)))
+            self.conn.commit()
+        if new_rows:
+            print(f"📥 Imported {len(new_rows)} feedback rows from {path.name}")
+        return len(new_rows)
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+_shared_store: Optional[FeedbackStore] = None
+_shared_lock = threading.Lock()
+
+
+def get_feedback_store() -> FeedbackStore:
+    """Process-wide store on config.FEEDBACK_DB"""
+    global _shared_store
+    with _shared_lock:
+        if _shared_store is None or _shared_store.path != Path(config.FEEDBACK_DB):
+            _shared_store = FeedbackStore()
+        return _shared_store
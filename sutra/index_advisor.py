@@ -0,0 +1,263 @@
+"""Secondary index recommendations from the filter and join columns of executed queries"""
+
+import json
+import re
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+import config
+from sutra.feedback_store import FeedbackStore, get_feedback_store
+from sutra.query_guard import table_aliases
+from sutra.result_cache import is_cacheable
+
+STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+# column <op> ... or ... <op> column, for comparison operators an index can serve
+COMPARISON = r"(?:=|<>|!=|<=|>=|<|>|\bIN\b|\bBETWEEN\b|\bIS\b)"
+QUALIFIED = re.compile(r"[`\"]?(\w+)[`\"]?\.[`\"]?(\w+)[`\"]?")
+
+# Logged queries replayed per index to check it actually helps
+VALIDATE_SAMPLE = 10
+# An index is dropped when its queries get this much slower, and by more than timer noise
+REGRESSION_FACTOR = 1.1
+REGRESSION_MIN_S = 0.001
+
+
+class IndexRecommendation(NamedTuple):
+    table: str
+    column: str
+    uses: int
+    reason: str
+
+    @property
+    def name(self) -> str:
+        return f"idx_{self.table}_{self.column}"[:64]
+
+
+class IndexAdvisor:
+    """Record WHERE / JOIN columns of executed queries and recommend or create indexes
+
+    History comes from a per-database query log (appended by process_question)
+    and the good / corrected SQL in the feedback store. Columns already leading an
+    index, and primary keys, are never recommended.
+    """
+
+    def __init__(self, db_manager, log_file: Optional[Path] = None,
+                 feedback_store: Optional[FeedbackStore] = None, database: Optional[str] = None):
+        self.db = db_manager
+        self.database = database or getattr(db_manager, 'database', None) or config.MYSQL_DATABASE
+        safe_name = self.database.replace('/', '_').replace('\\', '_')
+        self.log_file = Path(log_file) if log_file else config.OUTPUT_DIR / f"query_log_{safe_name}.jsonl"
+        self.feedback_store = feedback_store
+
+    # ----- History -----
+
+    def record(self, sql: str):
+        """Append an executed query to the log"""
+        try:
+            self.log_file.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.log_file, 'a') as f:
+                f.write(json.dumps({'sql': sql, 'timestamp': datetime.now().isoformat()}) + '\n')
+        except OSError as e:
+            print(f"⚠️ Could not log query: {e}")
+
+    def history(self) -> List[str]:
+        """Logged queries plus good and corrected SQL from feedback"""
+        queries = []
+        if self.log_file.exists():
+            with open(self.log_file, 'r') as f:
+                for line in f:
+                    try:
+                        queries.append(json.loads(line)['sql'])
+                    except (ValueError, KeyError):
+                        continue
+        queries.extend((self.feedback_store or get_feedback_store()).verified_sql(self.database))
+        return queries
+
+    # ----- Parsing -----
+
+    def _columns(self) -> Dict[str, Set[str]]:
+        return {table: {c.lower() for c in self.db.get_columns(table)} for table in self.db.get_tables()}
+
+    def predicate_columns(self, sql: str, columns: Optional[Dict[str, Set[str]]] = None) -> List[Tuple[str, str]]:
+        """(table, column) pairs compared in WHERE / ON / HAVING clauses of a query"""
+        columns = columns if columns is not None else self._columns()
+        aliases = table_aliases(sql, list(columns))
+        text = STRING_LITERAL.sub("''", sql)
+        # Skip the select list: comparisons there do not filter rows
+        start = re.search(r"\bfrom\b", text, re.IGNORECASE)
+        text = text[start.start():] if start else text
+
+        found = []
+        for match in QUALIFIED.finditer(text):
+            table = aliases.get(match.group(1).lower())
+            column = match.group(2).lower()
+            if table and column in columns.get(table, ()):
+                before, after = text[:match.start()].rstrip(), text[match.end():].lstrip()
+                if re.search(rf"{COMPARISON}\s*$", before, re.IGNORECASE) or \
+                        re.match(COMPARISON, after, re.IGNORECASE):
+                    found.append((table, column))
+
+        # Unqualified columns, when exactly one queried table has them
+        queried = set(aliases.values()) & {t for t in columns if re.search(rf"\b{re.escape(t)}\b", text, re.I)}
+        for match in re.finditer(rf"(?<![.\w`\"])[`\"]?(\w+)[`\"]?\s*{COMPARISON}", text, re.IGNORECASE):
+            owners = [t for t in queried if match.group(1).lower() in columns[t]]
+            if len(owners) == 1:
+                found.append((owners[0], match.group(1).lower()))
+        return found
+
+    def existing_indexes(self) -> Set[Tuple[str, str]]:
+        """(table, column) pairs already served by an index's leading column or the primary key"""
+        covered = set()
+        cursor = self.db.conn.cursor()
+        for table in self.db.get_tables():
+            if self.db.db_type == 'mysql':
+                cursor.execute(f"SHOW INDEX FROM `{table}`")
+                names = [d[0] for d in cursor.description]
+                for row in cursor.fetchall():
+                    entry = dict(zip(names, row))
+                    if int(entry['Seq_in_index']) == 1:
+                        covered.add((table, entry['Column_name'].lower()))
+            else:
+                cursor.execute(f'PRAGMA table_info("{table}")')
+                covered.update((table, row[1].lower()) for row in cursor.fetchall() if row[5] == 1)
+                cursor.execute(f'PRAGMA index_list("{table}")')
+                for index in cursor.fetchall():
+                    cursor.execute(f'PRAGMA index_info("{index[1]}")')
+                    info = cursor.fetchall()
+                    if info:
+                        covered.add((table, info[0][2].lower()))
+        cursor.close()
+        return covered
+
+    def foreign_key_columns(self) -> Set[Tuple[str, str]]:
+        pattern = re.compile(r"FOREIGN\s+KEY\s*\(\s*[`\"]?(\w+)", re.IGNORECASE)
+        return {(table, column.lower()) for table, statement in self.db.get_table_ddl().items()
+                for column in pattern.findall(statement or '')}
+
+    # ----- Recommendations -----
+
+    def recommend(self, queries: Optional[Iterable[str]] = None, min_uses: int = 2) -> List[IndexRecommendation]:
+        """Unindexed columns filtered or joined on at least min_uses times, plus foreign keys"""
+        columns = self._columns()
+        queries = self.history() if queries is None else queries
+        counts = Counter()
+        for sql in queries:
+            counts.update(set(self.predicate_columns(sql, columns)))
+
+        covered = self.existing_indexes()
+        foreign_keys = self.foreign_key_columns()
+        recommendations = []
+        for (table, column), uses in counts.most_common():
+            if (table, column) not in covered and (uses >= min_uses or (table, column) in foreign_keys):
+                reason = 'foreign key' if (table, column) in foreign_keys else 'filter'
+                recommendations.append(IndexRecommendation(table, column, uses, reason))
+        for table, column in sorted(foreign_keys - covered - set(counts)):
+            recommendations.append(IndexRecommendation(table, column, 0, 'foreign key'))
+        return recommendations
+
+    def _index_column(self, table: str, column: str) -> str:
+        """Column expression for CREATE INDEX (MySQL needs a prefix length on TEXT columns)"""
+        if self.db.db_type == 'mysql':
+            types = {row[1].lower(): str(row[2]).lower() for row in self.db.get_table_info(table)}
+            if any(t in types.get(column, '') for t in ('text', 'blob')):
+                return f"`{column}`(255)"
+            return f"`{column}`"
+        return f'"{column}"'
+
+    def _replay(self, queries: List[str]) -> float:
+        """Seconds to run the queries (best of two runs each, after an untimed warm-up run)"""
+        total = 0.0
+        cursor = self.db.conn.cursor()
+        for sql in queries:
+            best = float('inf')
+            for run in range(3):
+                start = time.perf_counter()
+                try:
+                    cursor.execute(sql)
+                    cursor.fetchall()
+                except Exception:
+                    break
+                if run:
+                    best = min(best, time.perf_counter() - start)
+            total += best if best != float('inf') else 0.0
+        cursor.close()
+        return total
+
+    def _index_exists(self, table: str, name: str) -> bool:
+        cursor = self.db.conn.cursor()
+        if self.db.db_type == 'mysql':
+            cursor.execute("SELECT 1 FROM information_schema.STATISTICS WHERE TABLE_SCHEMA = DATABASE() "
+                           "AND TABLE_NAME = %s AND INDEX_NAME = %s LIMIT 1", (table, name))
+        else:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?", (name,))
+        exists = cursor.fetchone() is not None
+        cursor.close()
+        return exists
+
+    def _analyze(self, tables: List[str]):
+        cursor = self.db.conn.cursor()
+        if self.db.db_type == 'mysql':
+            for table in tables:
+                cursor.execute(f"ANALYZE TABLE `{table}`")
+                cursor.fetchall()
+        else:
+            cursor.execute("ANALYZE")
+        cursor.close()
+        self.db.conn.commit()
+
+    def create(self, recommendations: List[IndexRecommendation], queries: Optional[List[str]] = None,
+               validate: bool = True) -> List[str]:
+        """Create the recommended indexes and refresh planner statistics
+
+        With validate, up to VALIDATE_SAMPLE logged queries using each column are
+        replayed before and after its index is created, and the index is dropped
+        again if they got slower (e.g. a wide range scan now doing random lookups).
+        """
+        queries = [q for q in (self.history() if queries is None else queries) if is_cacheable(q)]
+        columns = self._columns()
+        created = []
+        cursor = self.db.conn.cursor()
+        for rec in recommendations:
+            table, name = self.db.quote(rec.table), self.db.quote(rec.name)
+            if self._index_exists(rec.table, rec.name):
+                print(f"📇 {rec.name} already exists")
+                continue
+            # MySQL has no CREATE INDEX IF NOT EXISTS; the check above covers it
+            exists_clause = "" if self.db.db_type == 'mysql' else "IF NOT EXISTS "
+            statement = f"CREATE INDEX {exists_clause}{name} ON {table} ({self._index_column(rec.table, rec.column)})"
+            sample = [q for q in queries if (rec.table, rec.column) in self.predicate_columns(q, columns)]
+            sample = sample[:VALIDATE_SAMPLE] if validate else []
+            before = self._replay(sample) if sample else 0.0
+            try:
+                cursor.execute(statement)
+                self.db.conn.commit()
+            except Exception as e:
+                print(f"⚠️ Could not create index {rec.name}: {e}")
+                continue
+
+            if sample:
+                self._analyze([rec.table])
+                after = self._replay(sample)
+                if after > before * REGRESSION_FACTOR and after - before > REGRESSION_MIN_S:
+                    cursor.execute(f"DROP INDEX {name}" + (f" ON {table}" if self.db.db_type == 'mysql' else ""))
+                    self.db.conn.commit()
+                    print(f"↩️ Dropped {rec.name}: its queries got slower ({before * 1000:.1f} -> {after * 1000:.1f} ms)")
+                    continue
+            created.append(statement)
+            print(f"📇 {statement}")
+
+        if created:
+            self._analyze(sorted({rec.table for rec in recommendations}))
+            self.db.bump_version()
+        cursor.close()
+        return created
+
+    def display(self, recommendations: List[IndexRecommendation]):
+        if not recommendations:
+            print("📇 No index recommendations")
+            return
+        print(f"\n📇 {len(recommendations)} index recommendations:")
+        for rec in recommendations:
+            print(f"   {rec.table}.{rec.column} ({rec.reason}, used in {rec.uses} queries)")
@@ -0,0 +1,207 @@
+"""Append rows from a new document to an existing database
+
+    rows = SchemaGenerator(key, model).generate_rows(text, db.get_schema_context())
+    inserted = append_rows(db, rows)          # table -> the rows as stored
+    SchemaEmbeddings(db).add_rows(inserted)
+
+The extractor sees the existing schema and returns rows only, never DDL.
+Rows go in through DatabaseManager.bulk_load, referenced tables before the
+tables pointing at them. A foreign key given as a lookup object
+({"name": "John Smith"}) becomes the id of the matching row, whether it was
+stored before or arrived with this document. Rows of referenced tables that
+are already stored are not inserted twice. Both lookups are batched, a query
+per table and MATCH_CHUNK values, so the work done follows the new document.
+"""
+
+import re
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+FOREIGN_KEY = re.compile(
+    r"FOREIGN\s+KEY\s*\(\s*[`\"]?(\w+)[`\"]?\s*\)\s*REFERENCES\s+[`\"]?(\w+)[`\"]?\s*\(\s*[`\"]?(\w+)[`\"]?\s*\)",
+    re.IGNORECASE,
+)
+INLINE_REFERENCE = re.compile(
+    r"(?:^|[(,])\s*[`\"]?(\w+)[`\"]?\s+\w+[^,]*?\bREFERENCES\s+[`\"]?(\w+)[`\"]?\s*\(\s*[`\"]?(\w+)[`\"]?\s*\)",
+    re.IGNORECASE,
+)
+MATCH_CHUNK = 500  # Values per IN list in a batched lookup (well under SQLite's variable limit)
+
+
+def foreign_keys(ddl: str) -> Dict[str, Tuple[str, str]]:
+    """column -> (referenced table, referenced column) from a CREATE TABLE statement"""
+    keys = {column: (table, target) for column, table, target in INLINE_REFERENCE.findall(ddl)
+            if column.upper() != 'FOREIGN'}
+    keys.update({column: (table, target) for column, table, target in FOREIGN_KEY.findall(ddl)})
+    return keys
+
+
+def load_order(tables: List[str], references: Dict[str, Dict[str, Tuple[str, str]]]) -> List[str]:
+    """Tables with the ones they reference first (cycles keep the given order)"""
+    ordered, visiting = [], set()
+
+    def visit(table: str):
+        if table in ordered or table in visiting:
+            return
+        visiting.add(table)
+        for parent, _ in references.get(table, {}).values():
+            if parent in tables:
+                visit(parent)
+        visiting.discard(table)
+        ordered.append(table)
+
+    for table in tables:
+        visit(table)
+    return ordered
+
+
+def _comparable(value):
+    """A value as SQL compares it, so stored and extracted values agree (25, 25.0 and '25')"""
+    if value is None or (isinstance(value, float) and value != value):
+        return None
+    if isinstance(value, (int, float, Decimal)):
+        return str(int(value)) if value == int(value) else repr(float(value))
+    return str(value)
+
+
+def _match_key(match: Dict) -> Tuple:
+    return tuple(sorted((column, _comparable(value)) for column, value in match.items()))
+
+
+def _find_all(db, table: str, matches: List[Dict], column: str = 'id') -> Dict[Tuple, object]:
+    """column of the first stored row equal to each match, keyed by _match_key
+
+    Matches with the same columns share a query, one per MATCH_CHUNK values of
+    their first column; the other columns are compared on the returned rows.
+    NULL matches NULL.
+    """
+    groups: Dict[Tuple[str, ...], List[Dict]] = {}
+    for match in matches:
+        groups.setdefault(tuple(sorted(match)), []).append(match)
+    marker = '%s' if db.db_type == 'mysql' else '?'
+
+    found = {}
+    for columns, group in groups.items():
+        wanted = {_match_key(match) for match in group}
+        first = db.quote(columns[0])
+        values = list(dict.fromkeys(match[columns[0]] for match in group if match[columns[0]] is not None))
+        select = (f"SELECT {db.quote(column)}, {', '.join(db.quote(c) for c in columns)} "
+                  f"FROM {db.quote(table)} WHERE ")
+        queries = [(f"{first} IN ({', '.join([marker] * len(chunk))})", tuple(chunk))
+                   for chunk in (values[i:i + MATCH_CHUNK] for i in range(0, len(values), MATCH_CHUNK))]
+        if len(values) < len(group) and any(match[columns[0]] is None for match in group):
+            queries.append((f"{first} IS NULL", ()))
+
+        with db.lock:
+            cursor = db.conn.cursor()
+            for where, params in queries:
+                cursor.execute(select + where, params)
+                for row in cursor.fetchall():
+                    key = tuple(zip(columns, map(_comparable, row[1:])))
+                    if key in wanted:
+                        found.setdefault(key, row[0])
+            cursor.close()
+    return found
+
+
+def _max_id(db, table: str) -> Optional[int]:
+    with db.lock:
+        cursor = db.conn.cursor()
+        cursor.execute(f"SELECT MAX({db.quote('id')}) FROM {db.quote(table)}")
+        row = cursor.fetchone()
+        cursor.close()
+    return row[0] if row else None
+
+
+def append_frame(db, table: str, frame: 'pd.DataFrame') -> 'pd.DataFrame':
+    """Insert a DataFrame's rows into a table; returns them as stored (ids included)
+
+    Columns an existing table lacks are dropped. Values come back as Python
+    objects, like the rows an inventory scan reads.
+    """
+    import pandas as pd
+
+    existing = db.get_columns(table) if table in db.get_tables() else None
+    if existing is not None:
+        frame = frame[[c for c in frame.columns if c in existing and c != 'id']]
+    has_id = existing is None or 'id' in existing
+    before = _max_id(db, table) if existing is not None and has_id else None
+    db.bulk_load(table, frame)
+    if not has_id:
+        return frame.astype(object).where(frame.notna(), None)
+
+    with db.lock:
+        cursor = db.conn.cursor()
+        marker = '%s' if db.db_type == 'mysql' else '?'
+        cursor.execute(f"SELECT * FROM {db.quote(table)} WHERE {db.quote('id')} > {marker}", (before or 0,))
+        columns = [d[0] for d in cursor.description]
+        rows = cursor.fetchall()
+        cursor.close()
+    return pd.DataFrame(rows, columns=columns, dtype=object)
+
+
+def append_rows(db, rows: Dict[str, List[Dict]]) -> Dict[str, 'pd.DataFrame']:
+    """Insert extracted rows ({table: [{column: value}]}) into existing tables
+
+    Unknown tables and columns are skipped and id primary keys are assigned
+    on insert. Returns the stored rows of each table.
+    """
+    import pandas as pd
+
+    ddl = db.get_table_ddl()
+    references = {table: foreign_keys(statement) for table, statement in ddl.items()}
+    referenced = {parent for keys in references.values() for parent, _ in keys.values()}
+    inserted = {}
+
+    for table in load_order([t for t in rows if t in ddl], references):
+        columns = db.get_columns(table)
+        keys = references.get(table, {})
+        records = []
+        lookups: Dict[Tuple[str, str], List[Dict]] = {}  # (table, column) referenced -> lookup objects
+
+        for row in rows[table]:
+            record = {}
+            for column, value in row.items():
+                if column not in columns or column == 'id':
+                    continue
+                if isinstance(value, dict) and column in keys:
+                    # Lookup of the referenced row by its identifying columns, resolved below
+                    value = {c: v for c, v in value.items() if not isinstance(v, (dict, list))}
+                    lookups.setdefault(keys[column], []).append(value)
+                elif isinstance(value, (dict, list)):
+                    continue
+                record[column] = value
+            if record:
+                records.append(record)
+
+        # One batched query per referenced table instead of one per row
+        found = {reference: _find_all(db, reference[0], [match for match in matches if match], reference[1])
+                 for reference, matches in lookups.items()}
+        unresolved = set()
+        for record in records:
+            for column in [c for c, value in record.items() if isinstance(value, dict)]:
+                key = _match_key(record[column])
+                record[column] = found[keys[column]].get(key)
+                if record[column] is None:
+                    unresolved.add((keys[column], key))
+
+        skipped = 0
+        if table in referenced and records:
+            stored = _find_all(db, table, records)
+            kept = [record for record in records if _match_key(record) not in stored]
+            skipped, records = len(records) - len(kept), kept  # Entities already stored (e.g. returning customers)
+
+        if records:
+            frame = pd.DataFrame(records, columns=[c for c in columns if any(c in r for r in records)])
+            inserted[table] = append_frame(db, table, frame)
+        note = f", {skipped} already stored" if skipped else ""
+        note += f", {len(unresolved)} references not found" if unresolved else ""
+        print(f"📥 Appended {len(records)} rows to {table}{note}")
+
+    for table in rows:
+        if table not in ddl:
+            print(f"⚠️ Skipped rows for unknown table {table}")
+    return inserted
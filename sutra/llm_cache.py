@@ -0,0 +1,205 @@
+"""Content-addressed cache for LLM responses"""
+
+import hashlib
+import json
+import os
+import threading
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Optional
+import config
+from sutra.metrics import metrics
+
+# Eviction trims the cache to this fraction of max_entries, so it runs once per many puts
+EVICT_TO = 0.9
+
+
+class LLMCacheMiss(Exception):
+    """Raised in replay mode when a prompt has no recorded response"""
+
+
+class LLMResponseCache:
+    """Persistent LLM response cache keyed by a hash of model, temperature and prompt
+
+    Modes:
+        off       - never read or write the cache
+        readwrite - serve deterministic (temperature 0) prompts from cache, record new ones
+        record    - always call the API and record every response
+        replay    - serve only from cache and never call the API (offline, deterministic runs)
+    """
+
+    MODES = ('off', 'readwrite', 'record', 'replay')
+
+    def __init__(self, cache_dir: Optional[Path] = None, mode: Optional[str] = None,
+                 max_entries: Optional[int] = None):
+        self.cache_dir = Path(cache_dir or config.LLM_CACHE_DIR)
+        self.mode = (mode or config.LLM_CACHE_MODE).lower()
+        if self.mode not in self.MODES:
+            raise ValueError(f"Unknown LLM cache mode '{self.mode}', expected one of {self.MODES}")
+        self.max_entries = config.LLM_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: Optional[int] = None  # Entry count, scanned once then kept up to date
+        self._lock = threading.Lock()
+
+        if self.mode != 'off':
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def make_key(model: str, temperature: float, prompt: str) -> str:
+        """Content address of a request"""
+        payload = json.dumps(
+            {'model': model, 'temperature': float(temperature), 'prompt': prompt},
+            sort_keys=True
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def get(self, model: str, temperature: float, prompt: str) -> Optional[str]:
+        """Return the recorded response for a request, if any"""
+        path = self._path(self.make_key(model, temperature, prompt))
+        try:
+            with open(path, 'r') as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Could not read LLM cache entry: {e}")
+            self.misses += 1
+            return None
+
+        # Touch the file so eviction treats it as recently used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        self.hits += 1
+        return entry['response']
+
+    def put(self, model: str, temperature: float, prompt: str, response: str):
+        """Record a response and evict the least recently used entries over the cap"""
+        path = self._path(self.make_key(model, temperature, prompt))
+        entry = {
+            'model': model,
+            'temperature': float(temperature),
+            'prompt': prompt,
+            'response': response,
+            'timestamp': datetime.now().isoformat()
+        }
+
+        try:
+            # Write then rename so concurrent readers never see a partial entry
+            existed = path.exists()
+            tmp_path = path.with_suffix(f".{os.getpid()}.{uuid.uuid4().hex}.tmp")
+            with open(tmp_path, 'w') as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"⚠️ Could not save LLM cache entry: {e}")
+            return
+
+        if not self.max_entries:
+            return
+        with self._lock:
+            if self._entries is None:
+                self._entries = sum(1 for _ in self.cache_dir.glob('*.json'))
+            elif not existed:
+                self._entries += 1
+            if self._entries > self.max_entries:
+                self._evict()
+
+    def _evict(self):
+        """Drop least recently used entries down to EVICT_TO of max_entries
+
+        Other processes sharing the directory are counted by this scan, so the
+        running count is corrected here.
+        """
+        entries = list(self.cache_dir.glob('*.json'))
+        keep = int(self.max_entries * EVICT_TO)
+        excess = len(entries) - keep
+
+        def last_used(path: Path) -> float:
+            try:
+                return path.stat().st_mtime
+            except OSError:
+                return 0.0
+
+        if excess > 0:
+            entries.sort(key=last_used)
+            for path in entries[:excess]:
+                path.unlink(missing_ok=True)
+        self._entries = min(len(entries), keep)
+
+    def complete(self, model: str, prompt: str, temperature: float,
+                 call_api: Callable[[], str]) -> str:
+        """Return a response for the request, calling the API only when needed"""
+        if self.mode == 'off':
+            return call_api()
+
+        if self.mode == 'replay':
+            cached = self.get(model, temperature, prompt)
+            if cached is None:
+                raise LLMCacheMiss(f"No recorded LLM response for prompt ({len(prompt)} chars) in replay mode")
+            return cached
+
+        deterministic = float(temperature) == 0.0
+        if self.mode == 'readwrite' and deterministic:
+            cached = self.get(model, temperature, prompt)
+            metrics.outcome('llm_cache', 'hit' if cached is not None else 'miss')
+            if cached is not None:
+                print("💾 Using cached LLM response")
+                return cached
+
+        response = call_api()
+        if self.mode == 'record' or deterministic:
+            self.put(model, temperature, prompt, response)
+        return response
+
+    def clear(self):
+        """Remove all recorded responses"""
+        if self.cache_dir.exists():
+            for path in self.cache_dir.glob('*.json'):
+                path.unlink(missing_ok=True)
+        with self._lock:
+            self._entries = None
+        print("🗑️ LLM cache cleared")
+
+
+_default_cache: Optional[LLMResponseCache] = None
+_completion_backend: Optional[Callable[[str, str, float], str]] = None
+
+
+def get_llm_cache() -> LLMResponseCache:
+    """Shared process-wide response cache"""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = LLMResponseCache()
+    return _default_cache
+
+
+def set_completion_backend(backend: Optional[Callable[[str, str, float], str]]):
+    """Send API calls to backend(model, prompt, temperature) instead of OpenAI
+    (e.g. a deterministic stub in benchmarks); None restores OpenAI"""
+    global _completion_backend
+    _completion_backend = backend
+
+
+def chat_completion(model: str, prompt: str, temperature: float = 0.0, priority: str = 'interactive') -> str:
+    """Single-prompt chat completion served through the response cache
+    
+    API calls go through the shared LLMClient (rate limits, retries);
+    priority is 'interactive' for questions or 'batch' for bulk work.
+    """
+
+    def call_api() -> str:
+        if _completion_backend is not None:
+            return _completion_backend(model, prompt, temperature)
+        from sutra.llm_client import get_llm_client
+        return get_llm_client().complete(model, prompt, temperature, priority=priority)
+
+    return get_llm_cache().complete(model, prompt, temperature, call_api)
@@ -0,0 +1,262 @@
+"""Shared LLM client with rate limiting, priorities, retries and token accounting
+
+    client = get_llm_client()
+    sql = client.complete('gpt-4', prompt, 0.0, priority=INTERACTIVE)
+
+Every chat completion in the process goes through one client talking to an
+OpenAI-compatible endpoint (config.LLM_API_BASE, which can be a local mock
+server). Calls wait in a priority queue, with interactive questions ahead of
+batch work such as schema generation. A call starts once a concurrency slot is
+free and the requests-per-minute and tokens-per-minute buckets allow it.
+Batch calls never take the last slot. Rate-limit (429) and server errors are
+retried with exponential backoff and jitter, honouring Retry-After, and a 429
+pauses every queued call rather than only the one that got it.
+"""
+
+import itertools
+import random
+import threading
+import time
+from typing import Dict, Optional, Tuple
+import config
+from sutra.metrics import metrics
+
+INTERACTIVE = 'interactive'
+BATCH = 'batch'
+PRIORITIES = {INTERACTIVE: 0, BATCH: 1}  # Lower goes first
+
+# Prompt size estimate until the response reports real usage
+CHARS_PER_TOKEN = 4
+RETRY_STATUS = {408, 409, 429, 500, 502, 503, 504}
+MAX_BACKOFF_S = 60.0
+
+
+class LLMError(Exception):
+    """Raised when a completion fails for good (rejected request or retries used up)"""
+
+
+class _Retryable(Exception):
+    def __init__(self, message: str, retry_after: Optional[float] = None, rate_limited: bool = False):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.rate_limited = rate_limited
+
+
+class TokenBucket:
+    """Allowance of per_minute units refilled continuously (0: unlimited)
+    
+    At most window_s seconds' worth can be spent at once; providers may
+    enforce a per-minute limit over shorter windows.
+    """
+
+    def __init__(self, per_minute: float, window_s: float = 60.0):
+        self.rate = per_minute / 60.0
+        self.capacity = self.rate * window_s
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, amount: float, now: float) -> float:
+        """Seconds until amount is available (more than a full bucket waits for a full bucket)"""
+        if not self.rate:
+            return 0.0
+        self._refill(now)
+        return max(0.0, (min(amount, self.capacity) - self.level) / self.rate)
+
+    def take(self, amount: float, now: float):
+        """Spend amount (negative gives it back); the level may drop below zero"""
+        if self.rate:
+            self._refill(now)
+            self.level = min(self.capacity, self.level - amount)
+
+
+def _retry_after(response) -> Optional[float]:
+    """Server-suggested delay from Retry-After / retry-after-ms headers"""
+    for header, scale in (('retry-after-ms', 0.001), ('retry-after', 1.0)):
+        value = response.headers.get(header)
+        if value:
+            try:
+                return max(0.0, float(value) * scale)
+            except ValueError:
+                pass  # HTTP-date form: fall back to backoff
+    return None
+
+
+class LLMClient:
+    """Priority-scheduled, rate-limited chat completions with retries"""
+
+    def __init__(self, base_url: Optional[str] = None, api_key: Optional[str] = None,
+                 requests_per_min: Optional[int] = None, tokens_per_min: Optional[int] = None,
+                 max_concurrency: Optional[int] = None, max_retries: Optional[int] = None,
+                 backoff_s: Optional[float] = None, timeout: Optional[float] = None,
+                 window_s: Optional[float] = None):
+        self.base_url = (base_url or config.LLM_API_BASE).rstrip('/')
+        self.api_key = api_key
+        self.max_concurrency = max(1, max_concurrency or config.LLM_MAX_CONCURRENCY)
+        self.max_retries = config.LLM_MAX_RETRIES if max_retries is None else max_retries
+        self.backoff_s = config.LLM_BACKOFF_S if backoff_s is None else backoff_s
+        self.timeout = timeout or config.LLM_TIMEOUT_S
+        self.completion_tokens = config.LLM_COMPLETION_TOKENS
+        window_s = window_s or config.LLM_RATE_WINDOW_S
+        self.requests = TokenBucket(config.LLM_REQUESTS_PER_MIN if requests_per_min is None else requests_per_min,
+                                    window_s)
+        self.tokens = TokenBucket(config.LLM_TOKENS_PER_MIN if tokens_per_min is None else tokens_per_min, window_s)
+
+        self._cond = threading.Condition()
+        self._waiting = []  # (rank, arrival, priority) of queued calls
+        self._arrivals = itertools.count()
+        self._running = {priority: 0 for priority in PRIORITIES}
+        self._paused_until = 0.0
+
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+        self.prompt_tokens = 0
+        self.response_tokens = 0
+
+    # ----- Scheduling -----
+
+    def _has_slot(self, priority: str) -> bool:
+        if sum(self._running.values()) >= self.max_concurrency:
+            return False
+        # Batch work leaves one slot for interactive calls
+        return priority == INTERACTIVE or self._running[BATCH] < max(1, self.max_concurrency - 1)
+
+    def _acquire(self, priority: str, estimate: int):
+        """Block until this call's turn: first in priority order with a free slot, within the rate limits"""
+        entry = (PRIORITIES[priority], next(self._arrivals), priority)
+        with self._cond:
+            self._waiting.append(entry)
+            try:
+                while True:
+                    turn = min((e for e in self._waiting if self._has_slot(e[2])), default=None)
+                    if turn != entry:
+                        self._cond.wait(1.0)
+                        continue
+                    now = time.monotonic()
+                    delay = max(self._paused_until - now, self.requests.delay(1, now),
+                                self.tokens.delay(estimate, now))
+                    if delay > 0:
+                        self._cond.wait(delay)
+                        continue
+                    self.requests.take(1, now)
+                    self.tokens.take(estimate, now)
+                    self._running[priority] += 1
+                    return
+            finally:
+                self._waiting.remove(entry)
+                self._cond.notify_all()
+
+    def _release(self, priority: str, estimate: int, used: Optional[int]):
+        with self._cond:
+            self._running[priority] -= 1
+            if used is not None:
+                self.tokens.take(used - estimate, time.monotonic())  # Settle the estimate against real usage
+            self._cond.notify_all()
+
+    def _pause(self, seconds: float):
+        """Hold every queued call (the provider said we are over its limit)"""
+        with self._cond:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    # ----- Calls -----
+
+    def _post(self, model: str, prompt: str, temperature: float) -> Tuple[str, Dict]:
+        import requests
+
+        api_key = self.api_key or config.OPENAI_API_KEY
+        try:
+            response = requests.post(
+                f"{self.base_url}/chat/completions",
+                json={'model': model, 'messages': [{'role': 'user', 'content': prompt}],
+                      'temperature': temperature},
+                headers={'Authorization': f"Bearer {api_key}"} if api_key else {},
+                timeout=self.timeout,
+            )
+        except (requests.ConnectionError, requests.Timeout) as e:
+            raise _Retryable(type(e).__name__)  # Connection refused / reset, or no answer in time
+
+        if response.status_code in RETRY_STATUS:
+            raise _Retryable(f"HTTP {response.status_code}", _retry_after(response), response.status_code == 429)
+        if response.status_code >= 400:
+            raise LLMError(f"HTTP {response.status_code}: {response.text[:300]}")
+        body = response.json()
+        return body['choices'][0]['message']['content'], body.get('usage') or {}
+
+    def complete(self, model: str, prompt: str, temperature: float = 0.0, priority: str = INTERACTIVE) -> str:
+        """Response text for a single-prompt chat completion"""
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown LLM priority '{priority}', expected one of {tuple(PRIORITIES)}")
+        estimate = len(prompt) // CHARS_PER_TOKEN + self.completion_tokens
+
+        for attempt in range(self.max_retries + 1):
+            with metrics.stage(f'llm_queue_{priority}'):
+                self._acquire(priority, estimate)
+            start = time.perf_counter()
+            usage = None
+            try:
+                text, usage = self._post(model, prompt, temperature)
+            except _Retryable as e:
+                error = e
+            except Exception:
+                with self._cond:
+                    self.failures += 1
+                metrics.outcome('llm_call', 'failed')
+                raise
+            finally:
+                used = usage.get('total_tokens') if usage else None
+                self._release(priority, estimate, used)
+
+            if usage is not None:
+                metrics.record('llm_api', time.perf_counter() - start)
+                metrics.outcome('llm_call', 'ok' if attempt == 0 else 'retried')
+                prompt_tokens = usage.get('prompt_tokens', len(prompt) // CHARS_PER_TOKEN)
+                response_tokens = usage.get('completion_tokens', len(text) // CHARS_PER_TOKEN)
+                with self._cond:
+                    self.calls += 1
+                    self.prompt_tokens += prompt_tokens
+                    self.response_tokens += response_tokens
+                metrics.count('llm_prompt_tokens', prompt_tokens)
+                metrics.count('llm_completion_tokens', response_tokens)
+                return text
+
+            if attempt == self.max_retries:
+                break
+            delay = error.retry_after
+            if delay is None:
+                delay = min(MAX_BACKOFF_S, self.backoff_s * 2 ** attempt) * random.uniform(0.5, 1.0)
+            with self._cond:
+                self.retries += 1
+            metrics.count('llm_retries')
+            print(f"⏳ LLM call failed ({error}), retrying in {delay:.1f}s")
+            if error.rate_limited:
+                self._pause(delay)  # Waits in the queue with everyone else
+            else:
+                time.sleep(delay)
+
+        with self._cond:
+            self.failures += 1
+        metrics.outcome('llm_call', 'failed')
+        raise LLMError(f"LLM call failed after {self.max_retries + 1} attempts: {error}")
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            return {'calls': self.calls, 'retries': self.retries, 'failures': self.failures,
+                    'prompt_tokens': self.prompt_tokens, 'completion_tokens': self.response_tokens,
+                    'queued': len(self._waiting), 'running': sum(self._running.values())}
+
+
+_client: Optional[LLMClient] = None
+_client_lock = threading.Lock()
+
+
+def get_llm_client() -> LLMClient:
+    """Shared process-wide client"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = LLMClient()
+        return _client
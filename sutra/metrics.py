@@ -0,0 +1,213 @@
+"""Lightweight per-stage timing, counters and traces for the question pipeline
+
+    from sutra.metrics import metrics
+
+    with metrics.trace('question'):
+        with metrics.stage('llm'):
+            ...
+        metrics.outcome('cache', 'miss')
+        metrics.count('llm_prompt_tokens', 812)
+
+Stage durations, outcomes and counters are aggregated process-wide (thread-safe) and can
+be exported as Prometheus text, written per trace as JSON lines, or printed as
+a summary table.
+"""
+
+import contextvars
+import functools
+import json
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# Recent durations kept per stage for percentiles
+WINDOW = 1000
+
+_current_trace = contextvars.ContextVar('sutra_trace', default=None)
+
+
+class StageStats:
+    __slots__ = ('count', 'total', 'min', 'max', 'recent')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = float('inf')
+        self.max = 0.0
+        self.recent = deque(maxlen=WINDOW)
+
+    def add(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+        self.recent.append(seconds)
+
+    def percentile(self, q: float) -> float:
+        if not self.recent:
+            return 0.0
+        ordered = sorted(self.recent)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class Metrics:
+    """Process-wide registry of stage timings and outcome counters"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stages: Dict[str, StageStats] = defaultdict(StageStats)
+        self.outcomes: Dict[Tuple[str, str], int] = defaultdict(int)
+        self.counters: Dict[str, float] = defaultdict(float)
+        self.jsonl_path: Optional[Path] = None
+
+    # ----- Recording -----
+
+    def record(self, name: str, seconds: float):
+        with self._lock:
+            self.stages[name].add(seconds)
+        trace = _current_trace.get()
+        if trace is not None:
+            trace['stages'].append({'stage': name, 'ms': round(seconds * 1000, 3)})
+
+    def outcome(self, kind: str, result: str):
+        """Count an outcome, e.g. outcome('cache', 'hit')"""
+        with self._lock:
+            self.outcomes[(kind, result)] += 1
+        trace = _current_trace.get()
+        if trace is not None:
+            trace['outcomes'][kind] = result
+
+    def count(self, name: str, amount: float = 1):
+        """Add to a counter, e.g. count('llm_prompt_tokens', 812)"""
+        with self._lock:
+            self.counters[name] += amount
+        trace = _current_trace.get()
+        if trace is not None:
+            counters = trace.setdefault('counters', {})
+            counters[name] = counters.get(name, 0) + amount
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time a block as one stage"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def timed(self, name: Optional[str] = None):
+        """Decorator timing every call of a function as a stage"""
+        def decorator(func):
+            stage_name = name or func.__qualname__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.stage(stage_name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    @contextmanager
+    def trace(self, name: str, **attributes):
+        """Group the stages of one request; written as a JSON line when jsonl_path is set
+        
+        Inside an active trace (e.g. a service request around process_question)
+        the outer trace is reused, so its stages are collected in one place.
+        """
+        outer = _current_trace.get()
+        if outer is not None:
+            outer.update(attributes)
+            with self.stage(name):
+                yield outer
+            return
+        trace = {'trace': name, 'timestamp': datetime.now().isoformat(), **attributes,
+                 'stages': [], 'outcomes': {}}
+        token = _current_trace.set(trace)
+        start = time.perf_counter()
+        try:
+            yield trace
+        finally:
+            _current_trace.reset(token)
+            elapsed = time.perf_counter() - start
+            trace['total_ms'] = round(elapsed * 1000, 3)
+            self.record(name, elapsed)
+            if self.jsonl_path:
+                self._write_trace(trace)
+
+    def _write_trace(self, trace: dict):
+        try:
+            with self._lock:
+                self.jsonl_path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.jsonl_path, 'a') as f:
+                    f.write(json.dumps(trace) + '\n')
+        except OSError as e:
+            print(f"⚠️ Could not write metrics: {e}")
+
+    # ----- Export -----
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            stages = {
+                name: {'count': s.count, 'total_s': s.total, 'mean_ms': s.total / s.count * 1000,
+                       'p50_ms': s.percentile(0.5) * 1000, 'p95_ms': s.percentile(0.95) * 1000,
+                       'max_ms': s.max * 1000}
+                for name, s in self.stages.items() if s.count
+            }
+            outcomes = {f"{kind}:{result}": n for (kind, result), n in self.outcomes.items()}
+            counters = dict(self.counters)
+        return {'stages': stages, 'outcomes': outcomes, 'counters': counters}
+
+    def prometheus_text(self, prefix: str = 'sutra') -> str:
+        """Prometheus text exposition format"""
+        lines = [f"# TYPE {prefix}_stage_seconds summary"]
+        with self._lock:
+            for name, s in sorted(self.stages.items()):
+                for q in (0.5, 0.95):
+                    lines.append(f'{prefix}_stage_seconds{{stage="{name}",quantile="{q}"}} {s.percentile(q):.6f}')
+                lines.append(f'{prefix}_stage_seconds_sum{{stage="{name}"}} {s.total:.6f}')
+                lines.append(f'{prefix}_stage_seconds_count{{stage="{name}"}} {s.count}')
+            lines.append(f"# TYPE {prefix}_outcomes_total counter")
+            for (kind, result), n in sorted(self.outcomes.items()):
+                lines.append(f'{prefix}_outcomes_total{{kind="{kind}",result="{result}"}} {n}')
+            for name, value in sorted(self.counters.items()):
+                lines.append(f"# TYPE {prefix}_{name}_total counter")
+                lines.append(f"{prefix}_{name}_total {value:g}")
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path: Path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(self.prometheus_text())
+
+    def summary(self) -> str:
+        """Table of stage timings and outcome counts"""
+        from tabulate import tabulate
+        snap = self.snapshot()
+        rows = [[name, s['count'], f"{s['mean_ms']:.1f}", f"{s['p50_ms']:.1f}", f"{s['p95_ms']:.1f}",
+                 f"{s['max_ms']:.1f}", f"{s['total_s']:.2f}"]
+                for name, s in sorted(snap['stages'].items(), key=lambda item: -item[1]['total_s'])]
+        text = tabulate(rows, headers=['stage', 'count', 'mean ms', 'p50 ms', 'p95 ms', 'max ms', 'total s'],
+                        tablefmt='simple')
+        if snap['outcomes']:
+            counts: Dict[str, List[str]] = defaultdict(list)
+            for key, n in sorted(snap['outcomes'].items()):
+                kind, result = key.split(':', 1)
+                counts[kind].append(f"{result}={n}")
+            text += '\n\n' + '\n'.join(f"{kind}: {', '.join(values)}" for kind, values in counts.items())
+        if snap['counters']:
+            text += '\n\n' + '\n'.join(f"{name}: {value:g}" for name, value in sorted(snap['counters'].items()))
+        return text
+
+    def reset(self):
+        with self._lock:
+            self.stages.clear()
+            self.outcomes.clear()
+            self.counters.clear()
+
+
+# Shared registry used by every component
+metrics = Metrics()
@@ -1,58 +1,230 @@
 """NLP to SQL query processor with relevancy checking"""
 
-import pandas as pd
-from typing import Optional, Tuple
+import contextvars
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple, TYPE_CHECKING
 from tabulate import tabulate
 from sutra.cache_manager import CacheManager
-import openai
 import config
 from sutra.feedback import SimpleFeedback
 from sutra.schema_embeddings import SchemaEmbeddings
 from sutra.feedback_matcher import FeedbackMatcher
+from sutra.llm_cache import chat_completion
+from sutra.fast_path import RuleBasedSQL
+from sutra.result_cache import ResultCache, normalize_sql
+from sutra.query_guard import QueryGuard
+from sutra.index_advisor import IndexAdvisor
+from sutra.metrics import metrics
+from sutra.analytics import DUCKDB_AVAILABLE, AnalyticsEngine
+from sutra.sql_validator import InvalidSQLError, SQLValidator
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Literal values from relevance hits included in a prompt
+MAX_PROMPT_LITERALS = 10
+
+_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _speculation_pool() -> ThreadPoolExecutor:
+    """Threads for speculative LLM calls and queries, shared by all processors"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=config.SPECULATIVE_WORKERS, thread_name_prefix='speculate')
+        return _pool
 
 class NLPProcessor:
     """Process natural language questions to SQL queries"""
     
-    def __init__(self, db_manager, openai_client=None):
+    def __init__(self, db_manager, openai_client=None, database: Optional[str] = None):
         self.db = db_manager
-        self.cache = CacheManager() if config.CACHE_ENABLED else None
+        # Per-database state is named explicitly, never from the config.MYSQL_DATABASE global
+        self.database = database or getattr(db_manager, 'database', None) or config.MYSQL_DATABASE
+        self.cache = CacheManager(self.database) if config.CACHE_ENABLED else None
         self.model_name = config.MODEL_NAME
         
-        # Set the API key directly for openai 0.28.1
-        openai.api_key = config.OPENAI_API_KEY
+        # LLM calls go through sutra.llm_cache.chat_completion (cached, then sutra.llm_client over HTTP)
 
         # Added for feedback handling and tracking
-        self.feedback = SimpleFeedback()
+        self.feedback = SimpleFeedback(self.database)
         self.last_question = None
         self.last_sql = None
         
         # ✅ NEW: Auto-load schema embeddings
-        self.relevancy_checker = SchemaEmbeddings(db_manager)
+        self.relevancy_checker = SchemaEmbeddings(db_manager, self.database)
         
         # ✅ NEW: Smart feedback matcher
-        self.feedback_matcher = FeedbackMatcher()
+        self.feedback_matcher = FeedbackMatcher(self.relevancy_checker.typed_values, self.database)
+        
+        # Rule-based SQL for simple questions, tried before the LLM
+        self.fast_path = (RuleBasedSQL(db_manager, self.relevancy_checker.data_inventory)
+                          if config.FAST_PATH_ENABLED else None)
+        
+        # EXPLAIN-based cost check and statement timeout for generated SQL
+        self.guard = QueryGuard(db_manager)
+        self.last_plan = None
+        
+        # Schema check of SQL before it runs (LLM output gets one repair call)
+        self.validator = SQLValidator(db_manager) if config.SQL_VALIDATION_ENABLED else None
+        
+        # Executed queries are logged for index recommendations
+        self.index_advisor = IndexAdvisor(db_manager, database=self.database)
+        
+        # Aggregations over large tables run on columnar snapshots when DuckDB is installed
+        self.analytics = None
+        if config.ANALYTICS_ENABLED:
+            if DUCKDB_AVAILABLE:
+                self.analytics = AnalyticsEngine(db_manager)
+            else:
+                print("⚠️ duckdb not installed, analytical backend disabled. Run: pip install duckdb")
+        self._run_query = self.analytics.execute_query if self.analytics else db_manager.execute_query
+        
+        # Results of executed SQL, reused until the tables they read change
+        self.results = ResultCache(db_manager, executor=self._run_query) if config.RESULT_CACHE_ENABLED else None
+        
+        # CREATE TABLE statements, fetched once for prompt building
+        self._table_ddl: Optional[Dict[str, str]] = None
     
-    def nlp_to_sql(self, question: str) -> str:
-        """Convert natural language question to SQL"""
+    @property
+    def table_ddl(self) -> Dict[str, str]:
+        if self._table_ddl is None:
+            self._table_ddl = self.db.get_table_ddl()
+        return self._table_ddl
+    
+    def refresh_schema(self):
+        """Forget cached DDL (call after the schema changes)"""
+        self._table_ddl = None
+        if self.fast_path:
+            self.fast_path.reset()
+    
+    @staticmethod
+    def _references(statement: str, table: str) -> bool:
+        """Whether a CREATE TABLE statement has a foreign key to table"""
+        pattern = rf"REFERENCES\s+[`\"\[]?{re.escape(table)}[`\"\]]?\s*\("
+        return re.search(pattern, statement, re.IGNORECASE) is not None
+    
+    def _prompt_context(self, hits) -> Tuple[str, List[str]]:
+        """Schema of the tables involved in the relevance hits, plus the literal values matched
+        
+        Falls back to the whole schema when there are no hits.
+        """
+        ddl = self.table_ddl
+        tables = list(dict.fromkeys(hit.table for hit in hits or [] if hit.table in ddl))
+        if not tables:
+            return '\n'.join(ddl.values()), []
+        
+        # Tables the hit tables point to (lookups) and tables pointing at them (e.g. the
+        # orders of a matched customer city, which link tables joining two hit tables are too)
+        related = []
+        for table, statement in ddl.items():
+            if table in tables:
+                continue
+            referenced = any(self._references(ddl[t], table) for t in tables)
+            referencing = any(self._references(statement, t) for t in tables)
+            if referenced or referencing:
+                related.append(table)
+        
+        selected = tables + related
+        print(f"📉 Prompt schema: {len(selected)} of {len(ddl)} tables")
+        
+        literals = [f"- {hit.table}.{hit.column} = '{hit.value}'"
+                    for hit in hits if hit.value is not None and hit.column]
+        return '\n'.join(ddl[t] for t in selected), list(dict.fromkeys(literals))[:MAX_PROMPT_LITERALS]
+    
+    def nlp_to_sql(self, question: str, hits=None) -> str:
+        """Convert natural language question to SQL
+        
+        hits (from SchemaEmbeddings.is_relevant) narrow the prompt to the
+        involved tables and literal values; without them the whole schema is sent.
+        """
+        
+        # Stored values typed in the question, for re-binding query templates
+        with metrics.stage('typed_values'):
+            typed = self.relevancy_checker.typed_values(question)
+        
+        sql_query = self._local_sql(question, hits, typed)
+        if sql_query:
+            return sql_query
+        
+        # Only call API if no feedback match, no cache and no local answer
+        sql_query = self._llm_sql(question, hits)
+        
+        # Cache the result (only SQL that passed validation gets here)
+        if self.cache:
+            self.cache.add_to_cache(question, sql_query, typed)
+        
+        return sql_query
+    
+    def _local_sql(self, question: str, hits, typed, near_misses: Optional[List] = None) -> Optional[str]:
+        """SQL from verified feedback, the query cache or the rule-based fast path
+        
+        With near_misses, matches up to config.SPECULATIVE_MARGIN below the
+        reuse thresholds are appended to it as (distance below threshold, sql).
+        """
+        margin = config.SPECULATIVE_MARGIN if near_misses is not None else 0.0
         
         # ✅ NEW: Check feedback for similar queries first
-        similar_sql, similarity = self.feedback_matcher.find_similar_query(question)
+        threshold = self.feedback_matcher.similarity_threshold
+        with metrics.stage('feedback_match'):
+            similar_sql, similarity = self.feedback_matcher.find_similar_query(question, threshold - margin)
+        error = self._invalid(similar_sql) if similar_sql else None
+        if error:
+            print(f"🩺 Skipping feedback SQL that no longer validates ({error})")
+            similar_sql = None
+        if similar_sql and similarity < threshold:
+            near_misses.append((threshold - similarity, similar_sql))
+            similar_sql = None
+        metrics.outcome('feedback', 'hit' if similar_sql else 'miss')
         if similar_sql:
             print(f"🎯 Found similar query in feedback (similarity: {similarity:.2f})")
             return similar_sql
         
         # Check cache next
         if self.cache:
-            cached_sql = self.cache.get_cached_query(question)
+            threshold = self.cache.similarity_threshold
+            with metrics.stage('cache_lookup'):
+                cached_sql, similarity, from_template = self.cache.lookup(question, typed, threshold - margin)
+            error = self._invalid(cached_sql) if cached_sql else None
+            if error:
+                print(f"🩺 Dropping cached SQL that no longer validates ({error})")
+                self.cache.discard(question, typed, threshold - margin)
+                cached_sql = None
+            if cached_sql and similarity < threshold:
+                near_misses.append((threshold - similarity, cached_sql))
+                cached_sql = None
+            metrics.outcome('query_cache', 'hit' if cached_sql else 'miss')
             if cached_sql:
+                print(f"{'🧩 Found query template' if from_template else '📊 Found similar query'} "
+                      f"(similarity: {similarity:.1%})")
                 print("⚡ Using cached query")
                 return cached_sql
         
-        # Only call API if no feedback match and no cache
+        # Simple questions (list / count / aggregate / filter) are answered locally
+        if self.fast_path:
+            with metrics.stage('fast_path'):
+                local = self.fast_path.generate(question, hits)
+            answered = local is not None and local.confidence >= self.fast_path.threshold
+            metrics.outcome('fast_path', 'hit' if answered else 'miss')
+            if answered:
+                print(f"🏎️ Answered locally ({local.intent}, confidence: {local.confidence:.2f})")
+                return local.sql
+        return None
+    
+    def _generate_sql(self, question: str, hits) -> str:
+        """One LLM call for the question's SQL"""
         print("🤖 Calling OpenAI API...")
         
         # Get schema context
-        schema = self.db.get_schema_context()
+        with metrics.stage('schema_context'):
+            schema, literals = self._prompt_context(hits)
+        values_section = ""
+        if literals:
+            values_section = "\nValues from the question as stored in the database:\n" + '\n'.join(literals) + "\n"
         
         prompt = f"""
 Convert this question to a SQLite query:
@@ -61,31 +233,157 @@ Question: {question}
 
 Database schema:
 {schema}
-
+{values_section}
 Return ONLY the SELECT statement. No explanations, no markdown.
 """
         
-        # Use openai.ChatCompletion directly for version 0.28.1
-        response = openai.ChatCompletion.create(
-            model=self.model_name,
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0
-        )
+        # Deterministic prompt, so repeats are served from the LLM response cache
+        with metrics.stage('llm'):
+            sql_query = chat_completion(self.model_name, prompt, 0).strip()
+        return sql_query.replace('```sql', '').replace('```', '').strip()
+    
+    def _invalid(self, sql_query: str) -> Optional[str]:
+        """Validation error of a query, None when it passes (or validation is off)"""
+        if not self.validator:
+            return None
+        with metrics.stage('validate'):
+            return self.validator.check(sql_query)
+    
+    def _repair_sql(self, question: str, hits, sql_query: str, error: str) -> str:
+        """One LLM call fixing SQL that failed validation, given the error
+        
+        The whole schema is sent: the table the query needs may be one the
+        narrowed prompt left out.
+        """
+        print("🩹 Asking OpenAI to fix the query...")
+        schema = '\n'.join(self.table_ddl.values())
+        
+        prompt = f"""
+This SQLite query does not work on the database below.
+
+Question: {question}
+
+Query:
+{sql_query}
+
+Error: {error}
+
+Database schema:
+{schema}
+
+Return ONLY the corrected SELECT statement. No explanations, no markdown.
+"""
         
-        sql_query = response['choices'][0]['message']['content'].strip()
-        sql_query = sql_query.replace('```sql', '').replace('```', '').strip()
+        with metrics.stage('llm_repair'):
+            sql_query = chat_completion(self.model_name, prompt, 0).strip()
+        return sql_query.replace('```sql', '').replace('```', '').strip()
+    
+    def _llm_sql(self, question: str, hits) -> str:
+        """LLM SQL checked against the schema, with one repair call when it fails
         
-        # Cache the result
+        Raises InvalidSQLError when the repaired SQL fails too, so invalid SQL
+        never reaches the database or the query cache.
+        """
+        sql_query = self._generate_sql(question, hits)
+        if not self.validator:
+            return sql_query
+        
+        error = self._invalid(sql_query)
+        if error is None:
+            metrics.outcome('sql_validation', 'valid')
+            return sql_query
+        print(f"🩺 Generated SQL is invalid: {error}")
+        
+        repaired = self._repair_sql(question, hits, sql_query, error)
+        error = self._invalid(repaired)
+        if error is not None:
+            metrics.outcome('sql_validation', 'invalid')
+            raise InvalidSQLError(repaired, error)
+        metrics.outcome('sql_validation', 'repaired')
+        print("🩹 Repaired query passed validation")
+        return repaired
+    
+    def _speculate(self, question: str, hits) -> Tuple[str, Optional[tuple]]:
+        """nlp_to_sql with the LLM call and a near-miss candidate's query run concurrently
+        
+        The LLM request starts before the local lookups. If they answer, the
+        LLM call is cancelled or, once sent, its response is ignored (it still
+        lands in the LLM response cache). Otherwise the closest near-miss from
+        feedback or the query cache is executed while the LLM works; when the
+        LLM returns the same SQL, that result is used, else the query is
+        cancelled. A near-miss is never answered on its own: it is below the
+        reuse thresholds. Returns (sql, (guarded, result) or None).
+        """
+        with metrics.stage('typed_values'):
+            typed = self.relevancy_checker.typed_values(question)
+        
+        # Worker threads record their stages in this request's trace
+        llm = _speculation_pool().submit(contextvars.copy_context().run, self._llm_sql, question, hits)
+        near_misses = []
+        try:
+            sql_query = self._local_sql(question, hits, typed, near_misses)
+        except Exception:
+            llm.cancel()
+            raise
+        if sql_query:
+            metrics.outcome('speculation', 'llm_cancelled' if llm.cancel() else 'llm_ignored')
+            return sql_query, None
+        
+        cancel = threading.Event()
+        candidate = running = None
+        if near_misses:
+            candidate = min(near_misses)[1]
+            print("🔮 Running near-miss SQL while the LLM answers")
+            running = _speculation_pool().submit(contextvars.copy_context().run,
+                                                 self._execute, candidate, cancel, 'speculative_')
+        try:
+            sql_query = llm.result()
+        except Exception:
+            cancel.set()
+            raise
         if self.cache:
-            self.cache.add_to_cache(question, sql_query)
+            self.cache.add_to_cache(question, sql_query, typed)
         
-        return sql_query
+        if running is None:
+            metrics.outcome('speculation', 'no_candidate')
+            return sql_query, None
+        if normalize_sql(candidate) == normalize_sql(sql_query):
+            metrics.outcome('speculation', 'candidate_used')
+            print("🔮 LLM agreed with the near-miss SQL, using its result")
+            return sql_query, running.result()
+        cancel.set()
+        metrics.outcome('speculation', 'candidate_cancelled')
+        return sql_query, None
     
-    def process_question(self, question: str) -> Tuple[Optional[pd.DataFrame], str]:
-        """Process a natural language question and return results"""
+    def _execute(self, sql_query: str, cancel: Optional[threading.Event] = None, stage_prefix: str = ''):
+        """Guard and run a query; returns (GuardedQuery, result or None)
+        
+        Speculative runs (stage_prefix set) read on their own connection, so
+        they never hold the database lock other requests wait on.
+        """
+        # Bound expensive queries (LIMIT over budget, statement timeout always)
+        with metrics.stage(f'{stage_prefix}guard'):
+            guarded = self.guard.guard(sql_query)
         
+        # Execute query (repeats are served from the result cache)
+        reader = bool(stage_prefix)
+        with metrics.stage(f'{stage_prefix}execute'):
+            if self.results:
+                result_df = self.results.execute(guarded.sql, timeout=guarded.timeout, cancel=cancel, reader=reader)
+            else:
+                result_df = self._run_query(guarded.sql, timeout=guarded.timeout, cancel=cancel, reader=reader)
+        return guarded, result_df
+    
+    def process_question(self, question: str) -> Tuple[Optional['pd.DataFrame'], str]:
+        """Process a natural language question and return results (timed per stage)"""
+        with metrics.trace('question', question=question):
+            return self._process_question(question)
+    
+    def _process_question(self, question: str) -> Tuple[Optional['pd.DataFrame'], str]:
         # ✅ NEW: Check relevancy FIRST - BEFORE any API calls
-        is_relevant, similarity, info = self.relevancy_checker.is_relevant(question)
+        with metrics.stage('relevance'):
+            is_relevant, similarity, info, hits = self.relevancy_checker.is_relevant(question)
+        metrics.outcome('relevance', 'relevant' if is_relevant else 'rejected')
         
         if not is_relevant:
             print(f"\n❌ Question not relevant to database (similarity: {similarity:.2f})")
@@ -94,10 +392,16 @@ Return ONLY the SELECT statement. No explanations, no markdown.
             return None, ""
         
         print(f"✅ Relevant question (similarity: {similarity:.2f})")
+        if not self.relevancy_checker.complete:
+            print(f"   ⏳ Data inventory still building ({self.relevancy_checker.status()})")
         
         try:
             # Convert to SQL (only if relevant)
-            sql_query = self.nlp_to_sql(question)
+            with metrics.stage('nlp_to_sql'):
+                if config.SPECULATIVE_ENABLED:
+                    sql_query, executed = self._speculate(question, hits)
+                else:
+                    sql_query, executed = self.nlp_to_sql(question, hits), None
             print(f"\n🔍 Generated SQL Query:")
             print(f"   {sql_query}")
             
@@ -105,16 +409,27 @@ Return ONLY the SELECT statement. No explanations, no markdown.
             self.last_question = question
             self.last_sql = sql_query
             
-            # Execute query
-            result_df = self.db.execute_query(sql_query)
+            guarded, result_df = executed or self._execute(sql_query)
+            self.last_plan = guarded.plan
+            metrics.outcome('execute', 'ok' if result_df is not None else 'error')
+            
+            if result_df is not None:
+                self.index_advisor.record(guarded.sql)
             
             return result_df, sql_query
             
+        except InvalidSQLError as e:
+            print(f"❌ Could not generate valid SQL: {e.error}")
+            print(f"   {e.sql}")
+            self.last_question = question
+            self.last_sql = e.sql
+            return None, e.sql
+            
         except Exception as e:
             print(f"❌ Error processing question: {e}")
             return None, ""
     
-    def display_results(self, df: pd.DataFrame, max_rows: int = 15):
+    def display_results(self, df: 'pd.DataFrame', max_rows: int = 15):
         """Display query results in a formatted table"""
         if df is None or df.empty:
             print("   No results found")
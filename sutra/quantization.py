@@ -0,0 +1,169 @@
+"""Scalar-quantized embedding storage (float32 / float16 / int8)"""
+
+from typing import Optional
+import numpy as np
+import config
+
+STORAGE_DTYPES = ('float32', 'float16', 'int8')
+
+# Rows upcast per step when scoring: small enough to stay in cache, reused buffer
+CHUNK_ROWS = 1024
+
+
+class QuantizedMatrix:
+    """Row-vector matrix stored at reduced precision with vectorized scoring
+
+    float16 halves memory with negligible score error. int8 uses a symmetric
+    per-row scale (row = codes * scale) and quarters memory; scoring either
+    upcasts chunk by chunk or, with integer_dot, quantizes the query too
+    and accumulates an int32 dot product.
+
+    Scoring upcasts CHUNK_ROWS rows at a time into one float32 buffer. int8
+    then scores about as fast as float32; float16 stays several times slower
+    per query (numpy's half to single conversion dominates), so it trades
+    latency for memory.
+    """
+
+    _spare = None  # (data, scales) buffers that data and scales are views of, see append
+
+    def __init__(self, vectors: Optional[np.ndarray] = None, dtype: Optional[str] = None,
+                 integer_dot: bool = False):
+        self.dtype = (dtype or config.EMBEDDING_STORAGE).lower()
+        if self.dtype not in STORAGE_DTYPES:
+            raise ValueError(f"Unknown embedding storage '{self.dtype}', expected one of {STORAGE_DTYPES}")
+        self.integer_dot = integer_dot
+        self.data = np.zeros((0, 0), dtype=self.dtype)
+        self.scales = None
+
+        if vectors is not None:
+            self._store(np.asarray(vectors, dtype=np.float32))
+
+    def _store(self, vectors: np.ndarray):
+        if vectors.ndim == 1:
+            vectors = vectors.reshape(1, -1) if len(vectors) else vectors.reshape(0, 0)
+
+        if self.dtype == 'int8':
+            scales = np.abs(vectors).max(axis=1) / 127.0 if len(vectors) else np.zeros(0)
+            scales = scales.astype(np.float32)
+            safe = np.where(scales > 0, scales, 1.0)[:, None]
+            self.data = np.clip(np.rint(vectors / safe), -127, 127).astype(np.int8)
+            self.scales = scales
+        else:
+            self.data = vectors.astype(self.dtype)
+            self.scales = None
+
+    def append(self, vectors: np.ndarray):
+        """Add rows, quantized like the existing ones
+
+        Rows go into spare capacity that doubles when full, so repeated
+        appends cost time in proportion to the new rows only.
+        """
+        new = QuantizedMatrix(np.asarray(vectors, dtype=np.float32), self.dtype)
+        if not len(new):
+            return self
+        if not len(self):
+            self.data, self.scales, self._spare = new.data, new.scales, None
+            return self
+        size, end = len(self), len(self) + len(new)
+        if self._spare is None or self.data.base is not self._spare[0] or end > len(self._spare[0]):
+            capacity = max(end, 2 * size)
+            data = np.empty((capacity,) + self.data.shape[1:], dtype=self.data.dtype)
+            data[:size] = self.data
+            scales = None
+            if self.scales is not None:
+                scales = np.empty(capacity, dtype=np.float32)
+                scales[:size] = self.scales
+            self._spare = (data, scales)
+        data, scales = self._spare
+        data[size:end] = new.data
+        self.data = data[:end]
+        if scales is not None:
+            scales[size:end] = new.scales
+            self.scales = scales[:end]
+        return self
+
+    def trim(self):
+        """Release the spare capacity left by append"""
+        if self._spare is not None:
+            self.data = self.data.copy()
+            self.scales = self.scales.copy() if self.scales is not None else None
+            self._spare = None
+        return self
+
+    def __getstate__(self):
+        # Views pickle only their rows; the spare buffers are not kept
+        return dict(self.__dict__, _spare=None)
+
+    @classmethod
+    def wrap(cls, vectors, dtype: Optional[str] = None) -> 'QuantizedMatrix':
+        """Return vectors as a QuantizedMatrix, converting plain arrays"""
+        if isinstance(vectors, QuantizedMatrix):
+            return vectors
+        return cls(np.asarray(vectors, dtype=np.float32) if len(vectors) else None, dtype)
+
+    def __len__(self):
+        return len(self.data)
+
+    @property
+    def shape(self):
+        return self.data.shape
+
+    @property
+    def nbytes(self) -> int:
+        if self._spare is not None:
+            return sum(buffer.nbytes for buffer in self._spare if buffer is not None)
+        return self.data.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+
+    def dequantize(self, rows=None) -> np.ndarray:
+        """float32 copy of all rows or of the selected rows"""
+        data = self.data if rows is None else self.data[rows]
+        out = data.astype(np.float32)
+        if self.scales is not None:
+            scales = self.scales if rows is None else self.scales[rows]
+            out *= scales[:, None]
+        return out
+
+    def __getitem__(self, rows) -> np.ndarray:
+        return self.dequantize(rows)
+
+    def dot(self, query: np.ndarray, rows=None) -> np.ndarray:
+        """Inner product of every row (or the selected rows) with query"""
+        query = np.asarray(query, dtype=np.float32)
+        data = self.data if rows is None else self.data[rows]
+        scales = self.scales if rows is None or self.scales is None else self.scales[rows]
+        if data.dtype == np.float32:
+            return data @ query
+
+        if self.integer_dot and scales is not None:
+            q_scale = float(np.abs(query).max()) / 127.0 or 1.0
+            q_codes = np.clip(np.rint(query / q_scale), -127, 127).astype(np.int32)
+            scores = np.empty(len(data), dtype=np.float32)
+            for start in range(0, len(data), CHUNK_ROWS):
+                block = data[start:start + CHUNK_ROWS].astype(np.int32)
+                scores[start:start + CHUNK_ROWS] = block @ q_codes
+            return scores * scales * q_scale
+
+        scores = np.empty(len(data), dtype=np.float32)
+        buffer = np.empty((min(CHUNK_ROWS, len(data)), data.shape[1] if data.ndim == 2 else 0), dtype=np.float32)
+        for start in range(0, len(data), CHUNK_ROWS):
+            block = data[start:start + CHUNK_ROWS]
+            upcast = buffer[:len(block)]
+            upcast[...] = block
+            np.dot(upcast, query, out=scores[start:start + len(block)])
+        if scales is not None:
+            scores *= scales
+        return scores
+
+    def to_arrays(self, prefix: str = '') -> dict:
+        """Arrays for np.savez"""
+        arrays = {f'{prefix}data': self.data, f'{prefix}dtype': self.dtype}
+        if self.scales is not None:
+            arrays[f'{prefix}scales'] = self.scales
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, data, prefix: str = '') -> 'QuantizedMatrix':
+        matrix = cls(dtype=str(data[f'{prefix}dtype']))
+        matrix.data = data[f'{prefix}data']
+        matrix.scales = data[f'{prefix}scales'] if f'{prefix}scales' in data else None
+        return matrix
@@ -0,0 +1,167 @@
+"""Pre-execution cost check for generated SQL using the database's query planner"""
+
+import re
+from math import prod
+from typing import Dict, List, NamedTuple, Optional
+import config
+
+# Rows assumed for an index lookup and for scans of subqueries / unknown tables
+SEARCH_ROWS = 10
+UNKNOWN_ROWS = 1000
+
+SQL_KEYWORDS = {
+    'where', 'join', 'inner', 'left', 'right', 'full', 'outer', 'cross', 'natural', 'on', 'using',
+    'group', 'order', 'limit', 'having', 'union', 'except', 'intersect', 'window', 'as', 'select',
+}
+TRAILING_LIMIT = re.compile(r"\blimit\s+\d+(\s*(,|offset)\s*\d+)?\s*$", re.IGNORECASE)
+
+
+def table_aliases(sql: str, tables: List[str]) -> Dict[str, str]:
+    """Lowercase table name or alias -> table, for tables named in FROM / JOIN clauses"""
+    known = {t.lower(): t for t in tables}
+    aliases = dict(known)
+    pattern = r"(?:\bfrom|\bjoin|,)\s+[`\"]?(\w+)[`\"]?(?:\s+(?:as\s+)?[`\"]?(\w+)[`\"]?)?"
+    for name, alias in re.findall(pattern, sql, re.IGNORECASE):
+        table = known.get(name.lower())
+        if table and alias and alias.lower() not in SQL_KEYWORDS:
+            aliases[alias.lower()] = table
+    return aliases
+
+
+class QueryPlan(NamedTuple):
+    cost: int              # Estimated rows examined
+    full_scans: List[str]  # Tables read without an index
+    cartesian: bool        # Two unindexed scans nested in one join
+    lines: List[str]       # Planner output, for display
+
+
+class GuardedQuery(NamedTuple):
+    sql: str
+    plan: Optional[QueryPlan]
+    timeout: Optional[float]
+    limited: bool
+
+
+class QueryGuard:
+    """EXPLAIN a query, estimate its cost and bound it before execution
+
+    Queries over QUERY_COST_BUDGET rows examined get a LIMIT appended (when they
+    have none); every query runs with the QUERY_TIMEOUT_S statement timeout, so
+    a runaway join cannot hold the interactive loop.
+    """
+
+    def __init__(self, db_manager, budget: Optional[int] = None, row_limit: Optional[int] = None,
+                 timeout: Optional[float] = None):
+        self.db = db_manager
+        self.budget = config.QUERY_COST_BUDGET if budget is None else budget
+        self.row_limit = config.QUERY_ROW_LIMIT if row_limit is None else row_limit
+        self.timeout = config.QUERY_TIMEOUT_S if timeout is None else timeout
+
+    # ----- Plans -----
+
+    def _table_rows(self, table: str) -> int:
+        """Row estimate: MAX(rowid) on SQLite (an index lookup, unlike COUNT(*)), TABLE_ROWS on MySQL"""
+        try:
+            cursor = self.db.conn.cursor()
+            if self.db.db_type == 'mysql':
+                cursor.execute(
+                    "SELECT TABLE_ROWS FROM information_schema.TABLES "
+                    "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s", (table,)
+                )
+            else:
+                cursor.execute(f'SELECT MAX(rowid) FROM "{table}"')
+            row = cursor.fetchone()
+            cursor.close()
+            return int(row[0] or 0) if row else UNKNOWN_ROWS
+        except Exception:
+            return UNKNOWN_ROWS
+
+    def _sqlite_plan(self, sql: str) -> QueryPlan:
+        cursor = self.db.conn.cursor()
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+        rows = cursor.fetchall()
+        cursor.close()
+
+        aliases = table_aliases(sql, self.db.get_tables())
+        loops: Dict[int, List[int]] = {}  # parent id -> row estimates of nested loops
+        scans: Dict[int, int] = {}        # parent id -> unindexed table scans
+        full_scans = []
+        for _, parent, _, detail in rows:
+            words = detail.split()
+            if len(words) < 2 or words[0] not in ('SCAN', 'SEARCH'):
+                continue
+            name = words[2] if words[1] == 'TABLE' and len(words) > 2 else words[1]
+            table = aliases.get(name.lower())
+            if words[0] == 'SEARCH':
+                estimate = SEARCH_ROWS
+            elif table:
+                estimate = self._table_rows(table)
+                full_scans.append(table)
+                scans[parent] = scans.get(parent, 0) + 1
+            else:
+                estimate = UNKNOWN_ROWS  # Subquery, CTE or constant row
+            loops.setdefault(parent, []).append(estimate)
+
+        cost = sum(prod(estimates) for estimates in loops.values())
+        return QueryPlan(int(cost), full_scans, any(n > 1 for n in scans.values()),
+                         [detail for *_, detail in rows])
+
+    def _mysql_plan(self, sql: str) -> QueryPlan:
+        cursor = self.db.conn.cursor()
+        cursor.execute(f"EXPLAIN {sql}")
+        columns = [d[0].lower() for d in cursor.description]
+        rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        cursor.close()
+
+        loops: Dict[str, List[int]] = {}
+        full_scans, unindexed = [], {}
+        for row in rows:
+            estimate = int(row.get('rows') or 1)
+            loops.setdefault(str(row.get('id')), []).append(estimate)
+            if row.get('type') == 'ALL' and row.get('table'):
+                full_scans.append(row['table'])
+                unindexed[str(row.get('id'))] = unindexed.get(str(row.get('id')), 0) + 1
+
+        lines = [f"{row.get('table')}: type={row.get('type')} rows={row.get('rows')} key={row.get('key')} "
+                 f"{row.get('extra') or ''}".strip() for row in rows]
+        cost = sum(prod(estimates) for estimates in loops.values())
+        return QueryPlan(int(cost), full_scans, any(n > 1 for n in unindexed.values()), lines)
+
+    def explain(self, sql: str) -> Optional[QueryPlan]:
+        """Planner-based cost estimate, or None if the statement cannot be explained"""
+        sql = sql.strip().rstrip(';')
+        try:
+            with self.db.lock:
+                if self.db.db_type == 'mysql':
+                    return self._mysql_plan(sql)
+                return self._sqlite_plan(sql)
+        except Exception as e:
+            print(f"⚠️ Could not explain query: {e}")
+            return None
+
+    # ----- Guard -----
+
+    def add_limit(self, sql: str) -> Optional[str]:
+        """SQL with a row limit appended, or None if it already has one"""
+        sql = sql.strip().rstrip(';').rstrip()
+        if TRAILING_LIMIT.search(sql):
+            return None
+        return f"{sql} LIMIT {self.row_limit}"
+
+    def guard(self, sql: str) -> GuardedQuery:
+        """Plan the query and bound it when the estimate is over budget"""
+        plan = self.explain(sql)
+        limited = False
+
+        if plan and plan.cost > self.budget:
+            reason = "Cartesian join" if plan.cartesian else "over budget"
+            print(f"🛡️ Expensive query ({reason}, ~{plan.cost:,} rows examined):")
+            for line in plan.lines:
+                print(f"   {line}")
+            bounded = self.add_limit(sql)
+            if bounded:
+                sql, limited = bounded, True
+                print(f"   ✂️ Limited to {self.row_limit} rows")
+            print(f"   ⏱️ Timeout {self.timeout:g}s")
+
+        return GuardedQuery(sql, plan, self.timeout or None, limited)
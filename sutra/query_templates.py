@@ -0,0 +1,89 @@
+"""Parameterized SQL templates: database values typed in a question become slots
+
+"orders by John Smith" -> "orders by {1}" with SELECT ... WHERE name = '{1}',
+so one generated query serves every question of the same shape.
+"""
+
+import re
+from typing import List, NamedTuple, Optional, Tuple
+
+SLOT = re.compile(r"\{(\d+)\}")
+STRING_LITERAL = re.compile(r"'((?:[^']|'')*)'")
+
+
+class QuestionTemplate(NamedTuple):
+    question: str                   # Question with typed values replaced by {1}, {2}, ...
+    values: List[str]               # Values in slot order, as stored in the database
+    columns: List[Tuple[str, ...]]  # 'table.column' keys each value belongs to
+
+
+def _word_pattern(text: str) -> str:
+    return rf"(?<!\w){re.escape(text)}(?!\w)"
+
+
+def extract(question: str, hits) -> Optional[QuestionTemplate]:
+    """Template of a question from value hits, or None if it names no stored value"""
+    columns = {}
+    for hit in hits or []:
+        if hit.value is not None and hit.column:
+            columns.setdefault(hit.value, set()).add(f"{hit.table}.{hit.column}")
+    if not columns:
+        return None
+
+    # Longest values first; skip ones inside an already chosen span
+    spans = []
+    for value in sorted(columns, key=len, reverse=True):
+        for match in re.finditer(_word_pattern(value.lower()), question.lower()):
+            if not any(match.start() < end and start < match.end() for start, end, _ in spans):
+                spans.append((match.start(), match.end(), value))
+    if not spans:
+        return None
+
+    spans.sort()
+    parts, values, slot_columns, position = [], [], [], 0
+    for number, (start, end, value) in enumerate(spans, 1):
+        parts.append(question[position:start] + f"{{{number}}}")
+        values.append(value)
+        slot_columns.append(tuple(sorted(columns[value])))
+        position = end
+    parts.append(question[position:])
+    return QuestionTemplate(''.join(parts), values, slot_columns)
+
+
+def parameterize(sql: str, template: QuestionTemplate) -> Optional[str]:
+    """SQL with the template's values replaced by slots inside string literals
+
+    None when a value is not used as a literal (e.g. the query filters by id),
+    since such SQL cannot be re-bound safely.
+    """
+    if SLOT.search(sql):
+        return None
+    found = set()
+
+    def replace(match):
+        literal = match.group(1)
+        for number, value in enumerate(template.values, 1):
+            escaped = value.replace("'", "''")
+            literal, count = re.subn(_word_pattern(escaped), f"{{{number}}}", literal, flags=re.IGNORECASE)
+            if count:
+                found.add(number)
+        return f"'{literal}'"
+
+    result = STRING_LITERAL.sub(replace, sql)
+    return result if len(found) == len(template.values) else None
+
+
+def bind(sql: str, values: List[str]) -> str:
+    """Fill slots with values (quotes escaped for SQL string literals)"""
+    return SLOT.sub(lambda m: values[int(m.group(1)) - 1].replace("'", "''"), sql)
+
+
+def compatible(slot_columns, template: QuestionTemplate) -> bool:
+    """Whether each new value can fill the stored slot (shares a column with it)"""
+    return len(slot_columns) == len(template.columns) and all(
+        set(stored) & set(new) for stored, new in zip(slot_columns, template.columns))
+
+
+def mentions(question: str, values: List[str]) -> bool:
+    """Whether a question contains every one of the values"""
+    return all(re.search(_word_pattern(v.lower()), question.lower()) for v in values)
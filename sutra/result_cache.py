@@ -0,0 +1,239 @@
+"""Result-set cache for executed SQL, keyed on normalized query text and table versions"""
+
+import hashlib
+import importlib.util
+import json
+import os
+import re
+import shutil
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple, TYPE_CHECKING
+import config
+from sutra.metrics import metrics
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Parquet spill needs pyarrow (checked without importing it)
+PYARROW_AVAILABLE = importlib.util.find_spec('pyarrow') is not None
+
+STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+
+
+def normalize_sql(sql: str) -> str:
+    """Collapse whitespace and drop trailing semicolons, leaving string literals untouched"""
+    parts, position = [], 0
+    for match in STRING_LITERAL.finditer(sql):
+        parts.append(' '.join(sql[position:match.start()].split()))
+        parts.append(match.group())
+        position = match.end()
+    parts.append(' '.join(sql[position:].split()))
+    return ' '.join(p for p in parts if p).strip().rstrip(';').strip()
+
+
+def referenced_tables(sql: str, tables: List[str]) -> List[str]:
+    """Tables of a list that a query mentions"""
+    lowered = sql.lower()
+    return [t for t in tables if re.search(rf"(?<![\w]){re.escape(t.lower())}(?![\w])", lowered)]
+
+
+def remove_orphans(root: Path):
+    """Delete per-process directories (named by pid) of processes that are gone"""
+    if not root.exists():
+        return
+    for directory in root.iterdir():
+        if not directory.name.isdigit():
+            continue
+        try:
+            os.kill(int(directory.name), 0)
+        except ProcessLookupError:
+            shutil.rmtree(directory, ignore_errors=True)
+        except OSError:
+            pass  # Alive (or not ours to signal)
+
+
+def is_cacheable(sql: str) -> bool:
+    """Only read-only statements are cached"""
+    return re.match(r"^\s*(select|with)\b", sql, re.IGNORECASE) is not None
+
+
+class ResultCache:
+    """Memory-bounded LRU of query results with an optional Parquet spill on disk
+
+    The key combines the normalized SQL with version markers of the tables it
+    reads (DatabaseManager.get_table_versions), so any write to those tables,
+    or a schema change through the manager, makes old entries unreachable.
+    The markers only hold within one connection (they restart with the
+    process), so the spill directory is private to this process too.
+    """
+
+    def __init__(self, db_manager, max_mb: Optional[float] = None, cache_dir: Optional[Path] = None,
+                 disk_mb: Optional[float] = None, executor: Optional[Callable] = None):
+        self.db = db_manager
+        # Runs queries on a miss (default DatabaseManager.execute_query)
+        self.executor = executor or db_manager.execute_query
+        self.max_bytes = int((config.RESULT_CACHE_MAX_MB if max_mb is None else max_mb) * 1e6)
+        self.disk_bytes = int((config.RESULT_CACHE_DISK_MB if disk_mb is None else disk_mb) * 1e6)
+        root = Path(cache_dir or config.RESULT_CACHE_DIR)
+        remove_orphans(root)
+        self.cache_dir = root / str(os.getpid())
+        self.spill = PYARROW_AVAILABLE and self.disk_bytes > 0
+
+        self._entries: 'OrderedDict[str, Tuple[pd.DataFrame, int]]' = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._tables: Tuple[int, List[str]] = (-1, [])
+        self._lock = threading.RLock()
+
+    # ----- Keys -----
+
+    def tables_in(self, sql: str) -> List[str]:
+        """Known tables mentioned in a query"""
+        if self._tables[0] != self.db.schema_version:
+            self._tables = (self.db.schema_version, self.db.get_tables())
+        return referenced_tables(sql, self._tables[1])
+
+    def make_key(self, sql: str) -> str:
+        normalized = normalize_sql(sql)
+        versions = self.db.get_table_versions(self.tables_in(normalized))
+        database = getattr(self.db, 'database', None)  # Spilled files are shared by all databases
+        payload = json.dumps({'database': database, 'sql': normalized, 'versions': versions}, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    # ----- Storage -----
+
+    @staticmethod
+    def _size(df: 'pd.DataFrame') -> int:
+        return int(df.memory_usage(index=True, deep=True).sum())
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.parquet"
+
+    def _store(self, key: str, df: 'pd.DataFrame', size: int):
+        self._entries[key] = (df, size)
+        self.bytes += size
+        while self.bytes > self.max_bytes and self._entries:
+            old_key, (old_df, old_size) = self._entries.popitem(last=False)
+            self.bytes -= old_size
+            self._spill(old_key, old_df)
+
+    def _spill(self, key: str, df: 'pd.DataFrame'):
+        """Write an evicted result to Parquet so a later repeat skips the database"""
+        if not self.spill:
+            return
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path = self._path(key).with_suffix(f".{os.getpid()}.tmp")
+            df.to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, self._path(key))
+        except Exception as e:
+            print(f"⚠️ Could not spill cached result: {e}")
+            return
+        self._evict_disk()
+
+    def _evict_disk(self):
+        """Drop least recently used Parquet files beyond the disk budget"""
+        files = []
+        for path in self.cache_dir.glob('*.parquet'):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.disk_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+    def _load(self, key: str) -> Optional['pd.DataFrame']:
+        if not self.spill:
+            return None
+        path = self._path(key)
+        if not path.exists():
+            return None
+        import pandas as pd
+        try:
+            df = pd.read_parquet(path)
+            os.utime(path)
+        except Exception as e:
+            print(f"⚠️ Could not read cached result: {e}")
+            return None
+        return df
+
+    # ----- Public API -----
+
+    def get(self, sql: str, key: Optional[str] = None) -> Optional['pd.DataFrame']:
+        """Cached result of a query at the tables' current versions, if any"""
+        key = key or self.make_key(sql)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0].copy()
+
+        df = self._load(key)
+        with self._lock:
+            if df is not None:
+                self.disk_hits += 1
+                self._store(key, df, self._size(df))
+                return df.copy()
+
+            self.misses += 1
+            return None
+
+    def put(self, sql: str, df: 'pd.DataFrame', key: Optional[str] = None):
+        """Remember a result; results larger than a quarter of the budget are skipped"""
+        size = self._size(df)
+        if size > self.max_bytes // 4:
+            return
+        key = key or self.make_key(sql)
+        with self._lock:
+            if key in self._entries:
+                self.bytes -= self._entries.pop(key)[1]
+            self._store(key, df.copy(), size)
+
+    def execute(self, sql: str, **kwargs) -> Optional['pd.DataFrame']:
+        """Run a query through the cache (kwargs go to the executor)"""
+        if not is_cacheable(sql):
+            return self.executor(sql, **kwargs)
+
+        key = self.make_key(sql)
+        cached = self.get(sql, key)
+        metrics.outcome('result_cache', 'hit' if cached is not None else 'miss')
+        if cached is not None:
+            print(f"💾 Using cached result ({len(cached)} rows)")
+            return cached
+
+        df = self.executor(sql, **kwargs)
+        if df is not None:
+            self.put(sql, df, key)
+        return df
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': round((self.hits + self.disk_hits) / lookups, 3) if lookups else 0.0,
+                'entries': len(self._entries),
+                'memory_mb': round(self.bytes / 1e6, 2),
+            }
+
+    def clear(self):
+        """Drop every cached result, in memory and on disk"""
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+        if self.cache_dir.exists():
+            for path in self.cache_dir.glob('*.parquet'):
+                path.unlink(missing_ok=True)
+        print("🗑️ Result cache cleared")
@@ -1,155 +1,462 @@
 """Strict schema and data validation for relevancy checking"""
 
+import os
 import pickle
+import threading
+import time
+from contextlib import contextmanager
 from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, TYPE_CHECKING
 import numpy as np
-from sentence_transformers import SentenceTransformer
 import config
-import re
+from sutra.embeddings import get_encoder
+from sutra.ann_index import ExactIndex, create_index, index_kind, load_index, normalize
+from sutra.quantization import QuantizedMatrix
+from sutra.value_index import ValueIndex
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+try:
+    import fcntl  # Cross-process build lock (not on Windows)
+except ImportError:
+    fcntl = None
+
+# Bump when the pickled inventory layout changes
+INVENTORY_VERSION = 2
+
+# Hits returned per question (strongest first)
+MAX_HITS = 20
+
+# A background build publishes what it has scanned at most this often
+PUBLISH_INTERVAL_S = 1.0
+
+
+class RelevanceHit(NamedTuple):
+    """Where a question matched the database"""
+    table: str
+    column: Optional[str]  # None for a table-name match
+    value: Optional[str]   # Stored value (original casing), None for schema-name matches
+    score: float
+
+
+def _empty_inventory() -> dict:
+    return {
+        'version': INVENTORY_VERSION,
+        'tables': [],
+        'columns': {},
+        'values': ValueIndex().finalize(),  # Interned strings, value -> column postings, token index
+        'embeddings': QuantizedMatrix(),
+        'embedded_texts': []
+    }
+
 
 class SchemaEmbeddings:
-    def __init__(self, db_manager):
+    """Data inventory and relevance check for one database
+
+    Without a pickled inventory the build runs in a background thread
+    (config.INVENTORY_BACKGROUND) and publishes tables as they are scanned;
+    until it is complete, is_relevant answers from the partial inventory and
+    falls back to config.INVENTORY_PARTIAL_FALLBACK for questions it cannot
+    place. A lock file keeps two processes from building the same inventory.
+    """
+
+    def __init__(self, db_manager, database: Optional[str] = None, background: Optional[bool] = None):
         self.db = db_manager
-        self.model = SentenceTransformer('all-MiniLM-L6-v2')
+        self.database = database or getattr(db_manager, 'database', None) or config.MYSQL_DATABASE
+        self.model = get_encoder()  # Shared, warm model (embedding server or in-process)
         self.strict_threshold = 0.85  # Higher threshold to prevent false positives
         
         # Auto-generate embeddings path
-        db_name = config.MYSQL_DATABASE
-        self.embed_file = Path(f"data/output/schema_embeddings_{db_name}.pkl")
+        self.embed_file = config.OUTPUT_DIR / f"schema_embeddings_{self.database}.pkl"
         self.embed_file.parent.mkdir(parents=True, exist_ok=True)
+        self.index_file = self.embed_file.with_suffix('.ann.npz')
+        self.lock_file = self.embed_file.with_suffix('.lock')
+        
+        # Readers use a consistent view under _lock while a build publishes into it.
+        # The inventory dict itself is updated in place (the fast path holds it).
+        self._lock = threading.RLock()
+        self.ready = threading.Event()  # Set once the full inventory and index are in place
+        self._stop = threading.Event()
+        self.progress = (0, 0)  # Tables scanned, tables in database
+        self.build_error: Optional[Exception] = None
+        self.data_inventory = _empty_inventory()
+        self.index = ExactIndex()
         
         # Load or create embeddings automatically
-        self.data_inventory = self._load_or_create()
-    
-    def _load_or_create(self):
-        """Load existing or create new data inventory"""
-        if self.embed_file.exists():
-            print(f"⚡ Loading cached data inventory for {config.MYSQL_DATABASE}")
-            with open(self.embed_file, 'rb') as f:
-                return pickle.load(f)
+        inventory = self._load()
+        if inventory is not None:
+            self._publish(inventory)
+        elif config.INVENTORY_BACKGROUND if background is None else background:
+            self._thread = threading.Thread(target=self._build, args=(True,), name=f"inventory-{self.database}", daemon=True)
+            self._thread.start()
         else:
-            print(f"🔨 Building data inventory for {config.MYSQL_DATABASE} (one-time)")
-            return self._create_inventory()
-    
-    def _create_inventory(self):
-        """Create complete inventory of ALL data values in database - NO HARDCODING"""
-        inventory = {
-            'tables': [],
-            'columns': {},
-            'all_values': set(),  # Use set to avoid duplicates
-            'values_by_column': {},
-            'embeddings': [],
-            'embedded_texts': []
-        }
-        
-        # Get tables
-        tables = self.db.get_tables()
-        inventory['tables'] = tables
+            self._build()
+    
+    @property
+    def complete(self) -> bool:
+        return self.ready.is_set()
+    
+    def status(self) -> str:
+        if self.complete:
+            return "failed" if self.build_error else "complete"
+        done, total = self.progress
+        return f"{done}/{total} tables scanned" if total else "starting"
+    
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the inventory is complete; False on timeout"""
+        return self.ready.wait(timeout)
+    
+    def stop(self):
+        """Abandon a background build (the database is being closed)"""
+        self._stop.set()
+    
+    def _load(self) -> Optional[dict]:
+        """Pickled inventory, if one of the current layout exists"""
+        if not self.embed_file.exists():
+            return None
+        print(f"⚡ Loading cached data inventory for {self.database}")
+        with open(self.embed_file, 'rb') as f:
+            inventory = pickle.load(f)
+        if inventory.get('version') == INVENTORY_VERSION:
+            return inventory
+        print("🔨 Inventory format changed, rebuilding (one-time)")
+        return None
+    
+    @contextmanager
+    def _build_lock(self):
+        """Exclusive lock on the inventory files across processes"""
+        if fcntl is None:
+            yield
+            return
+        with open(self.lock_file, 'w') as handle:
+            try:
+                fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                print(f"⏳ Another process is building the inventory for {self.database}, waiting")
+                fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+    
+    def _build(self, background: bool = False):
+        try:
+            with self._build_lock():
+                # Another process may have finished it while we waited for the lock
+                inventory = self._load()
+                if inventory is None:
+                    where = ", in the background" if background else ""
+                    print(f"🔨 Building data inventory for {self.database} (one-time{where})")
+                    inventory = self._create_inventory()
+                if inventory is not None:
+                    self._publish(inventory)
+        except Exception as e:
+            self.build_error = e
+            print(f"❌ Could not build data inventory for {self.database}: {e}")
+        finally:
+            self.ready.set()
+    
+    def _publish(self, inventory: dict):
+        """Make a complete inventory and its vector index current"""
+        index = self._load_or_build_index(inventory)
+        with self._lock:
+            self.data_inventory.update(inventory)
+            self.index = index
+        self.ready.set()
+    
+    def _load_or_build_index(self, inventory: dict):
+        """Load the nearest neighbour index saved next to the inventory, or build it"""
+        size = len(inventory['embedded_texts'])
+        embeddings = QuantizedMatrix.wrap(inventory['embeddings'])
+        inventory['embeddings'] = embeddings
+        expected_kind = index_kind(size)
+        # Exact and IVF indexes search the inventory's own matrix (one copy in memory and on disk)
+        expected_storage = 'float32' if expected_kind == 'hnsw' else embeddings.dtype
+        
+        if self.index_file.exists() and self.index_file.stat().st_mtime >= self.embed_file.stat().st_mtime:
+            try:
+                index = load_index(self.index_file, embeddings if expected_kind != 'hnsw' else None)
+                if (len(index) == size and index.kind == expected_kind
+                        and index.storage == expected_storage):
+                    return index
+            except Exception as e:
+                print(f"⚠️ Could not load vector index: {e}")
+        
+        index = create_index(expected_kind, size)
+        if size:
+            print(f"   Building {index.kind} vector index for {size} embeddings...")
+            index.build(embeddings)
+        try:
+            index.save(self.index_file)
+        except Exception as e:
+            print(f"⚠️ Could not save vector index: {e}")
+        return index
+    
+    def _distinct_values(self, reader, table: str, col: str) -> list:
+        """All unique values of a column - no limits, no filters"""
+        query = f"SELECT DISTINCT `{col}` FROM `{table}` WHERE `{col}` IS NOT NULL"
+        if reader is None:
+            # In-memory SQLite has no second connection; share the manager's
+            with self.db.lock:
+                cursor = self.db.conn.cursor()
+                cursor.execute(query)
+                rows = cursor.fetchall()
+        else:
+            cursor = reader.cursor()
+            cursor.execute(query)
+            rows = cursor.fetchall()
+        cursor.close()
+        return rows
+    
+    def _create_inventory(self) -> Optional[dict]:
+        """Create complete inventory of ALL data values in database - NO HARDCODING
         
+        Tables are scanned over a separate connection and published into
+        self.data_inventory as they finish, so questions can be checked
+        against the part already indexed. Returns None if stopped.
+        """
+        inventory = self.data_inventory
+        values = inventory['values']
+        tables = self.db.get_tables()
+        columns = {}
+        self.progress = (0, len(tables))
         print(f"   Scanning {len(tables)} tables for ALL data...")
         
-        for table in tables:
-            # Get columns
-            columns = self.db.get_columns(table)
-            inventory['columns'][table] = columns
+        texts: List[str] = []
+        embeddings = QuantizedMatrix()  # Unit vectors of texts, appended per publish
+        partial = ExactIndex().build(embeddings)  # Searches embeddings in place
+        embedded = set()  # Value ids already embedded
+        scanned = []      # (table, [(column_key, rows)]) not yet published
+        published = time.monotonic()
+        
+        def publish():
+            # Intern and index under the lock; encode outside it
+            with self._lock:
+                start = len(values.strings)
+                batch_texts, value_ids = [], []
+                for table, table_rows in scanned:
+                    for column_key, rows in table_rows:
+                        for val in rows:
+                            if val[0] is not None:
+                                val_str = str(val[0]).strip()
+                                if val_str:
+                                    # Substrings are reached through the token index unless expanded
+                                    value_ids.append(values.add_value(val_str, column_key, expanded=config.INVENTORY_EXPANDED))
+                values.finalize()
             
-            # Get ALL data from EVERY column
-            for col in columns:
-                try:
-                    # Get ALL unique values - no limits, no filters
-                    query = f"SELECT DISTINCT `{col}` FROM `{table}` WHERE `{col}` IS NOT NULL"
-                    cursor = self.db.conn.cursor()
-                    cursor.execute(query)
-                    values = cursor.fetchall()
-                    cursor.close()
-                    
-                    column_values = set()
-                    for val in values:
-                        if val[0] is not None:
-                            val_str = str(val[0]).strip()
-                            
-                            # Add the complete value in lowercase
-                            val_lower = val_str.lower()
-                            column_values.add(val_lower)
-                            inventory['all_values'].add(val_lower)
-                            
-                            # Extract all possible substrings that might be queried
-                            # Split by common delimiters
-                            delimiters = [',', ';', '|', '/', '\\', '-', '_', '.', ':', '\n', '\t']
-                            parts = [val_lower]
-                            
-                            for delimiter in delimiters:
-                                new_parts = []
-                                for part in parts:
-                                    new_parts.extend(part.split(delimiter))
-                                parts = new_parts
-                            
-                            # Add all non-empty, cleaned parts
-                            for part in parts:
-                                cleaned = part.strip()
-                                if cleaned and len(cleaned) > 1:  # Skip single characters
-                                    inventory['all_values'].add(cleaned)
-                                    
-                                    # Also add individual words from each part
-                                    words = cleaned.split()
-                                    for word in words:
-                                        if len(word) > 1:  # Skip single letters
-                                            inventory['all_values'].add(word)
-                                    
-                                    # Add consecutive word pairs (for things like "new york")
-                                    for i in range(len(words) - 1):
-                                        pair = f"{words[i]} {words[i+1]}"
-                                        inventory['all_values'].add(pair)
-                    
-                    if column_values:
-                        inventory['values_by_column'][f"{table}.{col}"] = list(column_values)
-                        print(f"      Found {len(column_values)} unique values in {table}.{col}")
-                    
-                except Exception as e:
-                    print(f"      Could not read {table}.{col}: {e}")
-        
-        # Convert set to list for final storage
-        inventory['all_values'] = list(inventory['all_values'])
-        
-        # Create texts for embedding - include everything
-        texts_to_embed = []
-        
-        # Add table and column names
-        for table in inventory['tables']:
-            texts_to_embed.append(f"table {table}")
-            for col in inventory['columns'][table]:
-                texts_to_embed.append(f"column {col}")
-        
-        # Add ALL extracted data values
-        texts_to_embed.extend(inventory['all_values'])
+            # Table and column names, then new full values (the expanded layout embeds every new string)
+            for table, _ in scanned:
+                batch_texts.append(f"table {table}")
+                batch_texts.extend(f"column {col}" for col in columns[table])
+            if config.INVENTORY_EXPANDED:
+                batch_texts.extend(values.strings[start:])
+            else:
+                new_ids = [i for i in dict.fromkeys(value_ids) if i not in embedded]
+                embedded.update(new_ids)
+                batch_texts.extend(values.strings[i] for i in new_ids)
+            vectors = normalize(self.model.encode(batch_texts)).astype(np.float32) if batch_texts else None
+            with self._lock:
+                if vectors is not None:
+                    partial.add(vectors)
+                    texts.extend(batch_texts)
+                inventory['tables'] = [t for t in tables if t in columns]
+                inventory['columns'] = dict(columns)
+                inventory['embedded_texts'] = texts  # Extended under the lock
+                self.index = partial
+            scanned.clear()
+        
+        reader = self.db.open_reader()
+        try:
+            for done, table in enumerate(tables, 1):
+                if self._stop.is_set():
+                    print(f"   Inventory build for {self.database} stopped")
+                    return None
+                
+                # Get columns
+                columns[table] = self.db.get_columns(table)
+                table_rows = []
+                
+                # Get ALL data from EVERY column
+                for col in columns[table]:
+                    column_key = f"{table}.{col}"
+                    try:
+                        rows = self._distinct_values(reader, table, col)
+                        table_rows.append((column_key, rows))
+                        if rows:
+                            print(f"      Found {len(rows)} unique values in {column_key}")
+                    except Exception as e:
+                        print(f"      Could not read {column_key}: {e}")
+                scanned.append((table, table_rows))
+                self.progress = (done, len(tables))
+                
+                if done == len(tables) or time.monotonic() - published >= PUBLISH_INTERVAL_S:
+                    publish()
+                    published = time.monotonic()
+        finally:
+            if reader is not None:
+                reader.close()
         
         # Generate embeddings
-        print(f"   Generating embeddings for {len(texts_to_embed)} items...")
-        if texts_to_embed:
-            inventory['embeddings'] = self.model.encode(texts_to_embed)
-            inventory['embedded_texts'] = texts_to_embed
-        else:
-            inventory['embeddings'] = []
-            inventory['embedded_texts'] = []
+        print(f"   Embedded {len(texts)} items")
+        with self._lock:
+            embeddings.trim()
+        result = dict(inventory, tables=list(tables), columns=columns, values=values,
+                      embedded_texts=texts,
+                      # Unit vectors at the configured precision (float32 / float16 / int8)
+                      embeddings=embeddings)
+        
+        self._save(result)
+        print(f"✅ Data inventory complete: {len(values)} unique strings indexed")
+        return result
+    
+    def _save(self, inventory: dict):
+        """Pickle the inventory (atomically: other processes may load it as soon as it exists)"""
+        partial_file = self.embed_file.with_name(f"{self.embed_file.name}.{os.getpid()}.tmp")
+        with open(partial_file, 'wb') as f:
+            pickle.dump(inventory, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(partial_file, self.embed_file)
+    
+    def add_rows(self, frames: Dict[str, 'pd.DataFrame']):
+        """Fold newly inserted rows (table -> DataFrame) into a complete inventory
         
-        # Save
-        with open(self.embed_file, 'wb') as f:
-            pickle.dump(inventory, f)
+        Only new values, tables and columns are embedded, and the vector index
+        is extended rather than rebuilt (unless the inventory outgrows its
+        index kind). Without a saved inventory there is nothing to update: the
+        full build will read the new rows.
+        """
+        self.wait()
+        if self.build_error or not self.embed_file.exists():
+            return
         
-        print(f"✅ Data inventory complete: {len(inventory['all_values'])} unique values indexed")
-        return inventory
+        with self._build_lock():
+            # Intern under the lock, encode outside it, then extend embeddings and index
+            with self._lock:
+                inventory = self.data_inventory
+                values = inventory['values']
+                start = len(values.strings)
+                texts, value_ids = [], []
+                tables, columns = list(inventory['tables']), dict(inventory['columns'])
+                for table, frame in frames.items():
+                    if table not in columns:
+                        tables.append(table)
+                        texts.append(f"table {table}")
+                    known = set(columns.get(table, []))
+                    columns[table] = self.db.get_columns(table)
+                    texts.extend(f"column {col}" for col in columns[table] if col not in known)
+                    for col in frame.columns:
+                        column_key = f"{table}.{col}"
+                        for val in frame[col].dropna().unique():
+                            val_str = str(val).strip()
+                            if val_str:
+                                value_ids.append(values.add_value(val_str, column_key, expanded=config.INVENTORY_EXPANDED))
+                values.finalize()
+                if config.INVENTORY_EXPANDED:
+                    texts.extend(values.strings[start:])
+                else:
+                    texts.extend(values.strings[i] for i in dict.fromkeys(value_ids))
+                embedded = set(inventory['embedded_texts'])
+                texts = [text for text in dict.fromkeys(texts) if text not in embedded]
+            
+            vectors = normalize(self.model.encode(texts)).astype(np.float32) if texts else None
+            with self._lock:
+                if vectors is not None:
+                    embeddings = QuantizedMatrix.wrap(inventory['embeddings'])
+                    size = len(inventory['embedded_texts']) + len(texts)
+                    if index_kind(size) == self.index.kind:
+                        self.index.add(vectors)  # Appends to the matrix too when it is shared
+                        if not (self.index.shared and self.index.vectors is embeddings):
+                            embeddings.append(vectors)
+                    else:
+                        embeddings.append(vectors)
+                        self.index = create_index(index_kind(size), size).build(embeddings)
+                    inventory['embeddings'] = embeddings
+                    inventory['embedded_texts'] = inventory['embedded_texts'] + texts
+                inventory['tables'], inventory['columns'] = tables, columns
+                self._save(dict(inventory))
+            try:
+                self.index.save(self.index_file)
+            except Exception as e:
+                print(f"⚠️ Could not save vector index: {e}")
+        print(f"✅ Data inventory updated: {len(texts)} new items embedded, {len(values)} unique strings indexed")
+    
+    def memory_bytes(self) -> int:
+        """Approximate memory held by the inventory (embeddings, vector index, interned strings)"""
+        with self._lock:
+            inventory = self.data_inventory
+            size = QuantizedMatrix.wrap(inventory['embeddings']).nbytes
+            size += self.index.nbytes
+            size += sum(len(text) for text in inventory['values'].strings)
+            return size
+    
+    def _value_hits(self, value_ids, score: float) -> List[RelevanceHit]:
+        """One hit per column that holds each matched value"""
+        values = self.data_inventory['values']
+        hits = []
+        for value_id in value_ids:
+            for column_key in values.columns_for(value_id):
+                table, column = column_key.split('.', 1)
+                hits.append(RelevanceHit(table, column, values.original(value_id), score))
+        return hits
+    
+    def _text_hits(self, text: str, score: float) -> List[RelevanceHit]:
+        """Hits for an embedded text ('table x', 'column y' or a value)"""
+        if text.startswith('table ') and text[6:] in self.data_inventory['columns']:
+            return [RelevanceHit(text[6:], None, None, score)]
+        if text.startswith('column '):
+            column = text[7:]
+            return [RelevanceHit(table, column, None, score)
+                    for table, cols in self.data_inventory['columns'].items() if column in cols]
+        value_id = self.data_inventory['values'].get(text)
+        return self._value_hits([value_id], score) if value_id is not None else []
+    
+    def typed_values(self, text: str) -> List[RelevanceHit]:
+        """Hits for stored values that appear in the text as typed"""
+        with self._lock:
+            values = self.data_inventory['values']
+            return self._value_hits(values.values_in(text.lower()), 1.0)
+    
+    @staticmethod
+    def _dedupe_hits(hits: List[RelevanceHit]) -> List[RelevanceHit]:
+        """Best score per (table, column, value), strongest first"""
+        best = {}
+        for hit in hits:
+            key = (hit.table, hit.column, hit.value)
+            if key not in best or hit.score > best[key].score:
+                best[key] = hit
+        return sorted(best.values(), key=lambda h: -h.score)[:MAX_HITS]
     
     def is_relevant(self, question: str) -> tuple:
-        """Check if question refers to actual data in database"""
+        """Check if question refers to actual data in database
+        
+        Returns (is_relevant, score, info, hits) where hits are RelevanceHit
+        records naming the tables, columns and stored values the question matched.
+        While the inventory is still building, questions it cannot place are
+        allowed or rejected according to config.INVENTORY_PARTIAL_FALLBACK.
+        """
+        complete = self.complete
+        # Encode before taking the lock: a slow model call must not block the build and other readers
+        question_embedding = self.model.encode([question.lower().strip()])[0]
+        with self._lock:
+            result = self._check(question, question_embedding)
+        if complete or result[0]:
+            return result
+        
+        building = f"Data inventory still building ({self.status()})"
+        if config.INVENTORY_PARTIAL_FALLBACK == 'allow':
+            return True, 0.0, [f"{building}, question allowed"], []
+        return False, 0.0, [building] + result[2], []
+    
+    def _check(self, question: str, question_embedding: np.ndarray) -> tuple:
         question_lower = question.lower().strip()
         
         # Block obviously inappropriate content
         if any(word in question_lower for word in ['fuck', 'shit', 'damn', 'hell', 'ass']):
-            return False, 0.0, ["Inappropriate question"]
+            return False, 0.0, ["Inappropriate question"], []
         
         # Check for exact or partial matches with actual data
-        exact_matches = []
-        partial_matches = []
+        exact_ids = []
+        partial_ids = []
         
         # Split question into potential search terms
         question_words = question_lower.split()
@@ -159,55 +466,68 @@ class SchemaEmbeddings:
         # Check all possible terms from question
         search_terms = [question_lower] + question_words + question_pairs
         
+        values = self.data_inventory['values']
         for term in search_terms:
             if len(term) > 1:  # Skip single characters
-                for value in self.data_inventory['all_values']:
-                    # Exact match
-                    if term == value:
-                        exact_matches.append(value)
-                    # Partial match (term in value or value in term)
-                    elif term in value or value in term:
-                        partial_matches.append(value)
+                # Exact match (whole value, or whole words inside a value)
+                found = values.find_exact(term, limit=3)
+                if found:
+                    exact_ids.extend(found)
+                else:
+                    # Partial match (term inside a value's token)
+                    partial_ids.extend(values.find_partial(term, limit=3))
+        
+        # Values inside the question: exact when the whole value was typed
+        for value_id in values.values_in(question_lower):
+            if value_id not in exact_ids:
+                partial_ids.append(value_id)
+        
+        exact_matches = [values.strings[i] for i in dict.fromkeys(exact_ids)]
+        partial_matches = [values.strings[i] for i in dict.fromkeys(partial_ids)]
         
         # Check for table/column references
         schema_matches = []
+        schema_hits = []
         for table in self.data_inventory['tables']:
             if table.lower() in question_lower:
                 schema_matches.append(f"table:{table}")
+                schema_hits.append(RelevanceHit(table, None, None, 1.0))
         
-        for col_list in self.data_inventory['columns'].values():
+        for table, col_list in self.data_inventory['columns'].items():
             for col in col_list:
                 if col.lower() in question_lower:
                     schema_matches.append(f"column:{col}")
+                    schema_hits.append(RelevanceHit(table, col, None, 1.0))
         
         # Decision logic
         if exact_matches:
-            return True, 1.0, [f"Found exact match: {', '.join(list(set(exact_matches))[:3])}"]
+            # Values typed in full outrank values that merely contain the typed words
+            typed = [i for i in dict.fromkeys(exact_ids) if values.strings[i] in question_lower]
+            contained = [i for i in dict.fromkeys(exact_ids) if i not in typed]
+            hits = self._value_hits(typed, 1.0) + self._value_hits(contained, 0.9) + schema_hits
+            return True, 1.0, [f"Found exact match: {', '.join(exact_matches[:3])}"], self._dedupe_hits(hits)
         
         if partial_matches and schema_matches:
             # Both partial data match and schema reference
-            return True, 0.8, [f"Found: {', '.join(list(set(partial_matches))[:3])}"]
+            hits = self._value_hits(dict.fromkeys(partial_ids), 0.8) + schema_hits
+            return True, 0.8, [f"Found: {', '.join(partial_matches[:3])}"], self._dedupe_hits(hits)
         
         if schema_matches:
             # Only schema mentioned, use semantic similarity
-            question_embedding = self.model.encode([question_lower])[0]
-            
-            similarities = []
-            for emb in self.data_inventory['embeddings']:
-                sim = np.dot(question_embedding, emb) / (np.linalg.norm(question_embedding) * np.linalg.norm(emb))
-                similarities.append(sim)
+            scores, ids = self.index.search(question_embedding, k=1)
             
-            if similarities:
-                max_similarity = max(similarities)
-                best_idx = np.argmax(similarities)
-                best_match = self.data_inventory['embedded_texts'][best_idx]
+            if len(ids):
+                max_similarity = float(scores[0])
+                best_match = self.data_inventory['embedded_texts'][ids[0]]
                 
                 if max_similarity >= self.strict_threshold:
-                    return True, max_similarity, [f"Semantically similar to: {best_match}"]
+                    hits = self._text_hits(best_match, max_similarity) + schema_hits
+                    return (True, max_similarity, [f"Semantically similar to: {best_match}"],
+                            self._dedupe_hits(hits))
         
         # Nothing matched - not relevant
-        sample_values = self.data_inventory['all_values'][:10] if self.data_inventory['all_values'] else []
+        sample_values = [values.strings[i] for _, i in zip(range(10), values.value_ids())]
         return False, 0.0, [
             "Data not found in database.",
             f"Sample available data: {', '.join(sample_values)}" if sample_values else "No data available"
-        ]
\ No newline at end of file
+        ], []
@@ -1,13 +1,17 @@
 """SQL schema generation from unstructured text using AI"""
 
-import openai
+import json
+from typing import Dict, List
 import config
+from sutra.llm_cache import chat_completion
+from sutra.llm_client import BATCH, get_llm_client
 
 class SchemaGenerator:
     """Generate SQL schema from unstructured data using OpenAI"""
     
     def __init__(self, api_key: str, model_name: str = "gpt-3.5-turbo"):
-        openai.api_key = api_key
+        if api_key:
+            get_llm_client().api_key = api_key
         self.model_name = model_name
         self.temperature = config.TEMPERATURE
     
@@ -19,6 +23,11 @@ class SchemaGenerator:
             unstructured_data = unstructured_data[:config.MAX_TEXT_LENGTH]
             print(f"⚠️ Data truncated to {config.MAX_TEXT_LENGTH} characters")
         
+        # Document tables are bulk loaded separately and only named in the text
+        loaded = ""
+        if "[Table " in unstructured_data:
+            loaded = "5. Lines like [Table name (...): columns] are tables that already exist - do not create, drop or fill them\n"
+        
         prompt = f"""
 Convert this unstructured text into a SQLite database:
 
@@ -29,7 +38,7 @@ Requirements:
 2. Add foreign keys to connect related tables  
 3. Extract ALL data from the text - don't add anything not in the text
 4. Use INTEGER PRIMARY KEY AUTOINCREMENT for IDs
-
+{loaded}
 Return ONLY executable SQLite statements:
 - DROP TABLE IF EXISTS statements
 - CREATE TABLE statements with PRIMARY KEY and FOREIGN KEY
@@ -40,14 +49,54 @@ No markdown, no code blocks, just SQL.
         
         print("🔄 Generating schema via OpenAI API...")
         
-        response = openai.ChatCompletion.create(
-            model=self.model_name,
-            messages=[{"role": "user", "content": prompt}],
-            temperature=self.temperature
-        )
-        
-        generated_schema = response['choices'][0]['message']['content'].strip()
+        # Queued behind interactive questions sharing the client
+        generated_schema = chat_completion(self.model_name, prompt, self.temperature, priority=BATCH).strip()
         generated_schema = generated_schema.replace('```sql', '').replace('```', '').strip()
         
         print("✅ Schema generated!")
-        return generated_schema
\ No newline at end of file
+        return generated_schema
+    
+    def generate_rows(self, unstructured_data: str, schema: str) -> Dict[str, List[dict]]:
+        """Extract a new document's rows for an existing schema: {table: [{column: value}]}"""
+        
+        if len(unstructured_data) > config.MAX_TEXT_LENGTH:
+            unstructured_data = unstructured_data[:config.MAX_TEXT_LENGTH]
+            print(f"⚠️ Data truncated to {config.MAX_TEXT_LENGTH} characters")
+        
+        prompt = f"""
+Extract the data in this text as rows for an existing database:
+
+{unstructured_data}
+
+Existing schema:
+{schema}
+
+Requirements:
+1. Use only the tables and columns above - do not create or change tables
+2. Extract ALL data from the text - don't add anything not in the text
+3. Leave out id primary keys, they are assigned on insert
+4. Give a foreign key as an object with the referenced row's identifying columns, e.g. "customer_id": {{"name": "John Smith"}}
+5. Include referenced rows in their own table too, even if they may already be stored
+
+Return ONLY a JSON object mapping each table name to a list of rows (objects of column: value).
+
+No markdown, no code blocks, just JSON.
+"""
+        
+        print("🔄 Extracting rows via OpenAI API...")
+        
+        response = chat_completion(self.model_name, prompt, self.temperature, priority=BATCH).strip()
+        response = response.replace('```json', '').replace('```', '').strip()
+        try:
+            rows = json.loads(response)
+        except ValueError as e:
+            print(f"❌ Could not parse extracted rows: {e}")
+            return {}
+        if not isinstance(rows, dict):
+            print("❌ Extracted rows are not a JSON object of tables")
+            return {}
+        
+        rows = {table: [row for row in table_rows if isinstance(row, dict)]
+                for table, table_rows in rows.items() if isinstance(table_rows, list)}
+        print(f"✅ Extracted {sum(len(r) for r in rows.values())} rows for {len(rows)} tables")
+        return rows
@@ -0,0 +1,176 @@
+"""HTTP service answering questions with warm per-database state
+
+    pip install fastapi uvicorn
+    python -m sutra.service --preload sample
+
+Each database gets a DatabaseContext (connection, data inventory, feedback
+matcher, query / result caches), loaded on its first request and shared by
+later ones; a ContextPool keeps the most recently used databases warm.
+Endpoints are plain functions, so FastAPI runs them on its worker threads; the
+shared state underneath is guarded by locks and the LLM call runs outside
+them, so requests for slow questions do not queue behind each other. Every
+answer carries its per-stage timings.
+
+    POST /query     {"database": "sample", "question": "how many orders are pending"}
+    POST /feedback  {"database": "sample", "question": ..., "sql": ..., "good": true}
+    GET  /databases, /health, /metrics (Prometheus text)
+    POST /databases/{name}/refresh, DELETE /databases/{name}
+"""
+
+import argparse
+import json
+import sys
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Optional
+import config
+from sutra.context import ContextPool, available_databases
+from sutra.metrics import metrics
+
+try:
+    from fastapi import FastAPI, HTTPException
+    from fastapi.responses import PlainTextResponse
+    from pydantic import BaseModel
+    FASTAPI_AVAILABLE = True
+except ImportError:
+    FASTAPI_AVAILABLE = False
+
+
+def stage_timings(trace: dict) -> Dict[str, float]:
+    """Milliseconds per stage name in a trace (repeated stages are summed)"""
+    timings = defaultdict(float)
+    for entry in trace['stages']:
+        timings[entry['stage']] += entry['ms']
+    return {stage: round(ms, 3) for stage, ms in timings.items()}
+
+
+if FASTAPI_AVAILABLE:
+    class QueryRequest(BaseModel):
+        database: str
+        question: str
+        max_rows: Optional[int] = None
+
+    class FeedbackRequest(BaseModel):
+        database: str
+        question: str
+        sql: str
+        good: bool
+        corrected_sql: str = ''
+
+
+def create_app(pool: Optional[ContextPool] = None) -> 'FastAPI':
+    """FastAPI application over a pool of database contexts"""
+    if not FASTAPI_AVAILABLE:
+        raise ImportError("Service mode needs fastapi: pip install fastapi uvicorn")
+    pool = pool or ContextPool()
+    app = FastAPI(title='NLP to SQL')
+    app.state.pool = pool
+
+    @contextmanager
+    def database(name: str):
+        try:
+            ctx = pool.acquire(name)
+        except KeyError:
+            raise HTTPException(status_code=404, detail=f"Unknown database: {name}")
+        except Exception as e:
+            raise HTTPException(status_code=503, detail=f"Could not load {name}: {e}")
+        try:
+            yield ctx
+        finally:
+            pool.release(ctx)
+
+    @app.get('/health')
+    def health():
+        return {'status': 'ok', 'warm': [c['database'] for c in pool.contexts()], 'pool': pool.stats()}
+
+    @app.get('/databases')
+    def databases():
+        try:
+            available = available_databases()
+        except Exception as e:
+            raise HTTPException(status_code=503, detail=f"Could not list databases: {e}")
+        return {'available': available, 'warm': pool.contexts()}
+
+    @app.post('/query')
+    def query(request: QueryRequest):
+        with metrics.trace('request', database=request.database, question=request.question) as trace:
+            with database(request.database) as ctx:
+                result_df, sql = ctx.processor.process_question(request.question)
+
+        max_rows = request.max_rows or config.SERVICE_MAX_ROWS
+        response = {'database': request.database, 'question': request.question, 'sql': sql,
+                    'relevant': bool(sql), 'columns': [], 'rows': [], 'row_count': 0, 'truncated': False,
+                    'timings': stage_timings(trace), 'outcomes': trace['outcomes'],
+                    'counters': trace.get('counters', {}),
+                    'total_ms': trace['total_ms']}
+        if result_df is not None:
+            response.update(columns=[str(c) for c in result_df.columns],
+                            rows=json.loads(result_df.head(max_rows).to_json(orient='values', date_format='iso')),
+                            row_count=len(result_df), truncated=len(result_df) > max_rows)
+        elif sql:
+            response['error'] = 'Query failed'
+        return response
+
+    @app.post('/feedback')
+    def feedback(request: FeedbackRequest):
+        with database(request.database) as ctx:
+            ctx.processor.feedback.save(request.question, request.sql, request.good, request.corrected_sql)
+            if request.good or request.corrected_sql:
+                ctx.feedback_matcher.reload_feedback()
+        return {'saved': True}
+
+    @app.get('/metrics', response_class=PlainTextResponse)
+    def prometheus():
+        return metrics.prometheus_text()
+
+    @app.post('/databases/{name}/refresh')
+    def refresh(name: str):
+        pool.evict(name)
+        with database(name) as ctx:
+            return ctx.info()
+
+    @app.delete('/databases/{name}')
+    def evict(name: str):
+        return {'database': name, 'evicted': pool.evict(name)}
+
+    @app.on_event('shutdown')
+    def shutdown():
+        pool.close()
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve questions over HTTP with warm per-database state')
+    parser.add_argument('--host', default=config.SERVICE_HOST)
+    parser.add_argument('--port', type=int, default=config.SERVICE_PORT)
+    parser.add_argument('--preload', nargs='*', default=[], help='Databases to warm before serving')
+    parser.add_argument('--max-databases', type=int, help='Warm databases kept loaded (LRU)')
+    parser.add_argument('--metrics-out', type=str, help='Write a JSON line per request to this file')
+    args = parser.parse_args()
+
+    if not FASTAPI_AVAILABLE:
+        print("❌ Service mode needs fastapi and uvicorn: pip install fastapi uvicorn")
+        return 1
+    try:
+        import uvicorn
+    except ImportError:
+        print("❌ Service mode needs uvicorn: pip install uvicorn")
+        return 1
+
+    config.ensure_dirs()
+    if args.metrics_out:
+        metrics.jsonl_path = Path(args.metrics_out)
+    pool = ContextPool(args.max_databases)
+    for name in args.preload:
+        with pool.use(name):
+            pass
+
+    # One process: the warm state lives in memory and is shared by worker threads
+    uvicorn.run(create_app(pool), host=args.host, port=args.port, workers=1)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,249 @@
+"""Local validation of generated SQL against the database schema
+
+    validator = SQLValidator(db)
+    validator.check("SELECT nme FROM customers")  # 'no such column: nme (did you mean name?)'
+
+Runs before a query reaches the database: the SQL must be one read-only
+statement, tables in FROM / JOIN clauses must exist, and qualified columns
+(alias.column) must exist in their table. On SQLite the statement is then
+compiled without running it (EXPLAIN), which catches unqualified columns,
+unknown functions and syntax errors. Table and column names are read once
+per DatabaseManager.schema_version.
+"""
+
+import re
+from difflib import get_close_matches
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+TOKEN = re.compile(
+    r"""'(?:[^']|'')*'|"(?:[^"]|"")*"|`[^`]*`|\[[^\]]*\]|[A-Za-z_][\w$]*|\d+(?:\.\d*)?(?:e[-+]?\d+)?|\.\d+"""
+    r"""|<=|>=|<>|!=|\|\||::|\S""",
+    re.IGNORECASE,
+)
+COMMENT = re.compile(r"--[^\n]*|/\*.*?\*/", re.DOTALL)
+
+# Words after which a FROM clause's table list is over
+CLAUSE_END = {
+    'where', 'group', 'order', 'having', 'limit', 'union', 'except', 'intersect', 'window', 'on', 'using',
+    'join', 'inner', 'left', 'right', 'full', 'outer', 'cross', 'natural', 'offset', 'fetch', 'for',
+}
+NOT_ALIAS = CLAUSE_END | {'as', 'select', 'from', 'with', 'lateral'}
+
+
+class InvalidSQLError(ValueError):
+    """Raised when generated SQL still fails validation after the repair call"""
+
+    def __init__(self, sql: str, error: str):
+        super().__init__(error)
+        self.sql = sql
+        self.error = error
+
+
+class Token(NamedTuple):
+    text: str
+    name: Optional[str]  # Identifier without quotes (None for literals and punctuation)
+    quoted: bool
+
+
+def tokenize(sql: str) -> List[Token]:
+    """Identifiers, literals and punctuation of a statement (comments dropped)"""
+    tokens = []
+    for text in TOKEN.findall(COMMENT.sub(' ', sql)):
+        if text[0] in '"`[':
+            tokens.append(Token(text, text[1:-1].replace('""', '"'), True))
+        elif text[0].isalpha() or text[0] == '_':
+            tokens.append(Token(text, text, False))
+        else:
+            tokens.append(Token(text, None, False))
+    return tokens
+
+
+class SQLReferences(NamedTuple):
+    tables: List[str]              # Names in FROM / JOIN clauses
+    aliases: Dict[str, str]        # Lowercase alias -> table name
+    derived: Set[str]              # Lowercase CTE names and subquery aliases
+    columns: List[Tuple[str, str]]  # (qualifier, column) of qualified references
+
+
+def _keyword(token: Token, *words: str) -> bool:
+    return token.name is not None and not token.quoted and token.name.lower() in words
+
+
+def references(sql: str) -> SQLReferences:
+    """Tables, aliases and qualified columns a statement refers to"""
+    tokens = tokenize(sql)
+    tables, aliases, derived, columns = [], {}, set(), []
+    queries = [True]   # Per open parenthesis: does it hold a query (not an expression)?
+    in_from = [False]  # Per open parenthesis: inside a FROM clause's table list?
+
+    def at(index: int) -> Token:
+        return tokens[index] if index < len(tokens) else Token('', None, False)
+
+    def alias_at(index: int) -> Tuple[Optional[str], int]:
+        """Alias after a table reference: [AS] name"""
+        if _keyword(at(index), 'as'):
+            index += 1
+        token = at(index)
+        if token.name and (token.quoted or token.name.lower() not in NOT_ALIAS):
+            return token.name, index + 1
+        return None, index
+
+    position = 0
+    while position < len(tokens):
+        token = tokens[position]
+        lowered = token.name.lower() if token.name and not token.quoted else None
+
+        if token.text == '(':
+            queries.append(_keyword(at(position + 1), 'select', 'with', 'values'))
+            in_from.append(False)
+            position += 1
+            continue
+        if token.text == ')':
+            subquery = queries.pop() if len(queries) > 1 else False
+            if len(in_from) > 1:
+                in_from.pop()
+            position += 1
+            if subquery and in_from[-1]:
+                # Subquery in FROM: its alias names a derived table
+                alias, position = alias_at(position)
+                if alias:
+                    derived.add(alias.lower())
+            continue
+
+        # CTE: name AS (SELECT ...)
+        if token.name and _keyword(at(position + 1), 'as') and at(position + 2).text == '(':
+            derived.add(token.name.lower())
+
+        if queries[-1] and (lowered in ('from', 'join') or (token.text == ',' and in_from[-1])):
+            in_from[-1] = True
+            index = position + 1
+            if at(index).name and (at(index).quoted or at(index).name.lower() not in NOT_ALIAS):
+                name = at(index).name
+                index += 1
+                while at(index).text == '.' and at(index + 1).name:
+                    name = at(index + 1).name  # schema.table: keep the table
+                    index += 2
+                if at(index).text != '(':  # Table-valued functions are not tables
+                    tables.append(name)
+                    alias, index = alias_at(index)
+                    if alias:
+                        aliases[alias.lower()] = name
+                position = index
+                continue
+            position += 1
+            continue
+
+        if queries[-1] and lowered in CLAUSE_END:
+            # LEFT / INNER ... precede a JOIN; other words end the table list
+            in_from[-1] = lowered in ('inner', 'left', 'right', 'full', 'outer', 'cross', 'natural')
+
+        if token.name and at(position + 1).text == '.' and at(position + 2).name and \
+                (position == 0 or tokens[position - 1].text != '.'):
+            qualifier, column = token.name, at(position + 2).name
+            index = position + 3
+            if at(index).text == '.' and at(index + 1).name:
+                qualifier, column = column, at(index + 1).name  # schema.table.column
+                index += 2
+            if at(index).text != '(':  # Not a schema-qualified function
+                columns.append((qualifier, column))
+            position = index
+            continue
+
+        position += 1
+    return SQLReferences(tables, aliases, derived, columns)
+
+
+def _suggest(name: str, candidates) -> str:
+    close = get_close_matches(name.lower(), [c.lower() for c in candidates], n=1, cutoff=0.6)
+    if not close:
+        return ''
+    original = next(c for c in candidates if c.lower() == close[0])
+    return f" (did you mean {original}?)"
+
+
+def statement_error(sql: str) -> Optional[str]:
+    """Problem with the statement as a whole, if any"""
+    tokens = tokenize(sql)
+    if not tokens:
+        return "empty query"
+    while tokens[-1].text == ';':
+        tokens.pop()
+        if not tokens:
+            return "empty query"
+    if any(t.text == ';' for t in tokens):
+        return "more than one statement"
+    if not _keyword(tokens[0], 'select', 'with'):
+        return f"only SELECT queries can be run, got {tokens[0].text}"
+    return None
+
+
+class SQLValidator:
+    """Check SQL against the database schema without running it"""
+
+    def __init__(self, db_manager):
+        self.db = db_manager
+        self._schema: Tuple[int, Dict[str, Tuple[str, Set[str]]]] = (-1, {})
+
+    @property
+    def schema(self) -> Dict[str, Tuple[str, Set[str]]]:
+        """Lowercase table name -> (table, lowercase column names)"""
+        if self._schema[0] != self.db.schema_version:
+            version = self.db.schema_version
+            schema = {}
+            for table in self.db.get_tables():
+                schema[table.lower()] = (table, {c.lower() for c in self.db.get_columns(table)})
+            self._schema = (version, schema)
+        return self._schema[1]
+
+    def _reference_error(self, refs: SQLReferences) -> Optional[str]:
+        schema = self.schema
+        names = [table for table, _ in schema.values()]
+        for table in refs.tables:
+            if table.lower() not in schema and table.lower() not in refs.derived:
+                return f"no such table: {table}{_suggest(table, names)}"
+
+        for qualifier, column in refs.columns:
+            key = qualifier.lower()
+            if key in refs.derived:
+                continue
+            table = refs.aliases.get(key, qualifier).lower()
+            if table not in schema:
+                if table in refs.derived:
+                    continue
+                return f"no such table or alias: {qualifier}{_suggest(qualifier, names + list(refs.aliases))}"
+            table_columns = schema[table][1]
+            if column.lower() not in table_columns:
+                return f"no such column: {qualifier}.{column}{_suggest(column, sorted(table_columns))}"
+        return None
+
+    def _compile_error(self, sql: str, refs: SQLReferences) -> Optional[str]:
+        """SQLite's own error for the statement, prepared but not run"""
+        try:
+            with self.db.lock:
+                cursor = self.db.conn.cursor()
+                try:
+                    cursor.execute(f"EXPLAIN {sql}")
+                finally:
+                    cursor.close()
+        except Exception as e:
+            error = str(e)
+            missing = re.match(r"no such column: (\w+)$", error)
+            if missing:
+                known = set()
+                for table in refs.tables:
+                    known |= self.schema.get(table.lower(), ('', set()))[1]
+                error += _suggest(missing.group(1), sorted(known))
+            return error
+        return None
+
+    def check(self, sql: str) -> Optional[str]:
+        """Error message for invalid SQL, None when it looks runnable"""
+        sql = sql.strip().rstrip(';').strip()
+        error = statement_error(sql)
+        if error:
+            return error
+        refs = references(sql)
+        error = self._reference_error(refs)
+        if error is None and self.db.db_type == 'sqlite':
+            error = self._compile_error(sql, refs)
+        return error
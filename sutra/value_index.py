@@ -0,0 +1,302 @@
+"""Compact index of database values: interned strings, column postings and token lookup"""
+
+import re
+from array import array
+from bisect import bisect_right
+from typing import Dict, Iterable, List, Optional
+import numpy as np
+
+# Delimiters used to split values into searchable tokens
+TOKEN_SPLIT = re.compile(r"[,;|/\\\-_.:\s]+")
+PART_SPLIT = re.compile(r"[,;|/\\\-_.:\n\t]")
+
+# Tokens shared by more values than this are too common to drive candidate lookups
+MAX_TOKEN_CANDIDATES = 5000
+
+# Later additions wait in a per-key overflow until it reaches this fraction of the CSR arrays
+OVERFLOW_FRACTION = 0.25
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase tokens of a value, skipping single characters"""
+    return [t for t in TOKEN_SPLIT.split(text.lower()) if len(t) > 1]
+
+
+def _unique_pairs(pairs_key, pairs_val):
+    """(key, value) pairs without duplicates, ordered by key then value"""
+    keys = np.frombuffer(pairs_key, dtype=np.int32) if len(pairs_key) else np.zeros(0, dtype=np.int32)
+    vals = np.frombuffer(pairs_val, dtype=np.int32) if len(pairs_val) else np.zeros(0, dtype=np.int32)
+    if len(keys):
+        pairs = np.unique((keys.astype(np.int64) << 32) | vals.astype(np.int64))
+        keys = (pairs >> 32).astype(np.int32)
+        vals = (pairs & 0xFFFFFFFF).astype(np.int32)
+    return keys, vals
+
+
+def _csr(pairs_key: array, pairs_val: array, size: int):
+    """Group (key, value) pairs into CSR arrays: values of key k are vals[offsets[k]:offsets[k+1]]"""
+    keys, vals = _unique_pairs(pairs_key, pairs_val)
+    counts = np.bincount(keys, minlength=size) if len(keys) else np.zeros(size, dtype=np.int64)
+    offsets = np.zeros(size + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    return offsets, vals
+
+
+class ValueIndex:
+    """Interned string table with value->column postings and a token->value index
+
+    Every distinct lowercase string gets an integer id. Full column values are
+    flagged and carry postings (which columns contain them); tokens map to the
+    full values that contain them, so substring questions are answered by
+    lookups instead of materializing every part and word pair.
+    """
+
+    def __init__(self):
+        self.strings: List[str] = []
+        self.ids: Dict[str, int] = {}
+        self.originals: Dict[int, str] = {}  # Original casing of full values, when it differs
+        self.column_keys: List[str] = []
+        self.column_ids: Dict[str, int] = {}
+        self.value_flags = bytearray()       # 1 if the string is a full column value
+
+        self._pending_postings = (array('i'), array('i'))  # (string id, column id)
+        self._pending_tokens = (array('i'), array('i'))    # (token id, value id)
+        self.posting_offsets = np.zeros(1, dtype=np.int64)
+        self.posting_columns = np.zeros(0, dtype=np.int32)
+        self.token_offsets = np.zeros(1, dtype=np.int64)
+        self.token_values = np.zeros(0, dtype=np.int32)
+        # Pairs added after the CSR arrays were built: key -> sorted values not in the arrays
+        self._overflow: Dict[str, Dict[int, np.ndarray]] = {'posting': {}, 'token': {}}
+        self._vocab_blob: Optional[str] = None
+        self._vocab_starts: List[int] = []
+        self._vocab_ids: List[int] = []
+
+    def __len__(self):
+        return len(self.strings)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # Vocabulary search blob is derived data, rebuilt on demand
+        state['_vocab_blob'] = None
+        state['_vocab_starts'] = []
+        state['_vocab_ids'] = []
+        return state
+
+    def __setstate__(self, state):
+        state.setdefault('_overflow', {'posting': {}, 'token': {}})  # Pickled before the overflow existed
+        self.__dict__.update(state)
+
+    def intern(self, text: str) -> int:
+        """Id of a string, adding it to the table if new"""
+        string_id = self.ids.get(text)
+        if string_id is None:
+            string_id = len(self.strings)
+            self.strings.append(text)
+            self.ids[text] = string_id
+            self.value_flags.append(0)
+        return string_id
+
+    def column_id(self, column_key: str) -> int:
+        column_id = self.column_ids.get(column_key)
+        if column_id is None:
+            column_id = len(self.column_keys)
+            self.column_keys.append(column_key)
+            self.column_ids[column_key] = column_id
+        return column_id
+
+    def add_value(self, value: str, column_key: str, expanded: bool = False) -> int:
+        """Record a full value of a column; expanded also interns parts and word pairs"""
+        original = value.strip()
+        lower = original.lower()
+        value_id = self.intern(lower)
+        self.value_flags[value_id] = 1
+        if original != lower:
+            self.originals.setdefault(value_id, original)
+
+        column = self.column_id(column_key)
+        self._pending_postings[0].append(value_id)
+        self._pending_postings[1].append(column)
+
+        tokens = tokenize(lower)
+        for token in tokens:
+            token_id = self.intern(token)
+            self._pending_tokens[0].append(token_id)
+            self._pending_tokens[1].append(value_id)
+
+        if expanded:
+            # Legacy behaviour: every delimiter part, word and in-part word pair is its own string
+            for part in PART_SPLIT.split(lower):
+                part = part.strip()
+                if len(part) < 2:
+                    continue
+                words = part.split()
+                extra = [part] + [w for w in words if len(w) > 1]
+                extra += [f"{words[i]} {words[i + 1]}" for i in range(len(words) - 1)]
+                for text in extra:
+                    self._pending_postings[0].append(self.intern(text))
+                    self._pending_postings[1].append(column)
+        return value_id
+
+    def finalize(self):
+        """Merge pending additions into the postings and token index
+
+        Small additions (incremental appends) go to a per-key overflow, so they
+        cost O(new); the CSR arrays are rebuilt only once the overflow reaches
+        OVERFLOW_FRACTION of them, which keeps the amortized cost linear.
+        """
+        size = len(self.strings)
+        for name, attr_offsets, attr_values, pending in (
+            ('posting', 'posting_offsets', 'posting_columns', self._pending_postings),
+            ('token', 'token_offsets', 'token_values', self._pending_tokens),
+        ):
+            old_offsets = getattr(self, attr_offsets)
+            old_values = getattr(self, attr_values)
+            overflow = self._overflow[name]
+            waiting = len(pending[0]) + sum(len(v) for v in overflow.values())
+
+            if waiting > len(old_values) * OVERFLOW_FRACTION:
+                keys, vals = array('i'), array('i')
+                if len(old_values):
+                    counts = np.diff(old_offsets)
+                    keys.frombytes(np.repeat(np.arange(len(counts), dtype=np.int32), counts).tobytes())
+                    vals.frombytes(old_values.astype(np.int32).tobytes())
+                for key, extra in overflow.items():
+                    keys.extend([key] * len(extra))
+                    vals.frombytes(extra.astype(np.int32).tobytes())
+                keys.extend(pending[0])
+                vals.extend(pending[1])
+                offsets, values = _csr(keys, vals, size)
+                setattr(self, attr_offsets, offsets)
+                setattr(self, attr_values, values)
+                overflow.clear()
+            elif len(pending[0]):
+                keys, vals = _unique_pairs(pending[0], pending[1])
+                starts = np.concatenate([[0], np.flatnonzero(np.diff(keys)) + 1, [len(keys)]])
+                for start, end in zip(starts[:-1], starts[1:]):
+                    key = int(keys[start])
+                    new = vals[start:end]
+                    if key + 1 < len(old_offsets):
+                        new = np.setdiff1d(new, old_values[old_offsets[key]:old_offsets[key + 1]], assume_unique=True)
+                    if key in overflow:
+                        new = np.union1d(overflow[key], new)
+                    if len(new):
+                        overflow[key] = new.astype(np.int32)
+            del pending[0][:]
+            del pending[1][:]
+        self._vocab_blob = None
+        return self
+
+    def _lookup(self, name: str, offsets: np.ndarray, values: np.ndarray, key: int) -> np.ndarray:
+        found = values[offsets[key]:offsets[key + 1]] if key + 1 < len(offsets) else np.zeros(0, dtype=np.int32)
+        extra = self._overflow[name].get(key)
+        return found if extra is None else np.concatenate([found, extra])
+
+    # ----- Lookups -----
+
+    def get(self, text: str) -> Optional[int]:
+        return self.ids.get(text)
+
+    def is_value(self, string_id: int) -> bool:
+        return bool(self.value_flags[string_id])
+
+    def value_ids(self) -> Iterable[int]:
+        return (i for i, flag in enumerate(self.value_flags) if flag)
+
+    def original(self, string_id: int) -> str:
+        """Value as stored in the database"""
+        return self.originals.get(string_id, self.strings[string_id])
+
+    def columns_for(self, string_id: int) -> List[str]:
+        """'table.column' keys whose values contain this string"""
+        cols = self._lookup('posting', self.posting_offsets, self.posting_columns, string_id)
+        return [self.column_keys[c] for c in cols]
+
+    def values_with_token(self, token_id: int) -> np.ndarray:
+        return self._lookup('token', self.token_offsets, self.token_values, token_id)
+
+    def _candidates(self, tokens: List[str]) -> np.ndarray:
+        """Full values containing all the given tokens"""
+        result = None
+        for token in tokens:
+            token_id = self.ids.get(token)
+            if token_id is None:
+                return np.zeros(0, dtype=np.int32)
+            values = self.values_with_token(token_id)
+            result = values if result is None else np.intersect1d(result, values, assume_unique=True)
+            if not len(result):
+                break
+        return result if result is not None else np.zeros(0, dtype=np.int32)
+
+    def find_exact(self, term: str, limit: int = 50) -> List[int]:
+        """Values equal to the term or containing it as whole words"""
+        term = term.strip().lower()
+        term_id = self.ids.get(term)
+        if term_id is not None and (self.is_value(term_id) or self.columns_for(term_id)):
+            # Full value, or a part/word pair interned by an expanded inventory
+            return [term_id]
+
+        tokens = tokenize(term)
+        if not tokens:
+            return []
+
+        candidates = self._candidates(tokens)
+        if len(tokens) == 1:
+            return candidates[:limit].tolist()
+
+        needle = f" {' '.join(tokens)} "
+        found = []
+        for value_id in candidates:
+            if needle in f" {' '.join(tokenize(self.strings[value_id]))} ":
+                found.append(int(value_id))
+                if len(found) >= limit:
+                    break
+        return found
+
+    def _vocabulary(self):
+        if self._vocab_blob is None:
+            token_ids = np.flatnonzero(np.diff(self.token_offsets) > 0) if len(self.token_offsets) > 1 else []
+            if self._overflow['token']:
+                token_ids = np.union1d(token_ids, list(self._overflow['token']))
+            parts, starts, position = [], [], 1
+            for token_id in token_ids:
+                starts.append(position)
+                parts.append(self.strings[token_id])
+                position += len(self.strings[token_id]) + 1
+            self._vocab_ids = [int(t) for t in token_ids]
+            self._vocab_starts = starts
+            self._vocab_blob = '\n' + '\n'.join(parts) + '\n'
+        return self._vocab_blob
+
+    def find_partial(self, term: str, limit: int = 50) -> List[int]:
+        """Values with a token that contains the term as a substring"""
+        term = term.strip().lower()
+        if len(term) < 2 or '\n' in term:
+            return []
+
+        blob = self._vocabulary()
+        found: List[int] = []
+        position = blob.find(term)
+        while position != -1 and len(found) < limit:
+            index = bisect_right(self._vocab_starts, position) - 1
+            if index >= 0:
+                for value_id in self.values_with_token(self._vocab_ids[index])[:limit]:
+                    found.append(int(value_id))
+                # Skip to the next token
+                next_start = self._vocab_starts[index + 1] if index + 1 < len(self._vocab_starts) else len(blob)
+                position = blob.find(term, next_start)
+            else:
+                position = blob.find(term, position + 1)
+        return list(dict.fromkeys(found))[:limit]
+
+    def values_in(self, text: str) -> List[int]:
+        """Full values that appear as substrings of the text"""
+        text = text.lower()
+        candidates = set()
+        for token in set(tokenize(text)):
+            token_id = self.ids.get(token)
+            if token_id is None:
+                continue
+            values = self.values_with_token(token_id)
+            if len(values) <= MAX_TOKEN_CANDIDATES:
+                candidates.update(int(v) for v in values)
+        return [v for v in candidates if self.strings[v] in text]
@@ -1,29 +1,42 @@
 """Data visualization utilities"""
 
-import matplotlib.pyplot as plt
-import seaborn as sns
-import pandas as pd
+from typing import List, Optional
 import numpy as np
-import plotly.express as px  # Fixed typo: was "plotyly"
 import pandas as pd
-import numpy as np
+import plotly.express as px  # Fixed typo: was "plotyly"
+import streamlit as st
+import config
+from sutra.downsample import reduce_points
 
 class DataVisualizer:
-    """Create visualizations from query results using Plotly and Streamlit"""
+    """Create visualizations from query results using Plotly and Streamlit
+    
+    Results larger than the point budget are reduced before plotting:
+    histograms and bar / pie sums are aggregated (in the database when the
+    SQL and a DatabaseManager are given, otherwise in pandas), line charts are
+    LTTB-downsampled and scatter plots keep the min / max point per x bucket.
+    Reduced charts say so in their subtitle.
+    """
     
-    def __init__(self):
+    def __init__(self, db_manager=None, point_budget: Optional[int] = None, bins: Optional[int] = None):
         """Initialize the visualizer with default settings"""
         self.chart_height = 400
         self.color_palette = px.colors.qualitative.Plotly
+        self.db = db_manager
+        self.point_budget = point_budget or config.VIZ_POINT_BUDGET
+        self.bins = bins or config.VIZ_HISTOGRAM_BINS
+        self.sql = None
     
-    def visualize(self, df: pd.DataFrame, query: str = ""):
+    def visualize(self, df: pd.DataFrame, query: str = "", sql: Optional[str] = None):
         """
         Auto-detect and render best visualization for query results
         
         Args:
             df: DataFrame containing query results
             query: Original query string for context
+            sql: SQL that produced df, for aggregating large results in the database
         """
+        self.sql = sql
         if df is None or df.empty:
             st.warning("No data available for visualization.")
             return
@@ -62,7 +75,7 @@ class DataVisualizer:
         """Handle visualization for single column data"""
         if col in num_cols:
             st.info("Histogram of given single numerical dataset")
-            fig = px.histogram(df, x=col, title=f"Distribution of {col}")
+            fig = self._histogram(df, col, title=f"Distribution of {col}")
             st.plotly_chart(fig, use_container_width=True)
     
     def _visualize_two_columns(self, df: pd.DataFrame, num_cols: list, cat_cols: list):
@@ -76,14 +89,14 @@ class DataVisualizer:
             if chart_type == "Scatter":
                 x_col = st.selectbox("X-axis", num_cols, key="x_scatter")
                 y_col = st.selectbox("Y-axis", num_cols, key="y_scatter")
-                fig = px.scatter(df, x=x_col, y=y_col, title=f"{y_col} vs {x_col}")
+                fig = self._scatter(df, x_col, y_col, title=f"{y_col} vs {x_col}")
             elif chart_type == "Line":
                 x_col = st.selectbox("X-axis", num_cols, key="x_line")
                 y_col = st.selectbox("Y-axis", num_cols, key="y_line")
-                fig = px.line(df, x=x_col, y=y_col, title=f"{y_col} Trend by {x_col}")
+                fig = self._line(df, x_col, y_col, title=f"{y_col} Trend by {x_col}")
             elif chart_type == "Histogram":
                 num_col = st.selectbox("Numerical Column", num_cols, key="hist_col")
-                fig = px.histogram(df, x=num_col, title=f"Distribution of {num_col}")
+                fig = self._histogram(df, num_col, title=f"Distribution of {num_col}")
 
         elif len(num_cols) == 1 and len(cat_cols) == 1:  # One numerical, one categorical
             chart_options = ["Bar", "Pie"]
@@ -92,11 +105,11 @@ class DataVisualizer:
             if chart_type == "Bar":
                 x_col = cat_cols[0]
                 y_col = num_cols[0]
-                fig = px.bar(df, x=x_col, y=y_col, title=f"{y_col} by {x_col}")
+                fig = self._bar(df, x_col, y_col, title=f"{y_col} by {x_col}")
             elif chart_type == "Pie":
                 names_col = cat_cols[0]
                 values_col = num_cols[0]
-                fig = px.pie(df, names=names_col, values=values_col, title=f"{values_col} Distribution")
+                fig = self._pie(df, names_col, values_col, title=f"{values_col} Distribution")
 
         if fig:  # Only plot if figure was created
             st.plotly_chart(fig, use_container_width=True)
@@ -120,29 +133,116 @@ class DataVisualizer:
             x_col = st.selectbox("X-axis (Categories)", cat_cols, key="x_bar")
             y_col = st.selectbox("Y-axis (Values)", num_cols, key="y_bar")
             color_col = st.selectbox("Color (optional)", [None] + all_cols, key="c_bar")
-            fig = px.bar(df, x=x_col, y=y_col, color=color_col, title=f"{y_col} by {x_col}")
+            fig = self._bar(df, x_col, y_col, color=color_col, title=f"{y_col} by {x_col}")
 
         elif chart_type == "Line":
             x_col = st.selectbox("X-axis", all_cols, key="x_line")
             y_col = st.selectbox("Y-axis", num_cols, key="y_line")
             color_col = st.selectbox("Color (optional)", [None] + all_cols, key="c_line")
-            fig = px.line(df, x=x_col, y=y_col, color=color_col, title=f"{y_col} Trend by {x_col}")
+            fig = self._line(df, x_col, y_col, color=color_col, title=f"{y_col} Trend by {x_col}")
 
         elif chart_type == "Pie":
             names_col = st.selectbox("Categories", cat_cols, key="pie_names")
             values_col = st.selectbox("Values", num_cols, key="pie_values")
-            fig = px.pie(df, names=names_col, values=values_col, title=f"{values_col} Distribution")
+            fig = self._pie(df, names_col, values_col, title=f"{values_col} Distribution")
 
         elif chart_type == "Histogram":
             num_col = st.selectbox("Numerical Column", num_cols, key="hist_col")
             color_col = st.selectbox("Color (optional)", [None] + all_cols, key="hist_color")
-            fig = px.histogram(df, x=num_col, color=color_col, title=f"Distribution of {num_col}")
+            fig = self._histogram(df, num_col, color=color_col, title=f"Distribution of {num_col}")
         
         elif chart_type == "Scatter":
             x_col = st.selectbox("X-axis", num_cols, key="x_scatter_multi")
             y_col = st.selectbox("Y-axis", num_cols, key="y_scatter_multi")
             color_col = st.selectbox("Color (optional)", [None] + all_cols, key="c_scatter")
-            fig = px.scatter(df, x=x_col, y=y_col, color=color_col, title=f"{y_col} vs {x_col}")
+            fig = self._scatter(df, x_col, y_col, color=color_col, title=f"{y_col} vs {x_col}")
 
         if fig:  # Only plot if figure was created
-            st.plotly_chart(fig, use_container_width=True)
\ No newline at end of file
+            st.plotly_chart(fig, use_container_width=True)
+    
+    # ----- Reduction for large results -----
+    
+    def _too_large(self, df: pd.DataFrame) -> bool:
+        return len(df) > self.point_budget
+    
+    def _mark_reduced(self, fig, title: str, note: str):
+        """State in the chart (and next to it) that it shows reduced data"""
+        fig.update_layout(title=f"{title}<br><sup>{note}</sup>")
+        st.caption(f"ℹ️ {note}")
+        return fig
+    
+    def _pushdown(self, color: Optional[str] = None) -> bool:
+        """Aggregate in the database: needs the SQL and a manager (and no per-colour split for histograms)"""
+        return self.db is not None and bool(self.sql) and color is None
+    
+    def _histogram(self, df: pd.DataFrame, col: str, color: Optional[str] = None, title: str = ""):
+        if not self._too_large(df):
+            return px.histogram(df, x=col, color=color, title=title)
+        
+        binned, where = None, "pandas"
+        if self._pushdown(color):
+            binned = self.db.histogram(self.sql, col, self.bins, timeout=config.QUERY_TIMEOUT_S or None)
+            where = "the database"
+        if binned is None:
+            binned, where = self._bin_counts(df, col, color), "pandas"
+        binned['bin_mid'] = (binned['bin_start'] + binned['bin_end']) / 2
+        
+        fig = px.bar(binned, x='bin_mid', y='count', color=color, title=title,
+                     labels={'bin_mid': col, 'count': 'count'})
+        fig.update_layout(bargap=0)
+        return self._mark_reduced(fig, title, f"{binned['bin_start'].nunique()} bins of {int(binned['count'].sum()):,} rows "
+                                              f"(binned in {where})")
+    
+    def _bin_counts(self, df: pd.DataFrame, col: str, color: Optional[str] = None) -> pd.DataFrame:
+        """Equal-width bin counts in pandas, with shared edges across colours"""
+        edges = np.histogram_bin_edges(df[col].dropna(), bins=self.bins)
+        frame = pd.DataFrame({'bin': pd.cut(df[col], edges, include_lowest=True, labels=False)})
+        keys = ['bin']
+        if color is not None:
+            frame[color] = df[color]
+            keys = [color, 'bin']
+        counts = frame.dropna(subset=['bin']).groupby(keys).size().reset_index(name='count')
+        counts['bin'] = counts['bin'].astype(int)
+        counts['bin_start'] = edges[counts['bin']]
+        counts['bin_end'] = edges[counts['bin'] + 1]
+        return counts
+    
+    def _group_sums(self, df: pd.DataFrame, by: List[str], value: str):
+        """Sum of value per group, from the database when possible; (frame, where)"""
+        if self._pushdown():
+            sums = self.db.group_sum(self.sql, by, value, timeout=config.QUERY_TIMEOUT_S or None)
+            if sums is not None:
+                return sums, "the database"
+        return df.groupby(by, dropna=False, as_index=False)[value].sum(), "pandas"
+    
+    def _bar(self, df: pd.DataFrame, x: str, y: str, color: Optional[str] = None, title: str = ""):
+        if not self._too_large(df):
+            return px.bar(df, x=x, y=y, color=color, title=title)
+        by = [x] if color in (None, x, y) else [x, color]
+        sums, where = self._group_sums(df, by, y)
+        fig = px.bar(sums, x=x, y=y, color=color if color in by else None, title=title)
+        return self._mark_reduced(fig, title, f"sum of {y} over {len(df):,} rows in {len(sums):,} groups "
+                                              f"(aggregated in {where})")
+    
+    def _pie(self, df: pd.DataFrame, names: str, values: str, title: str = ""):
+        if not self._too_large(df):
+            return px.pie(df, names=names, values=values, title=title)
+        sums, where = self._group_sums(df, [names], values)
+        fig = px.pie(sums, names=names, values=values, title=title)
+        return self._mark_reduced(fig, title, f"sum of {values} over {len(df):,} rows "
+                                              f"(aggregated in {where})")
+    
+    def _line(self, df: pd.DataFrame, x: str, y: str, color: Optional[str] = None, title: str = ""):
+        reduced, dropped = reduce_points(df, x, y, self.point_budget, 'lttb', group=color)
+        fig = px.line(reduced, x=x, y=y, color=color, title=title)
+        if dropped:
+            self._mark_reduced(fig, title, f"{len(reduced):,} of {len(df):,} points (LTTB downsampled)")
+        return fig
+    
+    def _scatter(self, df: pd.DataFrame, x: str, y: str, color: Optional[str] = None, title: str = ""):
+        reduced, dropped = reduce_points(df, x, y, self.point_budget, 'min_max', group=color)
+        fig = px.scatter(reduced, x=x, y=y, color=color, title=title)
+        if dropped:
+            self._mark_reduced(fig, title, f"{len(reduced):,} of {len(df):,} points "
+                                           f"(min / max per x bucket)")
+        return fig
@@ -0,0 +1,105 @@
+"""Shared fixtures: a small SQLite shop database in a temporary working directory"""
+
+import sqlite3
+import sys
+from pathlib import Path
+
+import pytest
+
+BENCHMARKS = Path(__file__).resolve().parent.parent / 'benchmarks'
+
+SHOP_SCHEMA = """
+CREATE TABLE customers (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT, email TEXT, city TEXT);
+CREATE TABLE orders (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, customer_id INTEGER, product TEXT, quantity INTEGER,
+    total REAL, order_date TEXT, FOREIGN KEY (customer_id) REFERENCES customers(id)
+);
+INSERT INTO customers (name, email, city) VALUES
+    ('John Smith', 'john.smith@email.com', 'New York'),
+    ('Sarah Johnson', 'sarah.j@company.com', 'Boston'),
+    ('Mike Davis', 'm.davis@email.com', 'New York'),
+    ('Emma Wilson', 'emma.w@tech.com', 'Boston');
+INSERT INTO orders (customer_id, product, quantity, total, order_date) VALUES
+    (1, 'laptop', 3, 2400, '2024-03-15'),
+    (2, 'monitor', 5, 1500, '2024-03-16'),
+    (3, 'keyboard', 2, 100, '2024-03-01'),
+    (1, 'printer', 1, 450, '2024-03-20');
+"""
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Run in an empty directory, with every config path under data/ moved into it
+
+    The shared feedback store is reset, and closed again if the test opened one.
+    """
+    import config
+    import sutra.feedback_store as feedback_store
+    monkeypatch.chdir(tmp_path)
+    data_dir = config.DATA_DIR
+    for name, value in list(vars(config).items()):
+        if isinstance(value, Path) and value.is_relative_to(data_dir):
+            monkeypatch.setattr(config, name, tmp_path / value.relative_to(config.BASE_DIR))
+    monkeypatch.setattr(config, 'FEEDBACK_DB', config.OUTPUT_DIR / 'feedback.db')
+    monkeypatch.setattr(config, 'EMBEDDING_SOCKET', config.OUTPUT_DIR / 'embedding.sock')
+    monkeypatch.setattr(feedback_store, '_shared_store', None)
+    yield tmp_path
+    if feedback_store._shared_store is not None:
+        feedback_store._shared_store.close()
+
+
+@pytest.fixture
+def shop_db(workdir):
+    """DatabaseManager on a SQLite file with customers and orders"""
+    from sutra.database_manager import DatabaseManager
+    db = DatabaseManager(str(workdir / 'shop.db'), db_type='sqlite', database='shop')
+    db.conn.executescript(SHOP_SCHEMA)
+    db.conn.commit()
+    yield db
+    db.close()
+
+
+@pytest.fixture
+def stub_encoder(monkeypatch):
+    """HashingEncoder from benchmarks/common.py for every model (the registry is restored on teardown)"""
+    sys.path.insert(0, str(BENCHMARKS))
+    from common import install_stub_encoder
+    from sutra import embeddings
+    monkeypatch.setattr(embeddings, '_encoders', dict(embeddings._encoders))
+    return install_stub_encoder()
+
+
+@pytest.fixture
+def processor(shop_db, stub_encoder, monkeypatch):
+    """NLPProcessor on the shop database with the hashing encoder"""
+    import config
+    from sutra.nlp_processor import NLPProcessor
+
+    monkeypatch.setattr(config, 'ANALYTICS_ENABLED', False)
+    processor = NLPProcessor(shop_db)
+    processor.relevancy_checker.wait(10)
+    processor.relevancy_checker.typed_values = lambda question: []
+    return processor
+
+
+@pytest.fixture
+def shop_files(workdir, stub_encoder, monkeypatch):
+    """Writes shop databases into config.OUTPUT_DIR, where the context pool looks them up by name"""
+    import config
+    monkeypatch.setattr(config, 'DB_TYPE', 'sqlite')
+    monkeypatch.setattr(config, 'ANALYTICS_ENABLED', False)
+    config.OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+
+    def make(name: str) -> Path:
+        path = config.OUTPUT_DIR / f"{name}.db"
+        conn = sqlite3.connect(path)
+        conn.executescript(SHOP_SCHEMA)
+        conn.close()
+        return path
+    return make
+
+
+def inventory_of(db) -> dict:
+    """Tables and columns as the data inventory lists them"""
+    tables = db.get_tables()
+    return {'tables': tables, 'columns': {table: db.get_columns(table) for table in tables}}
@@ -0,0 +1,39 @@
+import pytest
+
+from sutra.analytics import is_aggregation, to_duckdb
+
+QUERIES = [
+    "SELECT COUNT(*) AS n FROM customers WHERE name LIKE 'john%' OR city NOT LIKE '%YORK'",
+    "SELECT c.city, SUM(o.quantity) / 4 AS quarters, SUM(o.total) / 7 AS sevenths FROM orders o "
+    "JOIN customers c ON o.customer_id = c.id GROUP BY c.city ORDER BY c.city",
+    "SELECT strftime('%Y-%m', order_date) AS month, AVG(total) / 2 AS half FROM orders GROUP BY month",
+]
+
+
+def test_rewrites_outside_string_literals():
+    sql = "SELECT `city`, SUM(total) / 2 /* note */ FROM orders WHERE product LIKE 'a/b like' GROUP BY `city`;"
+    assert to_duckdb(sql) == ("SELECT \"city\", SUM(total) // 2 /* note */ FROM orders "
+                              "WHERE product ILIKE 'a/b like' GROUP BY \"city\"")
+    assert "SUM(total) / 2" in to_duckdb(sql, 'mysql')  # MySQL divides like DuckDB already
+    assert to_duckdb("SELECT strftime('%Y', d) FROM t") == "SELECT strftime(CAST(d AS TIMESTAMP), '%Y') FROM t"
+
+
+def test_only_aggregations_are_routed():
+    assert is_aggregation("SELECT city, COUNT(*) FROM customers GROUP BY city")
+    assert not is_aggregation("SELECT * FROM orders WHERE product = 'sum(x)'")
+
+
+@pytest.mark.parametrize('sql', QUERIES)
+def test_columnar_results_match_the_row_store(shop_db, workdir, sql):
+    pytest.importorskip('duckdb')
+    import pandas as pd
+    from sutra.analytics import AnalyticsEngine
+
+    engine = AnalyticsEngine(shop_db, snapshot_dir=workdir / 'snapshots', min_rows=0)
+    try:
+        engine.refresh()
+        columnar = engine.execute_query(sql)
+        assert engine.routed == 1 and engine.fallbacks == 0
+        pd.testing.assert_frame_equal(columnar, shop_db.execute_query(sql), check_dtype=False)
+    finally:
+        engine.close()
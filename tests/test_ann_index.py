@@ -0,0 +1,57 @@
+import pickle
+
+import numpy as np
+import pytest
+
+from sutra.ann_index import ExactIndex, IVFIndex, load_index
+from sutra.quantization import QuantizedMatrix
+
+
+@pytest.fixture
+def vectors():
+    rng = np.random.default_rng(0)
+    return rng.standard_normal((500, 16)).astype(np.float32)
+
+
+@pytest.mark.parametrize('index', [ExactIndex(), IVFIndex(nlist=8, nprobe=8)])
+def test_finds_each_vector(index, vectors):
+    index.build(vectors)
+    _, ids = index.search(vectors[123], k=1)
+    assert ids[0] == 123
+
+
+def test_shared_matrix_is_not_counted(vectors):
+    matrix = QuantizedMatrix.wrap(vectors / np.linalg.norm(vectors, axis=1, keepdims=True))
+    shared = ExactIndex().build(matrix)
+    assert shared.shared and shared.vectors is matrix and shared.nbytes == 0
+    assert ExactIndex().build(vectors).nbytes == vectors.nbytes
+
+    ivf = IVFIndex(nlist=8).build(matrix)
+    assert 0 < ivf.nbytes < vectors.nbytes
+
+
+def test_shared_index_loads_over_the_stored_matrix(vectors, tmp_path):
+    matrix = QuantizedMatrix.wrap(vectors / np.linalg.norm(vectors, axis=1, keepdims=True))
+    path = tmp_path / 'index.npz'
+    IVFIndex(nlist=8, nprobe=8).build(matrix).save(path)
+    with pytest.raises(ValueError):
+        load_index(path)
+    loaded = load_index(path, matrix)
+    assert loaded.search(vectors[7], k=1)[1][0] == 7
+
+
+@pytest.mark.parametrize('dtype', ['float32', 'float16', 'int8'])
+def test_append_fills_spare_capacity(vectors, dtype):
+    matrix = QuantizedMatrix(dtype=dtype)
+    buffers = set()
+    for start in range(0, len(vectors), 10):
+        matrix.append(vectors[start:start + 10])
+        buffers.add(id(matrix._spare[0]) if matrix._spare else None)
+    assert len(buffers) <= 8  # Doubling: a handful of copies for 50 appends
+    whole = QuantizedMatrix(vectors, dtype)
+    assert np.array_equal(matrix.data, whole.data)
+    assert matrix.scales is None or np.array_equal(matrix.scales, whole.scales)
+
+    restored = pickle.loads(pickle.dumps(matrix))
+    assert restored._spare is None and np.array_equal(restored.data, whole.data)
+    assert matrix.trim()._spare is None and matrix.nbytes == whole.nbytes
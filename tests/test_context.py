@@ -0,0 +1,39 @@
+from sutra.context import ContextPool, available_databases
+
+
+def test_least_recently_used_context_is_evicted(shop_files):
+    for name in ('north', 'south', 'east'):
+        shop_files(name)
+    assert available_databases() == ['east', 'north', 'south']
+    pool = ContextPool(max_contexts=2)
+    with pool.use('north') as north:
+        pass
+    with pool.use('south'):
+        pass
+    with pool.use('north'):
+        pass  # south is now the least recently used
+    with pool.use('east'):
+        pass
+
+    assert [c['database'] for c in pool.contexts()] == ['north', 'east']
+    assert pool.stats()['evictions'] == 1 and pool.stats()['loads'] == 3
+    with pool.use('north') as again:
+        assert again is north and north.requests == 3
+    pool.close()
+    assert north.processor is None
+
+
+def test_context_in_use_is_closed_after_release(shop_files):
+    shop_files('north')
+    shop_files('south')
+    pool = ContextPool(max_contexts=1)
+    north = pool.acquire('north')
+    with pool.use('south'):
+        pass
+
+    assert north.retired and north.processor is not None  # Evicted, still serving its request
+    assert len(north.db.execute_query("SELECT * FROM orders")) == 4
+    pool.release(north)
+    assert north.processor is None
+    assert [c['database'] for c in pool.contexts()] == ['south']
+    pool.close()
@@ -0,0 +1,47 @@
+import zipfile
+
+from sutra.docx_reader import DocxParagraph, DocxTable, read_docx, table_frame
+
+NS = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+
+
+def cell(text='', props=''):
+    return f'<w:tc><w:tcPr>{props}</w:tcPr><w:p><w:r><w:t>{text}</w:t></w:r></w:p></w:tc>'
+
+
+def write_document(path, body):
+    """A .docx holding only word/document.xml, which is all read_docx opens"""
+    with zipfile.ZipFile(path, 'w') as archive:
+        archive.writestr('word/document.xml', f'<w:document {NS}><w:body>{body}</w:body></w:document>')
+    return path
+
+
+def table(*rows):
+    return '<w:tbl>' + ''.join(f'<w:tr>{"".join(row)}</w:tr>' for row in rows) + '</w:tbl>'
+
+
+def test_grid_span_repeats_the_cell(tmp_path):
+    path = write_document(tmp_path / 'span.docx', '<w:p><w:r><w:t>Sales</w:t></w:r></w:p>' + table(
+        [cell('region'), cell('q1'), cell('q2')],
+        [cell('Total', '<w:gridSpan w:val="2"/>'), cell('$1,200')],
+    ))
+    heading, sales = list(read_docx(path))
+    assert heading == DocxParagraph('Sales', None)
+    assert sales == DocxTable(1, [['region', 'q1', 'q2'], ['Total', 'Total', '$1,200']], 'Sales')
+
+
+def test_vertical_merge_carries_the_value_down(tmp_path):
+    restart, merged = '<w:vMerge w:val="restart"/>', '<w:vMerge/>'
+    path = write_document(tmp_path / 'merge.docx', table(
+        [cell('city'), cell('product'), cell('total')],
+        [cell('Boston', restart), cell('laptop'), cell('2400')],
+        [cell('', merged), cell('monitor'), cell('1500')],
+        [cell('', merged), cell('printer'), cell('450')],
+        [cell('Austin', restart), cell('mouse', '<w:gridSpan w:val="2"/>')],
+        [cell('', merged), cell('', '<w:gridSpan w:val="2"/>' + merged)],
+    ))
+    [result] = read_docx(path)
+    assert [row[0] for row in result.rows] == ['city', 'Boston', 'Boston', 'Boston', 'Austin', 'Austin']
+    assert result.rows[-1] == ['Austin', 'mouse', 'mouse']
+    frame = table_frame(result._replace(rows=result.rows[:4]))
+    assert list(frame.columns) == ['city', 'product', 'total'] and frame['total'].sum() == 4350
@@ -0,0 +1,54 @@
+import sys
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from sutra.embedding_server import EmbeddingServer
+from sutra.embeddings import SharedEncoder
+from tests.conftest import BENCHMARKS
+
+sys.path.insert(0, str(BENCHMARKS))
+from common import HashingEncoder  # noqa: E402  (benchmarks/common.py)
+
+
+@pytest.fixture
+def server(tmp_path):
+    server = EmbeddingServer(socket_path=tmp_path / 'embed.sock', batch_window_ms=200)
+    server.model = HashingEncoder()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    for _ in range(100):
+        if server.socket_path.exists():
+            break
+        time.sleep(0.02)
+    return server
+
+
+def test_threads_share_a_batch(server):
+    encoder = SharedEncoder(socket_path=server.socket_path)
+    start = threading.Barrier(4)
+    results = {}
+
+    def encode(number):
+        start.wait()
+        results[number] = encoder.encode([f"question {number}"])
+
+    threads = [threading.Thread(target=encode, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert server.batches == 1 and server.encoded == 4  # All four were in flight at once
+    for number, vectors in results.items():
+        np.testing.assert_allclose(vectors[0], HashingEncoder().encode(f"question {number}"))
+
+
+def test_keyword_arguments_encode_in_process(server):
+    encoder = SharedEncoder(socket_path=server.socket_path)
+    encoder._local_model = HashingEncoder()
+    assert encoder.encode("hello", batch_size=8).shape == (384,)
+    assert server.encoded == 0
+    assert encoder.encode("hello").shape == (384,)
+    assert server.encoded == 1
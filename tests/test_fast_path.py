@@ -0,0 +1,50 @@
+import pytest
+
+from sutra.fast_path import RuleBasedSQL
+from sutra.schema_embeddings import RelevanceHit
+from tests.conftest import inventory_of
+
+
+@pytest.fixture
+def rules(shop_db):
+    return RuleBasedSQL(shop_db, inventory_of(shop_db), threshold=0.8)
+
+
+def hit(table, column, value):
+    return RelevanceHit(table, column, value, 1.0)
+
+
+def test_filter_by_known_value(rules, shop_db):
+    result = rules.generate("list customers in boston", [hit('customers', 'city', 'Boston')])
+    assert result.confidence >= rules.threshold
+    assert "WHERE customers.city = 'Boston'" in result.sql
+    assert len(shop_db.execute_query(result.sql)) == 2
+
+
+def test_group_by_own_column(rules):
+    result = rules.generate("total of orders by product")
+    assert result.intent == 'aggregate'
+    assert "SUM(orders.total)" in result.sql and "GROUP BY orders.product" in result.sql
+
+
+@pytest.mark.parametrize('question, hits', [
+    ("list customers not in boston", [hit('customers', 'city', 'Boston')]),
+    ("show orders after 2024-03-01", [hit('orders', 'order_date', '2024-03-01')]),
+    ("total of orders by city", []),
+    ("show the latest orders", []),
+    ("list orders by product", []),
+])
+def test_meaning_changing_words_fall_through(rules, question, hits):
+    assert rules.generate(question, hits) is None
+
+
+def test_count_over_join_counts_target_rows(rules, shop_db):
+    result = rules.generate("how many customers have orders")
+    assert "COUNT(DISTINCT customers.id)" in result.sql
+    assert shop_db.execute_query(result.sql).iloc[0, 0] == 3
+
+
+def test_count_without_join(rules, shop_db):
+    result = rules.generate("how many orders")
+    assert result.sql == "SELECT COUNT(*) AS count FROM orders"
+    assert shop_db.execute_query(result.sql).iloc[0, 0] == 4
@@ -0,0 +1,59 @@
+import csv
+import threading
+
+import config
+from sutra.feedback import SimpleFeedback
+from sutra.feedback_store import FeedbackStore, legacy_csv
+
+FIELDS = ['timestamp', 'question', 'sql', 'status', 'corrected_sql']
+
+
+def write_csv(path, rows):
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def test_concurrent_writers_on_one_file(workdir):
+    stores = [FeedbackStore() for _ in range(4)]  # One connection each, as in separate processes
+    assert stores[0].conn.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+    ids = []
+
+    def write(store, worker):
+        ids.extend(store.add('shop', f"question {worker} {i}", "SELECT 1", 'good') for i in range(50))
+
+    threads = [threading.Thread(target=write, args=(store, n)) for n, store in enumerate(stores)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    reader = stores[0]
+    rows = reader.changes_since('shop')
+    assert len(rows) == 200 and len(set(ids)) == 200
+    assert reader.changes_since('shop', rows[-1].id) == []
+    assert reader.changes_since('other') == []
+    for store in stores:
+        store.close()
+
+
+def test_legacy_csv_is_imported_once(workdir):
+    config.OUTPUT_DIR.mkdir(parents=True)
+    path = legacy_csv('shop')
+    assert path.parent == config.OUTPUT_DIR
+    rows = [{'question': 'orders in boston', 'sql': 'SELECT * FROM orders', 'status': 'good'},
+            {'question': 'top customers', 'sql': 'SELECT 1', 'status': 'bad', 'corrected_sql': 'SELECT 2'}]
+    write_csv(path, rows)
+
+    store = FeedbackStore()
+    SimpleFeedback('shop', store)
+    SimpleFeedback('shop', store)
+    assert [r.question for r in store.changes_since('shop')] == ['orders in boston', 'top customers']
+    assert store.verified_sql('shop') == ['SELECT * FROM orders', 'SELECT 2']
+
+    write_csv(path, rows + [{'question': 'new one', 'sql': 'SELECT 3', 'status': 'good'}])
+    assert store.import_csv('shop') == 1
+    assert store.import_csv('shop') == 0
+    assert len(store.changes_since('shop')) == 3
+    store.close()
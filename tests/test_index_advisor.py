@@ -0,0 +1,39 @@
+import pytest
+
+from sutra.index_advisor import IndexAdvisor, IndexRecommendation
+
+QUERIES = [
+    "SELECT * FROM customers c WHERE c.city = 'Boston'",
+    "SELECT name FROM customers WHERE city = 'New York' AND id = 2",
+    "SELECT c.name, o.total FROM customers c JOIN orders o ON o.customer_id = c.id WHERE c.id = 1",
+]
+
+
+@pytest.fixture
+def advisor(shop_db, workdir):
+    return IndexAdvisor(shop_db, log_file=workdir / 'query_log.jsonl')
+
+
+def test_recommends_filter_and_foreign_key_columns(advisor):
+    assert advisor.recommend(QUERIES) == [IndexRecommendation('customers', 'city', 2, 'filter'),
+                                          IndexRecommendation('orders', 'customer_id', 1, 'foreign key')]
+
+
+def test_skips_columns_already_indexed(advisor, shop_db):
+    shop_db.conn.execute("CREATE INDEX by_city_name ON customers (city, name)")
+    shop_db.conn.execute("CREATE INDEX by_customer ON orders (customer_id)")
+    assert advisor.recommend(QUERIES) == []
+
+
+def test_second_index_on_a_trailing_column_is_still_recommended(advisor, shop_db):
+    shop_db.conn.execute("CREATE INDEX by_name_city ON customers (name, city)")
+    assert ('customers', 'city') in {(r.table, r.column) for r in advisor.recommend(QUERIES)}
+
+
+def test_create_is_idempotent(advisor):
+    recommendations = advisor.recommend(QUERIES)
+    created = advisor.create(recommendations, QUERIES, validate=False)
+    assert created == ['CREATE INDEX IF NOT EXISTS "idx_customers_city" ON "customers" ("city")',
+                       'CREATE INDEX IF NOT EXISTS "idx_orders_customer_id" ON "orders" ("customer_id")']
+    assert advisor.create(recommendations, QUERIES, validate=False) == []
+    assert advisor.recommend(QUERIES) == []
@@ -0,0 +1,68 @@
+from sutra.ingest import append_rows, foreign_keys, load_order
+
+
+def test_foreign_keys_both_forms():
+    ddl = ("CREATE TABLE order_items (id INTEGER PRIMARY KEY, order_id INTEGER REFERENCES orders(id), "
+           "product_sku TEXT, FOREIGN KEY (`product_sku`) REFERENCES `products` (`sku`))")
+    assert foreign_keys(ddl) == {'order_id': ('orders', 'id'), 'product_sku': ('products', 'sku')}
+
+
+def test_load_order_puts_referenced_tables_first():
+    references = {'orders': {'customer_id': ('customers', 'id')},
+                  'order_items': {'order_id': ('orders', 'id')}}
+    assert load_order(['order_items', 'orders', 'customers'], references) == ['customers', 'orders', 'order_items']
+    cycle = {'a': {'b_id': ('b', 'id')}, 'b': {'a_id': ('a', 'id')}}
+    assert sorted(load_order(['a', 'b'], cycle)) == ['a', 'b']
+
+
+def test_append_resolves_lookups_and_skips_stored_rows(shop_db):
+    rows = {
+        'orders': [
+            {'customer_id': {'name': 'Ann Lee'}, 'product': 'mouse', 'quantity': 1, 'total': 25},
+            {'customer_id': {'name': 'John Smith'}, 'product': 'dock', 'quantity': 2, 'total': 180},
+            {'customer_id': {'name': 'Nobody'}, 'product': 'cable', 'quantity': 1, 'total': 5},
+        ],
+        'customers': [
+            {'name': 'Ann Lee', 'email': 'ann@email.com', 'city': 'Denver', 'vip': True},
+            {'name': 'John Smith', 'email': 'john.smith@email.com', 'city': 'New York'},
+        ],
+        'suppliers': [{'name': 'Acme'}],
+    }
+    inserted = append_rows(shop_db, rows)
+
+    assert list(inserted['customers']['name']) == ['Ann Lee']  # John Smith was already stored
+    assert 'vip' not in inserted['customers'].columns
+    assert 'suppliers' not in inserted
+    stored = shop_db.execute_query(
+        "SELECT o.product, c.name FROM orders o LEFT JOIN customers c ON o.customer_id = c.id WHERE o.id > 4 "
+        "ORDER BY o.id")
+    assert list(stored['product']) == ['mouse', 'dock', 'cable']
+    assert list(stored['name'][:2]) == ['Ann Lee', 'John Smith'] and stored['name'].isna()[2]
+    assert list(inserted['orders']['id']) == [5, 6, 7]
+
+
+def test_rows_with_nulls_are_found(shop_db):
+    shop_db.execute_query("INSERT INTO customers (name, email, city) VALUES ('Ann Lee', NULL, 'Denver')")
+    rows = {
+        'customers': [{'name': 'Ann Lee', 'email': None, 'city': 'Denver'},
+                      {'name': 'Bo Chan', 'email': None, 'city': None}],
+        'orders': [{'customer_id': {'name': 'Ann Lee', 'email': None}, 'product': 'mouse', 'total': 25}],
+    }
+    inserted = append_rows(shop_db, rows)
+    assert list(inserted['customers']['name']) == ['Bo Chan']
+    assert list(inserted['orders']['customer_id']) == [5]
+
+
+def test_lookups_are_batched(shop_db):
+    statements = []
+    shop_db.conn.set_trace_callback(statements.append)
+    rows = {
+        'customers': [{'name': f"Customer {i}", 'city': 'Austin'} for i in range(50)],
+        'orders': [{'customer_id': {'name': f"Customer {i}"}, 'product': 'dock'} for i in range(50)],
+    }
+    inserted = append_rows(shop_db, rows)
+    shop_db.conn.set_trace_callback(None)
+
+    assert len(inserted['customers']) == 50 and inserted['orders']['customer_id'].notna().all()
+    lookups = [s for s in statements if s.startswith('SELECT') and ' IN (' in s]
+    assert len(lookups) == 2  # Customers already stored, then the orders' customer references
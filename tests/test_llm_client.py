@@ -0,0 +1,59 @@
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip('requests')
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'benchmarks'))
+
+from llm_client import MockLLMServer  # noqa: E402  (benchmarks/llm_client.py)
+from sutra.llm_client import BATCH, LLMClient, LLMError  # noqa: E402
+
+
+@pytest.fixture
+def server():
+    # Five requests per second, at most one at a time
+    server = MockLLMServer(requests_per_min=300, tokens_per_min=0, window_s=0.2, latency_ms=5, ms_per_1k_tokens=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_completion_and_token_accounting(server):
+    client = LLMClient(base_url=server.url, api_key='mock', requests_per_min=0, tokens_per_min=0)
+    assert client.complete('mock', 'x' * 400) == 'SELECT 1'
+    stats = client.stats()
+    assert stats['calls'] == 1 and stats['prompt_tokens'] == 100 and stats['completion_tokens'] == 20
+
+
+def test_rate_limited_call_is_retried(server):
+    client = LLMClient(base_url=server.url, api_key='mock', requests_per_min=0, tokens_per_min=0,
+                       backoff_s=0.01, max_retries=5)
+    for _ in range(3):
+        assert client.complete('mock', 'hello', priority=BATCH) == 'SELECT 1'
+    assert server.rejected > 0 and client.retries == server.rejected
+    assert client.failures == 0
+
+
+def test_client_limits_avoid_429s(server):
+    # A little under the server's limit, so clock skew between the two buckets cannot matter
+    client = LLMClient(base_url=server.url, api_key='mock', requests_per_min=240, tokens_per_min=0,
+                       window_s=0.2)
+    for _ in range(3):
+        client.complete('mock', 'hello')
+    assert server.rejected == 0
+
+
+def test_unreachable_endpoint_fails_after_retries():
+    client = LLMClient(base_url='http://127.0.0.1:9/v1', api_key='mock', requests_per_min=0, tokens_per_min=0,
+                       backoff_s=0.01, max_retries=1, timeout=1)
+    with pytest.raises(LLMError):
+        client.complete('mock', 'hello')
+    assert client.retries == 1 and client.failures == 1
+
+
+def test_unknown_priority():
+    with pytest.raises(ValueError):
+        LLMClient(base_url='http://127.0.0.1:9/v1').complete('mock', 'hello', priority='urgent')
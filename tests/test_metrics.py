@@ -0,0 +1,52 @@
+import json
+import threading
+
+from sutra.metrics import Metrics
+
+
+def test_trace_collects_stages_outcomes_and_counters(tmp_path):
+    metrics = Metrics()
+    metrics.jsonl_path = tmp_path / 'traces.jsonl'
+    with metrics.trace('question', question='how many orders'):
+        with metrics.stage('llm'):
+            pass
+        metrics.outcome('cache', 'miss')
+        metrics.count('llm_prompt_tokens', 812)
+        with metrics.trace('inner', user='ann'):  # Nested traces join the outer one
+            metrics.outcome('fast_path', 'hit')
+
+    [trace] = [json.loads(line) for line in metrics.jsonl_path.read_text().splitlines()]
+    assert trace['question'] == 'how many orders' and trace['user'] == 'ann'
+    assert [s['stage'] for s in trace['stages']] == ['llm', 'inner']
+    assert trace['outcomes'] == {'cache': 'miss', 'fast_path': 'hit'}
+    assert trace['counters'] == {'llm_prompt_tokens': 812}
+    assert metrics.snapshot()['stages']['question']['count'] == 1
+
+
+def test_threads_keep_their_own_traces():
+    metrics = Metrics()
+    traces = {}
+
+    def request(number):
+        with metrics.trace('question') as trace:
+            metrics.outcome('worker', str(number))
+            traces[number] = trace
+
+    threads = [threading.Thread(target=request, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert all(trace['outcomes'] == {'worker': str(n)} for n, trace in traces.items())
+    assert metrics.snapshot()['stages']['question']['count'] == 8
+
+
+def test_prometheus_text():
+    metrics = Metrics()
+    metrics.record('llm', 0.25)
+    metrics.outcome('cache', 'hit')
+    metrics.count('llm_retries', 2)
+    text = metrics.prometheus_text()
+    assert 'sutra_stage_seconds_count{stage="llm"} 1' in text
+    assert 'sutra_outcomes_total{kind="cache",result="hit"} 1' in text
+    assert 'sutra_llm_retries_total 2' in text
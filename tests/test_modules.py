@@ -0,0 +1,34 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+# clear_cache deletes a file on import; visualizer is the plotting path itself (plotly, streamlit)
+MODULES = sorted(f"sutra.{path.stem}" for path in (ROOT / 'sutra').glob('*.py')
+                 if path.stem not in ('__init__', 'clear_cache', 'visualizer'))
+HEAVY = ['sentence_transformers', 'torch', 'openai', 'plotly', 'streamlit', 'duckdb', 'pyarrow', 'fastapi']
+
+
+def imported_after(modules, tmp_path):
+    """Heavy packages loaded and paths created by importing modules in a fresh interpreter"""
+    code = (f"import sys, json, config\n"
+            f"for name in {modules!r}: __import__(name)\n"
+            f"print(json.dumps([m for m in {HEAVY!r} if m in sys.modules]))")
+    result = subprocess.run([sys.executable, '-c', code], cwd=tmp_path, capture_output=True, text=True,
+                            env={'PYTHONPATH': str(ROOT), 'PATH': ''}, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+@pytest.mark.parametrize('module', MODULES)
+def test_import_loads_no_heavy_package(module, tmp_path):
+    assert imported_after([module], tmp_path) == []
+
+
+def test_import_creates_no_directories(tmp_path):
+    data_dir = ROOT / 'data'
+    existed = data_dir.exists()
+    imported_after(['main'] + MODULES, tmp_path)
+    assert data_dir.exists() == existed and list(tmp_path.iterdir()) == []
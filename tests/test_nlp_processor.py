@@ -0,0 +1,44 @@
+import pytest
+
+import config
+from sutra.llm_cache import set_completion_backend
+from sutra.schema_embeddings import RelevanceHit
+
+PRODUCTS = "CREATE TABLE products (id INTEGER PRIMARY KEY, name TEXT, price REAL)"
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    """Queue of LLM answers; the prompts sent are kept in llm.prompts"""
+    class Replies(list):
+        def __init__(self):
+            super().__init__()
+            self.prompts = []
+
+        def __call__(self, model, prompt, temperature):
+            self.prompts.append(prompt)
+            return self.pop(0)
+
+    replies = Replies()
+    monkeypatch.setattr(config, 'LLM_CACHE_MODE', 'off')
+    set_completion_backend(replies)
+    yield replies
+    set_completion_backend(None)
+
+
+def test_prompt_schema_keeps_tables_pointing_at_hits(processor):
+    schema, literals = processor._prompt_context([RelevanceHit('customers', 'city', 'Boston', 1.0)])
+    assert 'CREATE TABLE customers' in schema and 'CREATE TABLE orders' in schema
+    assert literals == ["- customers.city = 'Boston'"]
+
+
+def test_repair_prompt_has_the_whole_schema(processor, shop_db, llm):
+    shop_db.execute_schema(PRODUCTS)
+    processor.refresh_schema()
+    hits = [RelevanceHit('customers', 'city', 'Boston', 1.0)]
+    llm.extend(["SELECT name FROM product", "SELECT name FROM products"])
+
+    assert processor._llm_sql("names of products", hits) == "SELECT name FROM products"
+    first, repair = llm.prompts
+    assert 'CREATE TABLE products' not in first  # Narrowed to the hit tables
+    assert 'CREATE TABLE products' in repair and 'did you mean products?' in repair
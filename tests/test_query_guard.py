@@ -0,0 +1,46 @@
+import time
+
+import pytest
+
+from sutra.query_guard import QueryGuard, table_aliases
+
+CARTESIAN = "SELECT c.name, o.product FROM customers c, orders o"
+
+
+@pytest.fixture
+def guard(shop_db):
+    return QueryGuard(shop_db, budget=10, row_limit=5, timeout=2)
+
+
+def test_aliases():
+    assert table_aliases("SELECT * FROM customers AS c JOIN orders o ON o.customer_id = c.id",
+                         ['customers', 'orders']) == {'customers': 'customers', 'orders': 'orders',
+                                                      'c': 'customers', 'o': 'orders'}
+
+
+def test_cartesian_join_over_budget_is_limited(guard):
+    guarded = guard.guard(CARTESIAN + ";")
+    assert guarded.plan.cartesian and guarded.plan.cost == 16
+    assert sorted(guarded.plan.full_scans) == ['customers', 'orders']
+    assert guarded.limited and guarded.sql == CARTESIAN + " LIMIT 5"
+    assert guarded.timeout == 2
+
+
+@pytest.mark.parametrize('sql', [CARTESIAN + " LIMIT 3", CARTESIAN + " LIMIT 3 OFFSET 2"])
+def test_existing_trailing_limit_is_kept(guard, sql):
+    guarded = guard.guard(sql)
+    assert guarded.plan.cost > guard.budget
+    assert not guarded.limited and guarded.sql == sql
+
+
+def test_indexed_lookup_is_left_alone(guard):
+    guarded = guard.guard("SELECT * FROM customers WHERE id = 1")
+    assert not guarded.plan.full_scans and not guarded.limited
+
+
+def test_statement_timeout_stops_a_runaway_query(shop_db):
+    endless = ("WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n) "
+               "SELECT COUNT(*) FROM n")
+    start = time.monotonic()
+    assert shop_db.execute_query(endless, timeout=0.2) is None
+    assert time.monotonic() - start < 5
@@ -0,0 +1,52 @@
+import pytest
+
+from sutra import query_templates
+from sutra.cache_manager import CacheManager
+from sutra.schema_embeddings import RelevanceHit
+
+SQL = "SELECT o.* FROM orders o JOIN customers c ON o.customer_id = c.id WHERE c.name = 'John Smith'"
+
+
+def name_hit(value):
+    return RelevanceHit('customers', 'name', value, 1.0)
+
+
+@pytest.fixture
+def cache(workdir):
+    cache = CacheManager('shop')
+    cache.save_to_disk_enabled = False
+    return cache
+
+
+def test_extract_and_parameterize():
+    template = query_templates.extract("orders by John Smith", [name_hit('John Smith')])
+    assert template.question == "orders by {1}"
+    assert template.columns == [('customers.name',)]
+    assert query_templates.parameterize(SQL, template).endswith("c.name = '{1}'")
+    assert query_templates.parameterize("SELECT * FROM orders WHERE customer_id = 1", template) is None
+
+
+def test_bind_escapes_quotes():
+    assert query_templates.bind("SELECT * FROM t WHERE name = '{1}'", ["O'Brien"]) == \
+        "SELECT * FROM t WHERE name = 'O''Brien'"
+
+
+def test_template_rebinds_other_value(cache):
+    cache.add_to_cache("orders by John Smith", SQL, [name_hit('John Smith')])
+    sql, similarity, from_template = cache.lookup("orders by Sarah Johnson", [name_hit('Sarah Johnson')])
+    assert from_template and similarity == 1.0
+    assert sql == SQL.replace('John Smith', 'Sarah Johnson')
+
+
+def test_value_from_another_column_is_not_bound(cache):
+    cache.add_to_cache("orders by John Smith", SQL, [name_hit('John Smith')])
+    sql, _, _ = cache.lookup("orders by Boston", [RelevanceHit('customers', 'city', 'Boston', 1.0)])
+    assert sql is None
+
+
+def test_literal_entry_needs_the_same_values(cache):
+    cache.add_to_cache("orders by John Smith", SQL, [name_hit('John Smith')])
+    assert cache.lookup("orders by John Smith", [name_hit('John Smith')])[0] == SQL
+    cache.discard("orders by Sarah Johnson", [name_hit('Sarah Johnson')])
+    assert "orders by {1}" not in cache.cache
+    assert "orders by John Smith" in cache.cache
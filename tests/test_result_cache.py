@@ -0,0 +1,87 @@
+import os
+
+from sutra.result_cache import ResultCache, is_cacheable, normalize_sql, referenced_tables, remove_orphans
+
+COUNT = "SELECT COUNT(*) AS n FROM orders"
+
+
+def test_normalize_keeps_string_literals():
+    assert normalize_sql("SELECT  *\n FROM t WHERE name = 'a  b' ;") == "SELECT * FROM t WHERE name = 'a  b'"
+
+
+def test_referenced_tables_match_whole_names():
+    assert referenced_tables("SELECT * FROM orders_archive", ['orders', 'orders_archive']) == ['orders_archive']
+    assert is_cacheable("  with x as (select 1) select * from x")
+    assert not is_cacheable("DELETE FROM orders")
+
+
+def test_hit_after_first_run(shop_db, workdir):
+    cache = ResultCache(shop_db, max_mb=10, cache_dir=workdir / 'results')
+    assert cache.execute(COUNT)['n'][0] == 4
+    assert cache.execute(COUNT + ";")['n'][0] == 4
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_write_invalidates(shop_db, workdir):
+    cache = ResultCache(shop_db, max_mb=10, cache_dir=workdir / 'results')
+    customers = cache.execute("SELECT COUNT(*) AS n FROM customers")
+    cache.execute(COUNT)
+    shop_db.conn.execute("INSERT INTO orders (customer_id, product, total) VALUES (2, 'mouse', 20)")
+    shop_db.conn.commit()
+    assert cache.execute(COUNT)['n'][0] == 5
+    assert cache.misses == 3  # Tables are versioned together on SQLite, so customers misses as well
+    assert cache.execute("SELECT COUNT(*) AS n FROM customers").equals(customers)
+
+
+def test_schema_change_invalidates(shop_db, workdir):
+    cache = ResultCache(shop_db, max_mb=10, cache_dir=workdir / 'results')
+    cache.execute(COUNT)
+    shop_db.bump_version()
+    cache.execute(COUNT)
+    assert cache.hits == 0
+
+
+def test_spill_directory_is_per_process(shop_db, workdir):
+    root = workdir / 'results'
+    stale = root / '999999999'  # No such pid
+    stale.mkdir(parents=True)
+    (stale / 'old.parquet').write_bytes(b'')
+    cache = ResultCache(shop_db, cache_dir=root)
+    assert cache.cache_dir == root / str(os.getpid())
+    assert not stale.exists()
+
+    (root / 'shared').mkdir()
+    remove_orphans(root)
+    assert (root / 'shared').exists()
+
+
+class StatsConnection:
+    """information_schema.TABLES rows as a MySQL connection would return them"""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def cursor(self):
+        return self
+
+    def execute(self, sql):
+        assert 'UPDATE_TIME' in sql
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        pass
+
+
+def test_mysql_marker_of_a_table_written_this_second_never_repeats():
+    import itertools
+    import threading
+    from sutra.database_manager import DatabaseManager
+
+    db = object.__new__(DatabaseManager)
+    db.db_type, db.lock, db.schema_version, db._volatile = 'mysql', threading.RLock(), 0, itertools.count()
+    db.conn = StatsConnection([('orders', '2024-03-20 10:00:00', 4, 1), ('customers', '2024-03-19 09:00:00', 4, 0)])
+    first, second = db.get_table_versions(['orders', 'customers']), db.get_table_versions(['orders', 'customers'])
+    assert first['orders'] != second['orders']
+    assert first['customers'] == second['customers'] == '0:2024-03-19 09:00:00:4'
@@ -0,0 +1,31 @@
+import numpy as np
+
+import sutra.schema_embeddings as schema_embeddings
+from sutra.schema_embeddings import SchemaEmbeddings
+
+
+def test_each_publish_appends_to_one_matrix(shop_db, stub_encoder, monkeypatch):
+    monkeypatch.setattr(schema_embeddings, 'PUBLISH_INTERVAL_S', 0.0)  # Publish after every table
+    checker = SchemaEmbeddings(shop_db, background=False)
+    inventory = checker.data_inventory
+    texts, embeddings = inventory['embedded_texts'], inventory['embeddings']
+
+    assert 'table customers' in texts and 'table orders' in texts
+    assert len(embeddings) == len(texts) and embeddings._spare is None
+    expected = stub_encoder.encode(texts)  # Rows stay in text order across appends
+    assert np.allclose(embeddings[np.arange(len(texts))], expected, atol=1e-2)
+    _, ids = checker.index.search(expected[-1], k=1)
+    assert np.allclose(expected[ids[0]], expected[-1])
+
+
+def test_question_is_encoded_outside_the_lock(processor, stub_encoder, monkeypatch):
+    checker = processor.relevancy_checker
+    encode, held = stub_encoder.encode, []
+
+    def tracking(sentences, **kwargs):
+        held.append(checker._lock._is_owned())
+        return encode(sentences, **kwargs)
+
+    monkeypatch.setattr(stub_encoder, 'encode', tracking)
+    checker.is_relevant("average quantity")  # Names a column only: scored by similarity
+    assert held == [False]
@@ -0,0 +1,61 @@
+import pytest
+
+import config
+from sutra.context import ContextPool
+from sutra.llm_cache import set_completion_backend
+from sutra.service import stage_timings
+
+ORDERS = "SELECT COUNT(*) AS n FROM orders"
+
+
+def test_stage_timings_sums_repeated_stages():
+    trace = {'stages': [{'stage': 'guard', 'ms': 1.25}, {'stage': 'execute', 'ms': 4.0},
+                        {'stage': 'guard', 'ms': 0.5}]}
+    assert stage_timings(trace) == {'guard': 1.75, 'execute': 4.0}
+
+
+def test_create_app_needs_fastapi(monkeypatch):
+    import sutra.service as service
+    monkeypatch.setattr(service, 'FASTAPI_AVAILABLE', False)
+    with pytest.raises(ImportError, match='fastapi'):
+        service.create_app()
+
+
+@pytest.fixture
+def client(shop_files, monkeypatch):
+    """TestClient over a pool with the shop database; the LLM always answers ORDERS"""
+    pytest.importorskip('fastapi')
+    pytest.importorskip('httpx')
+    from fastapi.testclient import TestClient
+    from sutra.service import create_app
+
+    shop_files('shop')
+    monkeypatch.setattr(config, 'LLM_CACHE_MODE', 'off')
+    set_completion_backend(lambda model, prompt, temperature: ORDERS)
+    pool = ContextPool(max_contexts=2)
+    with TestClient(create_app(pool)) as client:
+        yield client
+    pool.close()
+    set_completion_backend(None)
+
+
+def test_query_returns_rows_and_timings(client):
+    response = client.post('/query', json={'database': 'shop', 'question': 'how many orders are there'})
+    assert response.status_code == 200
+    body = response.json()
+    assert body['sql'] == ORDERS and body['rows'] == [[4]] and not body['truncated']
+    assert body['timings'] and body['total_ms'] > 0
+    assert client.get('/health').json()['warm'] == ['shop']
+
+
+def test_unknown_database_is_404(client):
+    response = client.post('/query', json={'database': 'missing', 'question': 'how many orders'})
+    assert response.status_code == 404
+
+
+def test_evicted_database_reloads(client):
+    client.post('/query', json={'database': 'shop', 'question': 'how many orders are there'})
+    assert client.delete('/databases/shop').json() == {'database': 'shop', 'evicted': True}
+    assert client.get('/health').json()['warm'] == []
+    assert client.post('/databases/shop/refresh').json()['database'] == 'shop'
+    assert client.get('/health').json()['pool']['loads'] == 2
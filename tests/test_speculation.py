@@ -0,0 +1,55 @@
+import threading
+
+import config
+
+CANDIDATE = "SELECT COUNT(*) AS n FROM orders"
+OTHER = "SELECT COUNT(*) AS n FROM customers"
+
+
+def near_miss(processor, monkeypatch, distance, llm_sql, release):
+    def local_sql(question, hits, typed, near_misses=None):
+        near_misses.append((distance, CANDIDATE))
+        return None
+
+    def llm(question, hits):
+        release.wait(5)
+        return llm_sql
+
+    monkeypatch.setattr(processor, '_local_sql', local_sql)
+    monkeypatch.setattr(processor, '_llm_sql', llm)
+
+
+def test_near_miss_waits_for_the_llm(processor, monkeypatch):
+    release = threading.Event()
+    near_miss(processor, monkeypatch, 0.0, OTHER, release)
+    timer = threading.Timer(0.2, release.set)
+    timer.start()
+    assert processor._speculate("how many orders", []) == (OTHER, None)
+    assert release.is_set()  # Not answered before the LLM
+    assert processor.cache.lookup("how many orders")[0] == OTHER
+
+
+def test_far_near_miss_runs_while_the_llm_answers(processor, monkeypatch):
+    release = threading.Event()
+    release.set()
+    near_miss(processor, monkeypatch, config.SPECULATIVE_MARGIN, CANDIDATE, release)
+    sql, (guarded, result) = processor._speculate("how many orders", [])
+    assert sql == CANDIDATE and result['n'][0] == 4
+
+
+def test_reader_query_does_not_wait_for_the_lock(shop_db):
+    held, done = threading.Event(), threading.Event()
+
+    def hold():
+        with shop_db.lock:
+            held.set()
+            done.wait(5)
+
+    thread = threading.Thread(target=hold)
+    thread.start()
+    held.wait(5)
+    try:
+        assert shop_db.execute_query(CANDIDATE, reader=True)['n'][0] == 4
+    finally:
+        done.set()
+        thread.join()
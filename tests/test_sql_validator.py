@@ -0,0 +1,49 @@
+import pytest
+
+from sutra.sql_validator import SQLValidator, references, statement_error
+
+
+@pytest.fixture
+def validator(shop_db):
+    return SQLValidator(shop_db)
+
+
+def test_valid_join_with_aliases(validator):
+    sql = ("SELECT c.name, SUM(o.total) FROM customers c JOIN orders o ON o.customer_id = c.id "
+           "GROUP BY c.name;")
+    assert validator.check(sql) is None
+
+
+def test_references_resolve_aliases_and_derived_tables():
+    refs = references("SELECT t.n FROM (SELECT COUNT(*) AS n FROM orders) t JOIN customers AS c ON 1 = 1")
+    assert {'orders', 'customers'} <= {t.lower() for t in refs.tables}
+    assert refs.aliases.get('c') == 'customers'
+    assert 't' in refs.derived
+
+
+@pytest.mark.parametrize('sql, message', [
+    ("SELECT * FROM customer", "no such table: customer (did you mean customers?)"),
+    ("SELECT c.nme FROM customers c", "no such column: c.nme (did you mean name?)"),
+    ("SELECT x.id FROM orders o", "no such table or alias: x"),
+])
+def test_reference_errors(validator, sql, message):
+    assert validator.check(sql).startswith(message)
+
+
+@pytest.mark.parametrize('sql, message', [
+    ("", "empty query"),
+    ("DELETE FROM orders", "only SELECT queries can be run, got DELETE"),
+    ("SELECT 1; SELECT 2", "more than one statement"),
+])
+def test_statement_errors(sql, message):
+    assert statement_error(sql) == message
+
+
+def test_compile_error_from_sqlite(validator):
+    assert "no such column: totl" in validator.check("SELECT totl FROM orders")
+
+
+def test_schema_follows_changes(validator, shop_db):
+    assert validator.check("SELECT sku FROM products") is not None
+    shop_db.execute_schema("CREATE TABLE products (id INTEGER PRIMARY KEY, sku TEXT);")
+    assert validator.check("SELECT sku FROM products") is None
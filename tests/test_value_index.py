@@ -0,0 +1,57 @@
+import pickle
+
+from sutra.value_index import ValueIndex, tokenize
+
+VALUES = [('John Smith', 'customers.name'), ('Sarah Johnson', 'customers.name'),
+          ('New York', 'customers.city'), ('Boston', 'customers.city'), ('New York', 'stores.city')]
+
+
+def build(values):
+    index = ValueIndex()
+    for value, column in values:
+        index.add_value(value, column)
+    return index.finalize()
+
+
+def test_tokenize_drops_single_characters():
+    assert tokenize("J. R. Smith-Jones") == ['smith', 'jones']
+
+
+def test_exact_lookup_and_postings():
+    index = build(VALUES)
+    [value_id] = index.find_exact('new york')
+    assert index.original(value_id) == 'New York'
+    assert sorted(index.columns_for(value_id)) == ['customers.city', 'stores.city']
+    assert [index.original(v) for v in index.find_exact('smith')] == ['John Smith']
+
+
+def test_partial_and_contained_values():
+    index = build(VALUES)
+    assert [index.original(v) for v in index.find_partial('ohns')] == ['Sarah Johnson']
+    found = {index.original(v) for v in index.values_in("orders from john smith in boston")}
+    assert found == {'John Smith', 'Boston'}
+
+
+def test_incremental_finalize_matches_full_build():
+    stored = VALUES + [(f"Customer {i}", 'customers.name') for i in range(40)]
+    added = [('Johnny Walker', 'customers.name'), ('Boston', 'stores.city')]
+    index = build(stored)
+    for value, column in added:
+        index.add_value(value, column)
+    index.finalize()
+    assert index._overflow['token'] and index._overflow['posting']  # Appended without a rebuild
+
+    full = build(stored + added)
+    for term in ('boston', 'johnny', 'new york'):
+        assert index.find_exact(term) == full.find_exact(term)
+        for value_id in index.find_exact(term):
+            assert sorted(index.columns_for(value_id)) == sorted(full.columns_for(value_id))
+    assert sorted(index.find_partial('john')) == sorted(full.find_partial('john'))
+
+
+def test_pickle_round_trip():
+    index = build(VALUES)
+    index.add_value('Emma Wilson', 'customers.name')
+    restored = pickle.loads(pickle.dumps(index.finalize()))
+    assert restored.original(restored.find_exact('emma wilson')[0]) == 'Emma Wilson'
+    assert restored.find_partial('wils') == index.find_partial('wils')